@@ -0,0 +1,157 @@
+"""Event-loop benchmark for the bot's run modes, using a stand-in IB.
+
+Pushes batches of tickers through pendingTickersEvent -> SymbolFeed fan-out at a
+fixed cadence (like ib_insync does after each socket read), plus periodic bar
+update tasks, while a probe task measures how late asyncio.sleep() wakes up.
+Each mode runs in its own subprocess because nest_asyncio patches asyncio
+globally.
+
+Usage:
+    python bench/loop_bench.py                 # all available modes
+    python bench/loop_bench.py --mode native --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ['compat', 'native', 'fast']
+
+class StandInIB:
+    """Only what the ticker path touches: the event and market data objects"""
+    def __init__(self):
+        from eventkit import Event
+        self.pendingTickersEvent = Event('pendingTickersEvent')
+
+class CountingStrategy:
+    def __init__(self, state):
+        self.state = state
+        self.calls = 0
+
+    def on_ticker_update(self, last_price, ticker):
+        self.calls += 1
+        # A trigger check comparable to ORB/VWAP on_ticker_update
+        if last_price > self.state.last_price * 2:
+            self.state.status = "TRIGGERED"
+
+    async def on_bar_update(self, bars, has_new_bar):
+        self.calls += 1
+        await asyncio.sleep(0)
+
+async def run_benchmark(seconds: float, symbols: int, strategies_per_symbol: int, batch_interval: float, bar_every: int):
+    from ib_insync import Stock, Ticker
+    from bot.feed import SymbolFeed
+    from bot.models import TradeState
+
+    ib = StandInIB()
+    feeds = {}
+    tickers = []
+    for i in range(symbols):
+        symbol = f"SYM{i}"
+        feed = SymbolFeed(ib, symbol)
+        for j in range(strategies_per_symbol):
+            feed.add_strategy(f"S{j}", CountingStrategy(TradeState(symbol=symbol)))
+        feeds[symbol] = feed
+        tickers.append(Ticker(contract=Stock(symbol, 'SMART', 'USD'), last=100.0))
+
+    def on_tickers(batch):
+        for ticker in batch:
+            feed = feeds.get(ticker.contract.symbol)
+            if feed:
+                feed.on_ticker_update(ticker.last, ticker)
+
+    ib.pendingTickersEvent += on_tickers
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + seconds
+    batches = 0
+
+    def emit():
+        nonlocal batches
+        if loop.time() >= stop_at:
+            return
+        for ticker in tickers:
+            ticker.last += 0.01
+        ib.pendingTickersEvent.emit(tickers)
+        batches += 1
+        if bar_every and batches % bar_every == 0:
+            # keepUpToDate bar updates: one task per symbol, as ORBBot.on_bar_update does
+            for feed in feeds.values():
+                asyncio.ensure_future(feed.on_bar_update([], True))
+        loop.call_later(batch_interval, emit)
+
+    lateness = []
+    async def probe():
+        period = 0.005
+        while loop.time() < stop_at:
+            t0 = loop.time()
+            await asyncio.sleep(period)
+            lateness.append((loop.time() - t0 - period) * 1000)
+
+    started = time.perf_counter()
+    loop.call_soon(emit)
+    await probe()
+    elapsed = time.perf_counter() - started
+
+    calls = sum(s.calls for f in feeds.values() for s in f.strategies.values())
+    lateness.sort()
+    return {
+        "callbacks_per_s": round(calls / elapsed),
+        "batches_per_s": round(batches / elapsed),
+        "jitter_p50_ms": round(statistics.median(lateness), 3),
+        "jitter_p99_ms": round(lateness[min(len(lateness) - 1, math.ceil(len(lateness) * 0.99) - 1)], 3),
+        "jitter_max_ms": round(lateness[-1], 3),
+    }
+
+def run_mode(mode: str, args):
+    from bot.runtime import fast_loop_factory
+    if mode == 'fast' and not fast_loop_factory():
+        return None
+
+    async def main():
+        if mode == 'compat':
+            import nest_asyncio
+            nest_asyncio.apply()
+        return await run_benchmark(args.seconds, args.symbols, args.strategies, args.interval, args.bar_every)
+
+    if mode == 'fast':
+        with asyncio.Runner(loop_factory=fast_loop_factory()) as runner:
+            return runner.run(main())
+    return asyncio.run(main())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--strategies', type=int, default=2, help="strategies per symbol")
+    parser.add_argument('--interval', type=float, default=0.001, help="seconds between ticker batches")
+    parser.add_argument('--bar-every', type=int, default=10, help="ticker batches between bar update rounds (0 = off)")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args)))
+        return
+
+    print(f"{'mode':<8} {'callbacks/s':>12} {'batches/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode in MODES:
+        cmd = [sys.executable, os.path.abspath(__file__), '--mode', mode,
+               '--seconds', str(args.seconds), '--symbols', str(args.symbols),
+               '--strategies', str(args.strategies), '--interval', str(args.interval),
+               '--bar-every', str(args.bar_every)]
+        out = subprocess.run(cmd, capture_output=True, text=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1]) if out.returncode == 0 and out.stdout.strip() else None
+        if not result:
+            print(f"{mode:<8} {'unavailable':>12}")
+            continue
+        print(f"{mode:<8} {result['callbacks_per_s']:>12,} {result['batches_per_s']:>10,} "
+              f"{result['jitter_p50_ms']:>8} {result['jitter_p99_ms']:>8} {result['jitter_max_ms']:>8}")
+
+if __name__ == '__main__':
+    main()
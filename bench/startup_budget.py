@@ -0,0 +1,91 @@
+"""Import-time and memory budget of the trading process.
+
+Imports main.py in a fresh interpreter (what `python main.py` pays before
+connecting) and checks:
+  - wall time of the import
+  - resident memory right after it
+  - that none of the UI / analysis packages got pulled in
+
+The slowest modules come from `python -X importtime`. Exits with status 1 when
+a budget is exceeded, so it can gate a change that adds an import.
+
+Usage:
+    python bench/startup_budget.py
+    python bench/startup_budget.py --max-import-ms 600 --max-rss-mb 80 --top 15
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dashboard-only dependencies: the bot process must not import them
+# (numpy is not listed: eventkit, under ib_insync, imports it)
+FORBIDDEN = ('streamlit', 'psutil', 'pytz', 'nest_asyncio', 'pandas', 'plotly')
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import main
+elapsed = time.perf_counter() - t0
+from bot.metrics import current_rss_bytes
+print(json.dumps({
+    "import_s": elapsed,
+    "rss_bytes": current_rss_bytes(),
+    "modules": len(sys.modules),
+    "forbidden": sorted(m for m in %r if m in sys.modules),
+}))
+""" % (FORBIDDEN,)
+
+def measure():
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def slowest_imports(top: int):
+    """(self us, cumulative us, module) of the slowest imports, from -X importtime"""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((int(self_us), int(cumulative_us), name))
+    return sorted(rows, reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-import-ms", type=float, default=1000.0)
+    parser.add_argument("--max-rss-mb", type=float, default=100.0)
+    parser.add_argument("--runs", type=int, default=3, help="best of N fresh interpreters")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    best = min(results, key=lambda r: r["import_s"])
+    import_ms = best["import_s"] * 1000
+    rss_mb = best["rss_bytes"] / 1e6
+
+    print(f"import main: {import_ms:.0f} ms (budget {args.max_import_ms:.0f}) | "
+          f"RSS {rss_mb:.1f} MB (budget {args.max_rss_mb:.0f}) | {best['modules']} modules")
+    print("\nSlowest imports (self time):")
+    for self_us, cumulative_us, name in slowest_imports(args.top):
+        print(f"  {self_us / 1000:8.1f} ms  (cum {cumulative_us / 1000:7.1f} ms)  {name}")
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append(f"import time {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+    if rss_mb > args.max_rss_mb:
+        failures.append(f"RSS {rss_mb:.1f} MB > {args.max_rss_mb:.0f} MB")
+    if best["forbidden"]:
+        failures.append(f"UI/analysis packages imported: {', '.join(best['forbidden'])}")
+    if failures:
+        print("\nBUDGET EXCEEDED: " + "; ".join(failures))
+        return 1
+    print("\nWithin budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
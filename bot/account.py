@@ -0,0 +1,98 @@
+import logging
+import time
+from ib_insync import IB
+
+logger = logging.getLogger(__name__)
+
+# Account values kept from the stream, per currency (the configured one and BASE)
+TAGS = ('NetLiquidation', 'BuyingPower', 'AvailableFunds', 'ExcessLiquidity',
+        'GrossPositionValue', 'UnrealizedPnL', 'RealizedPnL')
+
+class AccountCache:
+    """Account values and positions kept current by IB's account update stream.
+
+    ib_insync opens that stream on connect (reqAccountUpdates; IBConnection asks
+    for it explicitly when several accounts are managed) and re-opens it after a
+    reconnect, so the cache costs no request of its own: each event is
+    one dict write and readers (sizing, the portfolio risk check, the state
+    file) do a dict lookup, never a per-order request.
+    """
+    CHECK_AFTER_S = 30 # the first values normally arrive within a second of connecting
+
+    def __init__(self, ib: IB, account: str = '', currency: str = 'USD'):
+        self.ib = ib
+        self.account = account
+        self.currency = currency or 'USD' # read first; BASE when IB sends the tag only in the base currency
+        self.values = {}    # (tag, currency) -> float
+        self.positions = {} # symbol -> {position, avg_cost, market_price, market_value, unrealized_pnl}
+        self.updated = 0.0
+        ib.accountValueEvent += self.on_account_value
+        ib.updatePortfolioEvent += self.on_portfolio
+
+    def detach(self):
+        self.ib.accountValueEvent -= self.on_account_value
+        self.ib.updatePortfolioEvent -= self.on_portfolio
+
+    def prime(self):
+        """Load what ib_insync already holds in memory (values received before the handlers were attached)"""
+        for value in self.ib.accountValues(self.account):
+            self.on_account_value(value)
+        for item in self.ib.portfolio(self.account):
+            self.on_portfolio(item)
+        if self.values:
+            logger.info(f"Account cache: NetLiquidation={self.net_liquidation():,.2f}, "
+                        f"BuyingPower={self.buying_power() or 0:,.2f}, {len(self.positions)} positions")
+
+    def check_stream(self):
+        """Warn when no account value arrived: sizing then uses the configured account_equity"""
+        if not self.values:
+            logger.warning(f"No account values received for {self.account or 'the default account'} "
+                           f"in {self.currency}; position sizing falls back to trading.account_equity")
+
+    def on_account_value(self, value):
+        if self.account and value.account != self.account:
+            return
+        if value.tag in TAGS and value.currency in (self.currency, 'BASE') and not value.modelCode:
+            try:
+                self.values[(value.tag, value.currency)] = float(value.value)
+            except ValueError:
+                return
+            self.updated = time.time()
+
+    def on_portfolio(self, item):
+        if self.account and item.account != self.account:
+            return
+        symbol = item.contract.symbol
+        if not item.position:
+            self.positions.pop(symbol, None)
+            return
+        self.positions[symbol] = {
+            'position': item.position, 'avg_cost': item.averageCost, 'market_price': item.marketPrice,
+            'market_value': item.marketValue, 'unrealized_pnl': item.unrealizedPNL,
+        }
+
+    def value(self, tag: str):
+        """A tag in the configured currency, else in BASE; None until received"""
+        value = self.values.get((tag, self.currency))
+        return value if value is not None else self.values.get((tag, 'BASE'))
+
+    def net_liquidation(self):
+        return self.value('NetLiquidation')
+
+    def buying_power(self):
+        return self.value('BuyingPower')
+
+    def position(self, symbol: str):
+        item = self.positions.get(symbol)
+        return item['position'] if item else 0
+
+    def to_dict(self):
+        return {
+            "net_liquidation": self.value('NetLiquidation'),
+            "buying_power": self.value('BuyingPower'),
+            "available_funds": self.value('AvailableFunds'),
+            "excess_liquidity": self.value('ExcessLiquidity'),
+            "currency": self.currency,
+            "positions": len(self.positions),
+            "age_s": round(time.time() - self.updated, 1) if self.updated else None,
+        }
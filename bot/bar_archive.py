@@ -0,0 +1,272 @@
+import logging
+import math
+import os
+import sqlite3
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE = {
+    'enabled': True,
+    'path': 'data/bars.sqlite',
+    'mmap_mb': 256,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    bar_size TEXT NOT NULL,
+    ts REAL NOT NULL,
+    session TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL,
+    volume REAL, average REAL, bar_count INTEGER,
+    PRIMARY KEY (symbol, bar_size, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sessions (
+    symbol TEXT NOT NULL,
+    bar_size TEXT NOT NULL,
+    session TEXT NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    bars INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (symbol, bar_size, session)
+) WITHOUT ROWID;
+"""
+
+class ArchivedBar(NamedTuple):
+    """Same fields as ib_insync's BarData, so strategies can use either"""
+    date: object
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    average: float
+    barCount: int
+
+def bar_minutes(bar_size: str) -> int:
+    """'5 mins' -> 5, '1 hour' -> 60, '1 day' -> 1440"""
+    parts = bar_size.split()
+    n = int(parts[0]) if parts and parts[0].isdigit() else 1
+    unit = parts[-1] if parts else ''
+    if unit.startswith('sec'):
+        return max(1, n // 60)
+    if unit.startswith('hour'):
+        return n * 60
+    if unit.startswith('day'):
+        return n * 1440
+    return n
+
+def _ts(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime(value.year, value.month, value.day, tzinfo=timezone.utc).timestamp()
+
+def _session_of(value) -> str:
+    return (value.date() if isinstance(value, datetime) else value).isoformat()
+
+def _parse_date(text: str):
+    return date.fromisoformat(text) if len(text) == 10 else datetime.fromisoformat(text)
+
+def _now_like(value):
+    if isinstance(value, datetime):
+        return datetime.now(value.tzinfo)
+    return datetime.now()
+
+class BarArchive:
+    """Local SQLite archive of historical bars keyed by symbol, bar size and session.
+
+    Sessions older than today are marked complete and never rewritten; the
+    current session is upserted as bars form. Reads go through SQLite's
+    memory-mapped I/O, WAL lets the dashboard read while the bot writes.
+    """
+    def __init__(self, path: str, mmap_mb: int = 256, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA mmap_size={int(mmap_mb) * 1024 * 1024}")
+
+    @classmethod
+    def from_config(cls, config: dict, base_dir: str, readonly: bool = False):
+        """Archive described by the `archive` config section, or None when disabled/missing"""
+        cfg = {**DEFAULT_ARCHIVE, **((config or {}).get('archive') or {})}
+        if not cfg.get('enabled'):
+            return None
+        path = cfg['path'] if os.path.isabs(cfg['path']) else os.path.join(base_dir, cfg['path'])
+        if readonly and not os.path.exists(path):
+            return None
+        return cls(path, mmap_mb=cfg.get('mmap_mb', 256), readonly=readonly)
+
+    def close(self):
+        self.conn.close()
+
+    def store(self, symbol: str, bar_size: str, bars) -> int:
+        """Insert/refresh bars; bars belonging to an already complete session are ignored"""
+        if self.readonly or not bars:
+            return 0
+        complete = {row[0] for row in self.conn.execute(
+            "SELECT session FROM sessions WHERE symbol=? AND bar_size=? AND complete=1", (symbol, bar_size))}
+        today = None
+        rows, touched = [], set()
+        for bar in bars:
+            session = _session_of(bar.date)
+            if session in complete:
+                continue
+            if today is None:
+                today = _now_like(bar.date).date().isoformat()
+            touched.add(session)
+            rows.append((symbol, bar_size, _ts(bar.date), session, bar.date.isoformat(),
+                         bar.open, bar.high, bar.low, bar.close, bar.volume,
+                         getattr(bar, 'average', 0.0), getattr(bar, 'barCount', 0)))
+        if not rows:
+            return 0
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO bars VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+            for session in touched:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO sessions VALUES (?,?,?,?,"
+                    "(SELECT COUNT(*) FROM bars WHERE symbol=? AND bar_size=? AND session=?))",
+                    (symbol, bar_size, session, int(session < today), symbol, bar_size, session))
+        return len(rows)
+
+    def load(self, symbol: str, bar_size: str, since=None, limit: int = None):
+        """Bars in time order, optionally from `since` (date/datetime) or only the last `limit`"""
+        sql = "SELECT date, open, high, low, close, volume, average, bar_count FROM bars WHERE symbol=? AND bar_size=?"
+        params = [symbol, bar_size]
+        if since is not None:
+            sql += " AND ts>=?"
+            params.append(_ts(since))
+        if limit:
+            rows = self.conn.execute(sql + " ORDER BY ts DESC LIMIT ?", params + [limit]).fetchall()[::-1]
+        else:
+            rows = self.conn.execute(sql + " ORDER BY ts", params).fetchall()
+        return [ArchivedBar(_parse_date(r[0]), *r[1:]) for r in rows]
+
+    def load_recent(self, symbol: str, bar_size: str, days: int):
+        """What IB returns for durationStr=f'{days} D': calendar days for daily bars, sessions for intraday"""
+        if bar_size.split()[-1].startswith('day'):
+            return self.load(symbol, bar_size, since=date.today() - timedelta(days=days))
+        row = self.conn.execute(
+            "SELECT MIN(session) FROM (SELECT session FROM sessions WHERE symbol=? AND bar_size=? "
+            "ORDER BY session DESC LIMIT ?)", (symbol, bar_size, days)).fetchone()
+        if not row or row[0] is None:
+            return []
+        return self.load(symbol, bar_size, since=date.fromisoformat(row[0]))
+
+    def frame(self, symbol: str, bar_size: str, since=None):
+        """Columnar read for research tools (pandas DataFrame indexed by bar time)"""
+        import pandas as pd
+        sql = "SELECT ts, session, open, high, low, close, volume, average, bar_count FROM bars WHERE symbol=? AND bar_size=?"
+        params = [symbol, bar_size]
+        if since is not None:
+            sql += " AND ts>=?"
+            params.append(_ts(since))
+        df = pd.read_sql_query(sql + " ORDER BY ts", self.conn, params=params)
+        df.index = pd.to_datetime(df.pop('ts'), unit='s', utc=True)
+        return df
+
+    def universe_frame(self, bar_size: str, since=None, until=None):
+        """Long-format bars of every archived symbol in one query (symbol, ts, OHLCV)"""
+        import pandas as pd
+        sql = "SELECT symbol, ts, open, high, low, close, volume FROM bars WHERE bar_size=?"
+        params = [bar_size]
+        if since is not None:
+            sql += " AND ts>=?"
+            params.append(_ts(since))
+        if until is not None:
+            sql += " AND ts<?"
+            params.append(_ts(until))
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def sessions(self, symbol: str, bar_size: str):
+        """session -> (complete, bar count)"""
+        return {s: (bool(c), n) for s, c, n in self.conn.execute(
+            "SELECT session, complete, bars FROM sessions WHERE symbol=? AND bar_size=? ORDER BY session", (symbol, bar_size))}
+
+    def coverage(self):
+        """(symbol, bar_size, first session, last session, sessions, bars) for every series"""
+        return self.conn.execute(
+            "SELECT symbol, bar_size, MIN(session), MAX(session), COUNT(*), SUM(bars) "
+            "FROM sessions GROUP BY symbol, bar_size ORDER BY symbol, bar_size").fetchall()
+
+    def missing_duration(self, symbol: str, bar_size: str, days: int):
+        """IB durationStr covering what the archive lacks for the last `days` calendar days"""
+        first = self.conn.execute(
+            "SELECT MIN(ts), MAX(ts) FROM bars WHERE symbol=? AND bar_size=?", (symbol, bar_size)).fetchone()
+        if not first or first[0] is None:
+            return f"{days} D"
+        oldest, newest = first
+        now = time.time()
+        # Allow a weekend plus a holiday between the window start and the first archived session
+        if oldest > now - max(0, days - 4) * 86400:
+            return f"{days} D" # archive starts too late: fetch the whole window once
+        gap = now - newest
+        if bar_size.split()[-1].startswith('day') or gap >= 86400:
+            return f"{max(1, math.ceil(gap / 86400))} D"
+        # Intraday tail: re-request the last archived bar (it may still have been forming)
+        return f"{int(gap) + bar_minutes(bar_size) * 60} S"
+
+    def last_bar(self, symbol: str, bar_size: str):
+        """Most recent bar if it is still current (bar still forming or just closed), else None.
+
+        Falls back to aggregating the 1-min bars the live feed archives.
+        """
+        minutes = bar_minutes(bar_size)
+        bars = self.load(symbol, bar_size, limit=1)
+        if bars and self._is_current(bars[-1].date, minutes):
+            return bars[-1]
+        if minutes < 1440 and bar_size != '1 min':
+            minute_bars = self.load(symbol, '1 min', limit=minutes)
+            if minute_bars and self._is_current(minute_bars[-1].date, 1):
+                return self._aggregate(minute_bars, minutes)
+        return None
+
+    @staticmethod
+    def _is_current(bar_date, minutes: int) -> bool:
+        if not isinstance(bar_date, datetime):
+            return bar_date >= date.today()
+        return _now_like(bar_date) - bar_date < timedelta(minutes=2 * minutes)
+
+    @staticmethod
+    def _aggregate(minute_bars, minutes: int):
+        """Last `minutes`-aligned bar built from 1-min bars"""
+        last = minute_bars[-1].date
+        start = last - timedelta(minutes=(last.hour * 60 + last.minute) % minutes)
+        group = [b for b in minute_bars if b.date >= start]
+        volume = sum(b.volume for b in group)
+        average = sum(b.average * b.volume for b in group) / volume if volume else group[-1].close
+        return ArchivedBar(start, group[0].open, max(b.high for b in group), min(b.low for b in group),
+                           group[-1].close, volume, average, sum(b.barCount for b in group))
+
+if __name__ == "__main__":
+    # Offline access: coverage summary, or export one series to CSV
+    import argparse
+    import yaml
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Inspect the local bar archive")
+    parser.add_argument("symbol", nargs="?")
+    parser.add_argument("--bar-size", default="1 day")
+    parser.add_argument("--csv", help="write the series to this CSV file")
+    args = parser.parse_args()
+
+    with open(os.path.join(base_dir, "config.yaml")) as f:
+        archive = BarArchive.from_config(yaml.safe_load(f), base_dir, readonly=True)
+    if archive is None:
+        raise SystemExit("Archive disabled or not created yet")
+    if not args.symbol:
+        for symbol, bar_size, first, last, n_sessions, n_bars in archive.coverage():
+            print(f"{symbol:8} {bar_size:8} {first} -> {last}  {n_sessions} sessions, {n_bars} bars")
+    else:
+        df = archive.frame(args.symbol.upper(), args.bar_size)
+        if args.csv:
+            df.to_csv(args.csv)
+        print(df.tail(20).to_string())
@@ -0,0 +1,114 @@
+from bot.bar_archive import _ts
+
+# NumPy/pandas are imported inside the page-side helpers: the bot process only needs bars_payload
+
+BAR_FIELDS = ('t', 'o', 'h', 'l', 'c', 'v', 'a')
+
+def bars_payload(feed, since: float = 0.0):
+    """Columnar bars of a feed's live 1 min stream from `since` (epoch s), plus the strategy overlays.
+
+    The scan walks back from the end, so an incremental request only touches the
+    bars added (or still forming) since the client's last one.
+    """
+    bars = feed.bars or []
+    start = len(bars)
+    while start > 0 and _ts(bars[start - 1].date) >= since:
+        start -= 1
+
+    overlays = []
+    for name, strategy in list(feed.strategies.items()):
+        state = strategy.state
+        levels = state.levels
+        overlays.append({
+            'strategy': name,
+            'status': state.status,
+            'orb_high': levels.high if levels else None,
+            'orb_low': levels.low if levels else None,
+            'vwap': getattr(strategy, 'vwap', None) or None,
+            'entry': state.entry_price,
+            'stop': state.stop_loss,
+        })
+    return {'symbol': feed.symbol, 'total': len(bars), 'bars': bars_columns(bars[start:]), 'overlays': overlays}
+
+def bars_columns(bars):
+    """BarData-like objects (live or archived) -> columnar lists"""
+    out = {k: [] for k in BAR_FIELDS}
+    for bar in bars:
+        out['t'].append(_ts(bar.date))
+        out['o'].append(bar.open)
+        out['h'].append(bar.high)
+        out['l'].append(bar.low)
+        out['c'].append(bar.close)
+        out['v'].append(bar.volume)
+        out['a'].append(bar.average)
+    return out
+
+def bars_frame(columns: dict):
+    """DataFrame indexed by epoch seconds from the columnar payload"""
+    import pandas as pd
+    df = pd.DataFrame({k: columns.get(k, []) for k in BAR_FIELDS}, dtype=float)
+    return df.set_index('t')
+
+def merge_bars(cached, update):
+    """Append an incremental update; bars at or after its first timestamp (the one that was forming) are replaced"""
+    import pandas as pd
+    if cached is None or cached.empty:
+        return update
+    if update.empty:
+        return cached
+    return pd.concat([cached[cached.index < update.index[0]], update])
+
+def session_vwap(df):
+    """Cumulative VWAP reset at each New York session (bar average weighted by volume)"""
+    import pandas as pd
+    days = pd.to_datetime(df.index, unit='s', utc=True).tz_convert('America/New_York').date
+    pv = (df['a'] * df['v']).groupby(days).cumsum()
+    vol = df['v'].groupby(days).cumsum()
+    return (pv / vol.where(vol > 0)).to_numpy()
+
+def lttb_indices(x, y, threshold: int):
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the visual shape of (x, y)"""
+    import numpy as np
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket edges over the interior points; first and last points are always kept
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+def downsample_ohlc(df, threshold: int):
+    """Reduce bars to about `threshold` candles for display.
+
+    LTTB on the close picks the representative bars; each kept candle then absorbs
+    the bars up to the next one (first open, max high, min low, last close, summed
+    volume), so spikes between picks still show as wicks.
+    """
+    import numpy as np
+    import pandas as pd
+    if len(df) <= threshold:
+        return df
+    idx = lttb_indices(df.index.to_numpy(), df['c'].to_numpy(), threshold)
+    groups = np.zeros(len(df), dtype=int)
+    groups[idx[1:]] = 1
+    groups = np.cumsum(groups)
+    g = df.reset_index().groupby(groups)
+    out = pd.DataFrame({
+        't': g['t'].first(), 'o': g['o'].first(), 'h': g['h'].max(), 'l': g['l'].min(),
+        'c': g['c'].last(), 'v': g['v'].sum(),
+    })
+    vol = out['v'].where(out['v'] > 0)
+    out['a'] = ((df['a'] * df['v']).groupby(groups).sum().to_numpy() / vol).fillna(out['c'])
+    return out.set_index('t')
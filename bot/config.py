@@ -0,0 +1,38 @@
+DEFAULT_STRATEGY = 'ORB_5min'
+
+def strategy_names_for(trading_cfg: dict, symbol: str):
+    """Returns the list of strategy names configured for a symbol.
+
+    `asset_strategies` accepts either a single name or a list of names per symbol.
+    """
+    default = trading_cfg.get('strategy', DEFAULT_STRATEGY)
+    names = trading_cfg.get('asset_strategies', {}).get(symbol, default)
+    if isinstance(names, str):
+        names = [names]
+    # Keep order, drop duplicates and empty entries
+    unique = []
+    for name in names or [default]:
+        if name and name not in unique:
+            unique.append(name)
+    return unique or [default]
+
+def risk_config_for(trading_cfg: dict, strategy_name: str):
+    """Returns the trading config with the per-strategy risk budget applied.
+
+    Overrides live under `trading.strategy_risk.<strategy_name>` and take
+    precedence over the account-wide values.
+    """
+    overrides = trading_cfg.get('strategy_risk', {}).get(strategy_name) or {}
+    if not overrides:
+        return trading_cfg
+    merged = dict(trading_cfg)
+    merged.update(overrides)
+    return merged
+
+def state_key(symbol: str, strategy_name: str, primary: bool):
+    """Key of a strategy instance in the bot state.
+
+    The primary strategy of a symbol keeps the bare symbol as key so that
+    single-strategy setups and the UI pages keep working unchanged.
+    """
+    return symbol if primary else f"{symbol}:{strategy_name}"
@@ -1,12 +1,14 @@
 import asyncio
+import random
 from ib_insync import IB, util
 import logging
 
 class IBConnection:
-    def __init__(self, host='127.0.0.1', port=7497, client_id=1):
+    def __init__(self, host='127.0.0.1', port=7497, client_id=1, account=''):
         self.host = host
         self.port = port
         self.client_id = client_id
+        self.account = account # account whose updates ib_insync subscribes to ('' = the only one)
         self.ib = None
         self.logger = logging.getLogger(__name__)
 
@@ -15,13 +17,47 @@ class IBConnection:
             if not self.ib:
                 self.ib = IB()
             self.logger.info(f"Connecting to IBKR at {self.host}:{self.port} (Client ID: {self.client_id})...")
-            await self.ib.connectAsync(self.host, self.port, clientId=self.client_id)
+            await self.ib.connectAsync(self.host, self.port, clientId=self.client_id, account=self.account)
+            if not self.account:
+                await self.pick_account()
             self.logger.info("Successfully connected to IBKR.")
             return True
         except Exception as e:
             self.logger.error(f"Connection failed: {e}")
             return False
 
+    async def pick_account(self):
+        """Resolve a blank `account` to the first managed one.
+
+        ib_insync only requests account updates by itself when the login manages
+        a single account; with several, nothing would stream unless asked for.
+        """
+        accounts = self.ib.managedAccounts()
+        if not accounts:
+            return
+        self.account = accounts[0] # reconnects pass it to connectAsync, which re-requests the updates
+        if len(accounts) > 1:
+            self.logger.warning(f"ibkr.account is blank and the login manages {len(accounts)} accounts "
+                                f"({', '.join(accounts)}); streaming account values for {self.account}")
+            try:
+                await asyncio.wait_for(self.ib.reqAccountUpdatesAsync(self.account), timeout=10)
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Account updates for {self.account} not complete after 10s")
+
+    async def reconnect(self, base_delay: float = 1.0, max_delay: float = 60.0, should_stop=None):
+        """Retry `connect` with jittered exponential backoff until connected; returns the number of attempts"""
+        attempt = 0
+        while not (should_stop and should_stop()):
+            attempt += 1
+            if await self.connect():
+                return attempt
+            # Equal jitter: half the capped backoff plus a random half, so restarts don't retry in lockstep
+            cap = min(max_delay, base_delay * 2 ** attempt)
+            delay = cap / 2 + random.uniform(0, cap / 2)
+            self.logger.info(f"Reconnect attempt {attempt} failed, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        return attempt
+
     def disconnect(self):
         if self.ib and self.ib.isConnected():
             self.ib.disconnect()
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from ib_insync import IB, Stock
+
+logger = logging.getLogger(__name__)
+
+class SymbolFeed:
+    """One market data line and one bar stream per contract, shared by every strategy on the symbol"""
+    def __init__(self, ib: IB, symbol: str):
+        self.ib = ib
+        self.symbol = symbol
+        self.contract = Stock(symbol, 'SMART', 'USD')
+        self.ticker = None
+        self.bars = None
+        self.tick_type = None # tick-by-tick type ('AllLast' / 'BidAsk') while the TickByTickManager holds the symbol
+        self.strategies = {} # strategy name -> strategy instance (insertion ordered)
+        self.shadows = {}    # variant name -> shadow strategy instance, run after the live ones
+        self.simulator = None # FillSimulator matching the shadow strategies' orders, set by the bot
+        self.profiler = None # CallbackProfiler, set by the bot
+        self.metrics = None  # BotMetrics, set through attach_metrics
+        self._latency = {}   # (callback, strategy name) -> histogram child
+        self.lag_monitor = None # LoopLagMonitor, set by the bot
+        self.archive = None  # BarArchive, set by the bot
+        self.stops = None    # StopManager, set by the bot
+        self._archived = 0   # bars of the current stream already written to the archive
+        # Latest-wins bar updates: one pending slot and at most one handler in flight
+        self._pending_bars = None
+        self._pending_new_bar = False
+        self._bar_task = None
+
+    def attach_metrics(self, metrics):
+        self.metrics = metrics
+        # Resolve the labelled children once so the hot path skips the label lookup
+        self._ticks = metrics.ticks.labels(self.symbol)
+        self._bar_updates = metrics.bar_updates.labels(self.symbol)
+        self._conflated_bars = metrics.conflated.labels("bar")
+        self._skipped_bars = metrics.degraded_skips.labels("bar")
+
+    def _observe(self, callback: str, name: str, elapsed: float):
+        if self.metrics:
+            child = self._latency.get((callback, name))
+            if child is None:
+                child = self._latency[(callback, name)] = self.metrics.callback_latency.labels(callback, name)
+            child.observe(elapsed)
+        if self.profiler and self.profiler.enabled:
+            self.profiler.record(callback, self.symbol, name, elapsed)
+
+    async def subscribe(self, bar_handler):
+        """Qualify the contract and open the shared ticker and 1 min bar subscriptions"""
+        await self.ib.qualifyContractsAsync(self.contract)
+        self.ticker = self.ib.reqMktData(self.contract)
+        self.bars = await self.ib.reqHistoricalDataAsync(
+            self.contract, endDateTime='', durationStr='1 D',
+            barSizeSetting='1 min', whatToShow='TRADES', useRTH=True, keepUpToDate=True)
+        self._archived = 0
+        self.bars.updateEvent += bar_handler
+
+    async def resubscribe(self, bar_handler):
+        """Reopen the data lines after a reconnect, requesting only the 1 min bars missed meanwhile.
+
+        The missed bars are merged behind the bars already received, so strategies
+        keep one continuous stream and their state.
+        """
+        old = self.bars
+        if old is None:
+            return await self.subscribe(bar_handler)
+        old.updateEvent -= bar_handler
+        self.ticker = self.ib.reqMktData(self.contract)
+
+        duration = '1 D'
+        if old:
+            last = old[-1].date # may still have been forming: request it again
+            gap = (datetime.now(last.tzinfo) - last).total_seconds() + 60
+            if gap < 86400:
+                duration = f"{max(60, int(gap))} S"
+        bars = await self.ib.reqHistoricalDataAsync(
+            self.contract, endDateTime='', durationStr=duration,
+            barSizeSetting='1 min', whatToShow='TRADES', useRTH=True, keepUpToDate=True)
+
+        backfilled = len(bars)
+        if duration != '1 D' and bars:
+            kept = [bar for bar in old if bar.date < bars[0].date]
+            bars[0:0] = kept
+            self._archived = min(self._archived, len(kept))
+        else:
+            self._archived = 0
+        self.bars = bars
+        bars.updateEvent += bar_handler
+        self.submit_bars(bars, True)
+        return backfilled
+
+    def unsubscribe(self, bar_handler):
+        """Release the data lines held by this feed"""
+        try:
+            if self.bars is not None:
+                self.bars.updateEvent -= bar_handler
+                self.ib.cancelHistoricalData(self.bars)
+            if self.ticker is not None:
+                self.ib.cancelMktData(self.contract)
+        except Exception as e:
+            logger.error(f"Error unsubscribing {self.symbol}: {e}", extra={"symbol": self.symbol})
+        if self._bar_task and not self._bar_task.done():
+            self._bar_task.cancel()
+        self._pending_bars = None
+        self.bars = None
+        self.ticker = None
+
+    def add_strategy(self, name: str, strategy):
+        self.strategies[name] = strategy
+
+    def remove_strategy(self, name: str):
+        return self.strategies.pop(name, None)
+
+    def add_shadow(self, name: str, strategy):
+        self.shadows[name] = strategy
+
+    def remove_shadow(self, name: str):
+        strategy = self.shadows.pop(name, None)
+        if strategy and self.simulator:
+            self.simulator.remove_strategy(strategy)
+        return strategy
+
+    def on_ticker_update(self, last_price: float, ticker):
+        if self.metrics:
+            self._ticks.inc()
+        timed = self.metrics is not None or (self.profiler and self.profiler.enabled)
+        for name, strategy in self.strategies.items():
+            strategy.state.last_price = last_price
+            try:
+                if timed:
+                    t0 = time.perf_counter()
+                    strategy.on_ticker_update(last_price, ticker)
+                    self._observe('on_ticker_update', name, time.perf_counter() - t0)
+                else:
+                    strategy.on_ticker_update(last_price, ticker)
+            except Exception as e:
+                logger.error(f"Error in {name} ticker handler for {self.symbol}: {e}", extra={"symbol": self.symbol})
+        # Shadow variants only when the loop keeps up: live strategies never wait behind them
+        if self.shadows and not (self.lag_monitor and self.lag_monitor.degraded):
+            if timed:
+                t0 = time.perf_counter()
+                self._shadow_ticker(last_price, ticker)
+                self._observe('on_ticker_update', 'shadow', time.perf_counter() - t0) # all variants together
+            else:
+                self._shadow_ticker(last_price, ticker)
+
+    def _shadow_ticker(self, last_price: float, ticker):
+        # Orders placed on earlier ticks fill at this price, before the variants see it
+        if self.simulator:
+            self.simulator.on_price(self.symbol, last_price)
+        for name, strategy in self.shadows.items():
+            strategy.state.last_price = last_price
+            try:
+                strategy.on_ticker_update(last_price, ticker)
+            except Exception as e:
+                logger.error(f"Error in shadow {name} ticker handler for {self.symbol}: {e}", extra={"symbol": self.symbol})
+
+    def submit_bars(self, bars, has_new_bar: bool):
+        """Queue a bar stream update; a newer update replaces one that hasn't been handled yet"""
+        if self._pending_bars is not None and self.metrics:
+            self._conflated_bars.inc()
+        self._pending_bars = bars
+        self._pending_new_bar = self._pending_new_bar or has_new_bar
+        if self._bar_task is None or self._bar_task.done():
+            self._bar_task = asyncio.create_task(self._drain_bars())
+
+    def resume_bars(self):
+        """Handle the bar update held back while degraded (called when the loop recovers)"""
+        if self._pending_bars is not None and (self._bar_task is None or self._bar_task.done()):
+            self._bar_task = asyncio.create_task(self._drain_bars())
+
+    async def _drain_bars(self):
+        while self._pending_bars is not None:
+            if self.lag_monitor and self.lag_monitor.degraded:
+                # Degraded mode: triggers keep running on ticks, indicator refresh waits. The update
+                # stays pending with its bar-close flag, so strategies and stop rules still see the close;
+                # the keepUpToDate list keeps growing, so the update handled on recovery sees every bar.
+                if self.metrics:
+                    self._skipped_bars.inc()
+                return
+            bars, has_new_bar = self._pending_bars, self._pending_new_bar
+            self._pending_bars, self._pending_new_bar = None, False
+            if self.archive:
+                self._archive_bars(bars)
+            await self.on_bar_update(bars, has_new_bar)
+            if self.shadows:
+                await self._shadow_bars(bars, has_new_bar)
+            if self.stops and has_new_bar:
+                self.stops.on_bar_close([*self.strategies.values(), *self.shadows.values()], bars)
+
+    async def _shadow_bars(self, bars, has_new_bar: bool):
+        for name, strategy in list(self.shadows.items()):
+            try:
+                await strategy.on_bar_update(bars, has_new_bar)
+            except Exception as e:
+                logger.error(f"Error in shadow {name} bar handler for {self.symbol}: {e}", extra={"symbol": self.symbol})
+
+    def _archive_bars(self, bars):
+        """Write the 1 min bars completed since the last call; the last bar is still forming"""
+        done = len(bars) - 1
+        if done <= self._archived:
+            return
+        try:
+            self.archive.store(self.symbol, '1 min', bars[self._archived:done])
+        except sqlite3.Error as e:
+            logger.error(f"Error archiving bars for {self.symbol}: {e}", extra={"symbol": self.symbol})
+        self._archived = done
+
+    async def on_bar_update(self, bars, has_new_bar: bool):
+        # Snapshot the strategies so a config reload can't mutate the dict mid-iteration
+        if self.metrics:
+            self._bar_updates.inc()
+        timed = self.metrics is not None or (self.profiler and self.profiler.enabled)
+        for name, strategy in list(self.strategies.items()):
+            try:
+                if timed:
+                    # Wall time of the await, including any IB request made inside it
+                    t0 = time.perf_counter()
+                    await strategy.on_bar_update(bars, has_new_bar)
+                    self._observe('on_bar_update', name, time.perf_counter() - t0)
+                else:
+                    await strategy.on_bar_update(bars, has_new_bar)
+            except Exception as e:
+                logger.error(f"Error in {name} bar handler for {self.symbol}: {e}", extra={"symbol": self.symbol})
@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from collections import deque
+from ib_insync import IB
+
+logger = logging.getLogger(__name__)
+
+class HistoricalDataPacer:
+    """Queue in front of reqHistoricalDataAsync that keeps requests inside IB's pacing limits.
+
+    Limits the number of simultaneous requests and, optionally, the number of
+    requests sent within a sliding window (IB: 60 per 10 minutes for small bars).
+    """
+    def __init__(self, ib: IB, max_concurrent: int = 50, max_requests: int = 0, window: float = 600.0):
+        self.ib = ib
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.max_requests = max_requests
+        self.window = window
+        self.sent = deque() # send times inside the current window
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.metrics = None # BotMetrics, set by the bot
+
+    async def request(self, contract, **kwargs):
+        loop = asyncio.get_running_loop()
+        queued_at = loop.time()
+        self.waiting += 1
+        dequeued = False
+        try:
+            async with self.semaphore:
+                if self.max_requests:
+                    while len(self.sent) >= self.max_requests:
+                        wait = self.sent[0] + self.window - loop.time()
+                        if wait <= 0:
+                            self.sent.popleft()
+                        else:
+                            await asyncio.sleep(wait)
+                    self.sent.append(loop.time())
+                self.waiting -= 1
+                dequeued = True
+                waited = loop.time() - queued_at
+                self.total_wait += waited
+                if self.metrics:
+                    self.metrics.history_requests.inc()
+                    self.metrics.history_wait.inc(waited)
+                return await self.ib.reqHistoricalDataAsync(contract, **kwargs)
+        finally:
+            if not dequeued:
+                self.waiting -= 1
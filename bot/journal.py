@@ -0,0 +1,265 @@
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from bot.market_calendar import NY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL = {
+    'enabled': True,
+    'path': 'data/journal.sqlite',
+}
+
+# orders/fills/trades are append-only and keyed by session first, so each
+# session is a contiguous range of the table (one partition per trading day).
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    session TEXT NOT NULL,
+    order_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    key TEXT, strategy TEXT, symbol TEXT, leg TEXT,
+    action TEXT, quantity REAL, order_type TEXT, stop_price REAL, parent_id INTEGER,
+    PRIMARY KEY (session, order_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS fills (
+    session TEXT NOT NULL,
+    exec_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    order_id INTEGER,
+    key TEXT, strategy TEXT, symbol TEXT, leg TEXT,
+    side TEXT, shares REAL, price REAL,
+    PRIMARY KEY (session, exec_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS trades (
+    session TEXT NOT NULL,
+    trade_id INTEGER NOT NULL,
+    key TEXT, strategy TEXT, symbol TEXT, side TEXT,
+    quantity REAL, entry_ts REAL, exit_ts REAL,
+    entry_price REAL, exit_price REAL, initial_stop REAL,
+    pnl REAL, r_multiple REAL,
+    PRIMARY KEY (session, trade_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS aggregates (
+    scope TEXT NOT NULL,  -- all / strategy / symbol / session
+    name TEXT NOT NULL,
+    trades INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    gross_win REAL NOT NULL DEFAULT 0,
+    gross_loss REAL NOT NULL DEFAULT 0,
+    pnl REAL NOT NULL DEFAULT 0,
+    r_trades INTEGER NOT NULL DEFAULT 0,
+    sum_r REAL NOT NULL DEFAULT 0,
+    best REAL, worst REAL,
+    PRIMARY KEY (scope, name)
+) WITHOUT ROWID;
+"""
+
+# One round of counters per closed trade; the aggregates never need a rescan of `trades`
+UPSERT_AGGREGATE = """
+INSERT INTO aggregates VALUES (?,?,1,?,?,?,?,?,?,?,?)
+ON CONFLICT(scope, name) DO UPDATE SET
+    trades = trades + 1,
+    wins = wins + excluded.wins,
+    gross_win = gross_win + excluded.gross_win,
+    gross_loss = gross_loss + excluded.gross_loss,
+    pnl = pnl + excluded.pnl,
+    r_trades = r_trades + excluded.r_trades,
+    sum_r = sum_r + excluded.sum_r,
+    best = MAX(best, excluded.best),
+    worst = MIN(worst, excluded.worst)
+"""
+
+def _session(ts: float) -> str:
+    """New York trading day of an epoch timestamp"""
+    return datetime.fromtimestamp(ts, NY).date().isoformat()
+
+class TradeJournal:
+    """Append-only SQLite journal of the bot's orders, fills and closed trades.
+
+    Round trips are followed per strategy key from the fills; when the position
+    is flat again the trade (P&L and R-multiple against the stop sent with the
+    entry) is appended and the aggregates for the whole account, the strategy,
+    the symbol and the session are bumped in the same transaction.
+    """
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+        self.open = {} # strategy key -> round trip in progress
+        self._next_trade = None
+
+    @classmethod
+    def from_config(cls, config: dict, base_dir: str, readonly: bool = False):
+        """Journal described by the `journal` config section, or None when disabled/missing"""
+        cfg = {**DEFAULT_JOURNAL, **((config or {}).get('journal') or {})}
+        if not cfg.get('enabled'):
+            return None
+        path = cfg['path'] if os.path.isabs(cfg['path']) else os.path.join(base_dir, cfg['path'])
+        if readonly and not os.path.exists(path):
+            return None
+        return cls(path, readonly=readonly)
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _who(strategy):
+        return strategy.key, strategy.name or strategy.__class__.__name__, strategy.symbol
+
+    def record_order(self, strategy, order, leg: str):
+        """An order handed to the gateway; the stop sent with an entry becomes the trade's 1R"""
+        key, name, symbol = self._who(strategy)
+        now = time.time()
+        stop_price = order.auxPrice if order.orderType == 'STP' else None
+        if leg == 'entry':
+            trip = self.open.get(key)
+            if trip is None or not trip['entry_qty']:
+                self.open[key] = self._new_trip(strategy, order.action)
+        elif stop_price and key in self.open and self.open[key]['initial_stop'] is None:
+            self.open[key]['initial_stop'] = stop_price
+        self._write("INSERT OR IGNORE INTO orders VALUES (?,?,?,?,?,?,?,?,?,?,?,?)",
+                    (_session(now), order.orderId, now, key, name, symbol, leg,
+                     order.action, order.totalQuantity, order.orderType, stop_price, order.parentId or None))
+
+    def record_fill(self, strategy, leg: str, fill):
+        """An execution (already de-duplicated by the order manager); closes the round trip when flat"""
+        key, name, symbol = self._who(strategy)
+        execution = fill.execution
+        ts = fill.time.timestamp() if getattr(fill, 'time', None) else time.time()
+        signed = execution.shares if execution.side == 'BOT' else -execution.shares
+        session = _session(ts)
+
+        trip = self.open.get(key)
+        if trip is None:
+            trip = self.open[key] = self._new_trip(strategy, 'BUY' if signed > 0 else 'SELL')
+        if leg == 'entry':
+            trip['entry_qty'] += abs(signed)
+            trip['entry_value'] += abs(signed) * execution.price
+            trip['entry_ts'] = trip['entry_ts'] or ts
+        else:
+            trip['exit_qty'] += abs(signed)
+            trip['exit_value'] += abs(signed) * execution.price
+        trip['position'] += signed
+        trip['cash'] -= signed * execution.price
+
+        try:
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO fills VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                                  (session, execution.execId, ts, execution.orderId, key, name, symbol, leg,
+                                   execution.side, execution.shares, execution.price))
+                if trip['entry_qty'] and abs(trip['position']) < 1e-9:
+                    self._close_trip(key, trip, session, ts)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing trade journal: {e}", extra={"symbol": symbol})
+
+    @staticmethod
+    def _new_trip(strategy, action: str):
+        return {
+            'strategy': strategy.name or strategy.__class__.__name__, 'symbol': strategy.symbol,
+            'side': action, 'initial_stop': None, 'position': 0.0, 'cash': 0.0,
+            'entry_qty': 0.0, 'entry_value': 0.0, 'exit_qty': 0.0, 'exit_value': 0.0, 'entry_ts': None,
+        }
+
+    def _close_trip(self, key: str, trip: dict, session: str, ts: float):
+        del self.open[key]
+        if self._next_trade is None:
+            self._next_trade = (self.conn.execute("SELECT MAX(trade_id) FROM trades").fetchone()[0] or 0) + 1
+        trade_id, self._next_trade = self._next_trade, self._next_trade + 1
+
+        qty = trip['entry_qty']
+        entry = trip['entry_value'] / qty
+        exit_price = trip['exit_value'] / trip['exit_qty'] if trip['exit_qty'] else entry
+        pnl = trip['cash']
+        risk = abs(entry - trip['initial_stop']) * qty if trip['initial_stop'] else 0.0
+        r = pnl / risk if risk > 0 else None
+
+        self.conn.execute("INSERT INTO trades VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                          (session, trade_id, key, trip['strategy'], trip['symbol'], trip['side'], qty,
+                           trip['entry_ts'], ts, entry, exit_price, trip['initial_stop'], pnl, r))
+        self._bump(session, trip['strategy'], trip['symbol'], pnl, r)
+        logger.info(f"Journal: {trip['symbol']} {trip['strategy']} closed {pnl:+.2f}"
+                    + (f" ({r:+.2f}R)" if r is not None else ""), extra={"symbol": trip['symbol']})
+
+    def _bump(self, session: str, strategy: str, symbol: str, pnl: float, r):
+        win = pnl > 0
+        for scope, name in (('all', '*'), ('strategy', strategy), ('symbol', symbol), ('session', session)):
+            self.conn.execute(UPSERT_AGGREGATE, (
+                scope, name, int(win), pnl if win else 0.0, 0.0 if win else -pnl, pnl,
+                int(r is not None), r or 0.0, pnl, pnl))
+
+    def _write(self, sql: str, params):
+        try:
+            with self.conn:
+                self.conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing trade journal: {e}")
+
+    def aggregates(self, scope: str = None):
+        """Aggregate rows as dicts with win rate, expectancy ($ and R) and profit factor derived"""
+        sql = "SELECT scope, name, trades, wins, gross_win, gross_loss, pnl, r_trades, sum_r, best, worst FROM aggregates"
+        rows = self.conn.execute(sql + (" WHERE scope=? ORDER BY name" if scope else " ORDER BY scope, name"),
+                                 (scope,) if scope else ()).fetchall()
+        out = []
+        for scope_, name, trades, wins, gross_win, gross_loss, pnl, r_trades, sum_r, best, worst in rows:
+            out.append({
+                'scope': scope_, 'name': name, 'trades': trades, 'wins': wins,
+                'win_rate': wins / trades * 100.0 if trades else 0.0,
+                'pnl': pnl, 'expectancy': pnl / trades if trades else 0.0,
+                'avg_r': sum_r / r_trades if r_trades else None,
+                'profit_factor': gross_win / gross_loss if gross_loss else None,
+                'best': best, 'worst': worst,
+            })
+        return out
+
+    def trades(self, session: str = None, limit: int = 200):
+        """Most recent closed trades (optionally one session), newest first"""
+        sql = "SELECT * FROM trades"
+        params = []
+        if session:
+            sql += " WHERE session=?"
+            params.append(session)
+        cursor = self.conn.execute(sql + " ORDER BY session DESC, trade_id DESC LIMIT ?", params + [limit])
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def fills(self, session: str):
+        cursor = self.conn.execute("SELECT * FROM fills WHERE session=? ORDER BY ts", (session,))
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def rebuild_aggregates(self):
+        """Recompute the aggregates from the trades table (repair after a manual edit)"""
+        with self.conn:
+            self.conn.execute("DELETE FROM aggregates")
+            for session, strategy, symbol, pnl, r in self.conn.execute(
+                    "SELECT session, strategy, symbol, pnl, r_multiple FROM trades ORDER BY session, trade_id").fetchall():
+                self._bump(session, strategy, symbol, pnl, r)
+
+if __name__ == "__main__":
+    # Offline access: aggregates summary, or rebuild them from the trades table
+    import argparse
+    import yaml
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Inspect the trade journal")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the aggregates from the trades table")
+    args = parser.parse_args()
+
+    with open(os.path.join(base_dir, "config.yaml")) as f:
+        journal = TradeJournal.from_config(yaml.safe_load(f), base_dir, readonly=not args.rebuild)
+    if journal is None:
+        raise SystemExit("Journal disabled or not created yet")
+    if args.rebuild:
+        journal.rebuild_aggregates()
+    for row in journal.aggregates():
+        r = f"{row['avg_r']:+.2f}R" if row['avg_r'] is not None else "  n/a"
+        print(f"{row['scope']:8} {row['name']:12} {row['trades']:4} trades  win {row['win_rate']:5.1f}%  "
+              f"P&L {row['pnl']:+10.2f}  exp {row['expectancy']:+8.2f}  {r}")
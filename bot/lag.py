@@ -0,0 +1,64 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a periodic sleeper (scheduling lag).
+
+    Switches to degraded mode when the lag goes above `degrade_above` and back
+    once it stays below `recover_below` for `recover_samples` measurements.
+    While degraded, ticker updates are conflated over `conflate_window`.
+    """
+    def __init__(self, interval: float = 0.25, degrade_above: float = 0.25, recover_below: float = 0.05, recover_samples: int = 4,
+                 conflate_window: float = 0.1):
+        self.interval = interval
+        self.degrade_above = degrade_above
+        self.recover_below = recover_below
+        self.recover_samples = recover_samples
+        self.conflate_window = conflate_window
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.degraded = False
+        self._calm_samples = 0
+        self.listeners = []      # callables(lag_seconds) run after each measurement
+        self.mode_listeners = [] # callables(degraded: bool) run on mode changes
+
+    def configure(self, cfg: dict):
+        self.degrade_above = cfg.get('degrade_above_ms', self.degrade_above * 1000) / 1000.0
+        self.recover_below = cfg.get('recover_below_ms', self.recover_below * 1000) / 1000.0
+        self.recover_samples = cfg.get('recover_samples', self.recover_samples)
+        self.conflate_window = cfg.get('conflate_ms', self.conflate_window * 1000) / 1000.0
+
+    def observe(self, lag: float):
+        self.lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        for listener in self.listeners:
+            listener(lag)
+
+        if not self.degraded:
+            if self.degrade_above > 0 and lag > self.degrade_above:
+                self._set_degraded(True)
+        elif lag < self.recover_below:
+            self._calm_samples += 1
+            if self._calm_samples >= self.recover_samples:
+                self._set_degraded(False)
+        else:
+            self._calm_samples = 0
+
+    def _set_degraded(self, degraded: bool):
+        self.degraded = degraded
+        self._calm_samples = 0
+        if degraded:
+            logger.warning(f"Event-loop lag {self.lag * 1000:.0f} ms: degraded mode (triggers only, no indicator refresh)")
+        else:
+            logger.info("Event-loop lag recovered: leaving degraded mode")
+        for listener in self.mode_listeners:
+            listener(degraded)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(self.interval)
+            self.observe(max(0.0, loop.time() - t0 - self.interval))
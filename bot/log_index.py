@@ -0,0 +1,176 @@
+import bisect
+import json
+import os
+import re
+
+# Legacy text format: "2026-02-07 20:45:48,365 - name - LEVEL - message"
+LEGACY_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2}),(\d{3}) - (\S+) - (\w+) - (.*)$')
+
+def parse_line(line: str):
+    """Parse one bot.log line (JSON lines or legacy text) into a dict, or None for continuation lines.
+
+    Timestamps are normalised to ISO ("YYYY-MM-DDTHH:MM:SS.mmm") so they compare as strings.
+    """
+    line = line.rstrip('\r\n')
+    if line.startswith('{'):
+        try:
+            entry = json.loads(line)
+            if 'ts' in entry:
+                return entry
+        except ValueError:
+            pass
+    m = LEGACY_LINE.match(line)
+    if m:
+        return {"ts": f"{m.group(1)}T{m.group(2)}.{m.group(3)}", "logger": m.group(4), "level": m.group(5), "msg": m.group(6)}
+    return None
+
+class LogFilter:
+    def __init__(self, levels=None, loggers=None, symbol: str = ""):
+        self.levels = set(levels or [])
+        self.loggers = [l for l in (loggers or []) if l]
+        self.symbol = (symbol or "").strip().upper()
+        self.symbol_re = re.compile(rf'\b{re.escape(self.symbol)}\b') if self.symbol else None
+
+    def match(self, entry: dict):
+        if self.levels and entry.get("level") not in self.levels:
+            return False
+        if self.loggers and not any(entry.get("logger", "").startswith(l) for l in self.loggers):
+            return False
+        if self.symbol_re:
+            if entry.get("symbol"):
+                return entry["symbol"] == self.symbol
+            return bool(self.symbol_re.search(entry.get("msg", "")))
+        return True
+
+class LogIndex:
+    """Sparse (timestamp, byte offset) index over a growing log file.
+
+    One entry is kept every `stride` bytes. Building it only seeks to each
+    stride boundary and reads a single line there, so a multi-hundred-MB log
+    costs a few thousand small reads once; afterwards refresh() only extends
+    the index over the bytes appended since the last call.
+    """
+    def __init__(self, path: str, stride: int = 256 * 1024):
+        self.path = path
+        self.stride = stride
+        self.timestamps = [] # ascending ISO timestamps
+        self.offsets = []    # byte offset of the line carrying timestamps[i]
+        self.next_probe = 0  # next stride boundary to index
+        self.size = 0
+        self.file_id = None
+
+    def _reset(self):
+        self.timestamps, self.offsets = [], []
+        self.next_probe = 0
+        self.size = 0
+
+    def refresh(self):
+        """Extend the index to the current end of file (resets if the file was rotated)"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._reset()
+            return
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self.file_id or st.st_size < self.size:
+            self.file_id = file_id
+            self._reset()
+        self.size = st.st_size
+        if self.next_probe >= self.size:
+            return
+
+        with open(self.path, 'rb') as f:
+            while self.next_probe < self.size:
+                f.seek(self.next_probe)
+                if self.next_probe > 0:
+                    f.readline() # skip the partial line at the boundary
+                found = False
+                while True:
+                    offset = f.tell()
+                    raw = f.readline()
+                    if not raw or offset >= self.next_probe + self.stride:
+                        break
+                    if not raw.endswith(b'\n'):
+                        break # line still being written; retry on the next refresh
+                    entry = parse_line(raw.decode('utf-8', errors='replace'))
+                    if entry:
+                        if not self.timestamps or entry["ts"] >= self.timestamps[-1]:
+                            self.timestamps.append(entry["ts"])
+                            self.offsets.append(offset)
+                        found = True
+                        break
+                if not found and self.next_probe + self.stride > self.size:
+                    return # tail of the file not complete yet
+                self.next_probe += self.stride
+
+    def offset_for(self, ts: str):
+        """Byte offset from which every line with timestamp >= ts can be found"""
+        i = bisect.bisect_left(self.timestamps, ts) - 1
+        return self.offsets[i] if i >= 0 else 0
+
+    def _read_block(self, f, start: int, end: int):
+        """Parsed entries between two byte offsets (continuation lines are folded into the previous entry)"""
+        f.seek(start)
+        data = f.read(max(0, end - start))
+        if end >= self.size and not data.endswith(b'\n'):
+            data = data[:data.rfind(b'\n') + 1] # drop a line still being written
+        entries = []
+        for raw in data.split(b'\n'):
+            if not raw:
+                continue
+            entry = parse_line(raw.decode('utf-8', errors='replace'))
+            if entry:
+                entries.append(entry)
+            elif entries:
+                entries[-1]["msg"] = entries[-1].get("msg", "") + "\n" + raw.decode('utf-8', errors='replace')
+        return entries
+
+    def read_range(self, start_ts: str = None, end_ts: str = None, log_filter: LogFilter = None, limit: int = 200):
+        """First `limit` matching entries with start_ts <= ts <= end_ts, reading forward from the index"""
+        self.refresh()
+        log_filter = log_filter or LogFilter()
+        start = self.offset_for(start_ts) if start_ts else 0
+        results = []
+        with open(self.path, 'rb') as f:
+            while start < self.size and len(results) < limit:
+                end = min(self.size, start + self.stride)
+                # Extend to the end of the line so blocks never split a record
+                f.seek(end)
+                end += len(f.readline()) if end < self.size else 0
+                for entry in self._read_block(f, start, end):
+                    if start_ts and entry["ts"] < start_ts:
+                        continue
+                    if end_ts and entry["ts"] > end_ts:
+                        return results
+                    if log_filter.match(entry):
+                        results.append(entry)
+                        if len(results) >= limit:
+                            break
+                start = end
+        return results
+
+    def tail(self, log_filter: LogFilter = None, limit: int = 200, end_ts: str = None):
+        """Last `limit` matching entries (optionally up to end_ts), reading backwards block by block"""
+        self.refresh()
+        log_filter = log_filter or LogFilter()
+        end = self.size
+        if end_ts:
+            i = bisect.bisect_right(self.timestamps, end_ts)
+            if i < len(self.offsets):
+                end = self.offsets[i]
+        results = []
+        with open(self.path, 'rb') as f:
+            while end > 0 and len(results) < limit:
+                # Start the block on an indexed line boundary
+                i = bisect.bisect_left(self.offsets, max(0, end - self.stride))
+                if i < len(self.offsets) and self.offsets[i] < end:
+                    start = self.offsets[i]
+                elif i > 0:
+                    start = self.offsets[i - 1]
+                else:
+                    start = 0
+                block = [e for e in self._read_block(f, start, end)
+                         if (not end_ts or e["ts"] <= end_ts) and log_filter.match(e)]
+                results = block[-(limit - len(results)):] + results if block else results
+                end = start
+        return results[-limit:]
@@ -0,0 +1,194 @@
+import copy
+import json
+import logging
+import queue
+import re
+import time
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+DEFAULT_LOGGING = {
+    'level': 'INFO',
+    'max_bytes': 50 * 1024 * 1024,
+    'backup_count': 10,
+    'rotate_daily': True,
+    'console': True,
+    # Max DEBUG..WARNING messages per second per logger (0 = unlimited). IB floods
+    # farm notices through ib_insync.wrapper, so it gets a tight budget.
+    'default_rate': 50,
+    'rate_limits': {'ib_insync.wrapper': 5},
+    # ERROR records are deduplicated instead: the first of each kind (IB error code,
+    # e.g. the 10089 flood, or message with numbers masked) per logger gets through,
+    # repeats within this window are counted and reported with the next one after it.
+    'error_window_s': 60,
+}
+
+IB_ERROR = re.compile(r'^(?:Error|Warning) (\d+),') # ib_insync.wrapper: "Error 10089, reqId 12: ..."
+NUMBERS = re.compile(r'\d+')
+
+class JsonLinesFormatter(logging.Formatter):
+    """One compact JSON object per line: ts, level, logger, msg (+ symbol/suppressed when present)"""
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        symbol = getattr(record, 'symbol', None)
+        if symbol:
+            entry["symbol"] = symbol
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        exc = getattr(record, 'exc', None)
+        if exc:
+            entry["exc"] = exc
+        return json.dumps(entry, separators=(',', ':'), ensure_ascii=False)
+
+class ConsoleFormatter(logging.Formatter):
+    """CONSOLE_FORMAT plus the traceback kept in `record.exc` by ExcQueueHandler"""
+    def format(self, record):
+        text = super().format(record)
+        exc = getattr(record, 'exc', None)
+        return f"{text}\n{exc}" if exc else text
+
+class ExcQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback in `record.exc` instead of folding it into msg.
+
+    QueueHandler.prepare formats the record (exception included) into msg and
+    clears exc_info before it is queued, so the listener's formatters never
+    see the exception on its own.
+    """
+    def prepare(self, record):
+        exc = None
+        if record.exc_info or record.exc_text:
+            exc = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record = copy.copy(record)
+            record.exc_info = record.exc_text = None
+        record = super().prepare(record)
+        record.exc = exc
+        return record
+
+class SizeTimeRotatingFileHandler(RotatingFileHandler):
+    """Rotates when the file reaches max_bytes or, optionally, at local midnight"""
+    def __init__(self, filename, max_bytes=0, backup_count=0, rotate_daily=True):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.rotate_daily = rotate_daily
+        self.next_rollover = self._next_midnight()
+
+    @staticmethod
+    def _next_midnight():
+        tomorrow = datetime.now().date() + timedelta(days=1)
+        return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+    def shouldRollover(self, record):
+        if self.rotate_daily and time.time() >= self.next_rollover:
+            return 1
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.next_rollover = self._next_midnight()
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per logger for DEBUG..WARNING, dedup per error kind for ERROR.
+
+    Excess records are dropped before they are enqueued. An ERROR of a kind not
+    seen within `error_window_s` always gets through, so a new error is never
+    hidden by a flood of another one. The next record that gets through
+    carries the number of dropped ones in `record.suppressed`. CRITICAL is
+    never filtered.
+    """
+    MAX_ERROR_KINDS = 1000
+
+    def __init__(self, default_rate: float = 0, rate_limits: dict = None, error_window: float = 60.0):
+        super().__init__()
+        self.default_rate = default_rate
+        self.rate_limits = rate_limits or {}
+        self.error_window = error_window
+        self.buckets = {} # logger name -> [tokens, last_refill, suppressed]
+        self.errors = {}  # (logger name, error kind) -> [window start, suppressed]
+
+    @staticmethod
+    def error_kind(record):
+        message = record.getMessage()
+        match = IB_ERROR.match(message)
+        if match:
+            return match.group(1)
+        return NUMBERS.sub('#', message[:200])
+
+    def _filter_error(self, record):
+        if not self.error_window:
+            return True
+        now = time.monotonic()
+        key = (record.name, self.error_kind(record))
+        entry = self.errors.get(key)
+        if entry is not None and now - entry[0] < self.error_window:
+            entry[1] += 1
+            return False
+        if entry is not None and entry[1]:
+            record.suppressed = entry[1]
+        if len(self.errors) >= self.MAX_ERROR_KINDS:
+            self.errors = {k: e for k, e in self.errors.items() if now - e[0] < self.error_window}
+        self.errors[key] = [now, 0]
+        return True
+
+    def filter(self, record):
+        if record.levelno >= logging.CRITICAL:
+            return True
+        if record.levelno >= logging.ERROR:
+            return self._filter_error(record)
+        rate = self.rate_limits.get(record.name, self.default_rate)
+        if not rate:
+            return True
+
+        now = time.monotonic()
+        bucket = self.buckets.get(record.name)
+        capacity = max(1.0, float(rate))
+        if bucket is None:
+            bucket = self.buckets[record.name] = [capacity, now, 0]
+        bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return False
+        bucket[0] -= 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+def setup_logging(log_file: str, log_config: dict = None):
+    """Route all logging through a queue; a background listener does the file/console I/O.
+
+    Returns the started QueueListener; call stop() on shutdown to flush it.
+    """
+    cfg = dict(DEFAULT_LOGGING)
+    cfg.update(log_config or {})
+
+    file_handler = SizeTimeRotatingFileHandler(
+        log_file, max_bytes=int(cfg['max_bytes']),
+        backup_count=int(cfg['backup_count']), rotate_daily=bool(cfg['rotate_daily']))
+    file_handler.setFormatter(JsonLinesFormatter())
+    handlers = [file_handler]
+    if cfg['console']:
+        console = logging.StreamHandler()
+        console.setFormatter(ConsoleFormatter(CONSOLE_FORMAT))
+        handlers.append(console)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = ExcQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(cfg['default_rate'], cfg['rate_limits'], float(cfg['error_window_s'])))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, str(cfg['level']).upper(), logging.INFO))
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
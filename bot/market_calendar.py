@@ -0,0 +1,206 @@
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+NY = ZoneInfo("America/New_York")
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+# Unscheduled closures announced by the exchange (not derivable from rules)
+SPECIAL_CLOSURES = {
+    date(2012, 10, 29): "Hurricane Sandy",
+    date(2012, 10, 30): "Hurricane Sandy",
+    date(2018, 12, 5): "National Day of Mourning (G. H. W. Bush)",
+    date(2025, 1, 9): "National Day of Mourning (J. Carter)",
+}
+
+class Session(NamedTuple):
+    day: date
+    open: datetime   # aware, America/New_York
+    close: datetime
+    early_close: bool
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)"""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th `weekday` (Mon=0) of the month; n=-1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def _observed(d: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday"""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+def nyse_holidays(year: int) -> dict:
+    """Full-day NYSE holidays of a year: date -> name"""
+    holidays = {}
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5: # a Saturday New Year's Day is not observed on the Friday before
+        holidays[_observed(new_year)] = "New Year's Day"
+    holidays[_nth_weekday(year, 1, 0, 3)] = "Martin Luther King Jr. Day"
+    holidays[_nth_weekday(year, 2, 0, 3)] = "Washington's Birthday"
+    holidays[_easter(year) - timedelta(days=2)] = "Good Friday"
+    holidays[_nth_weekday(year, 5, 0, -1)] = "Memorial Day"
+    if year >= 2022:
+        holidays[_observed(date(year, 6, 19))] = "Juneteenth"
+    holidays[_observed(date(year, 7, 4))] = "Independence Day"
+    holidays[_nth_weekday(year, 9, 0, 1)] = "Labor Day"
+    holidays[_nth_weekday(year, 11, 3, 4)] = "Thanksgiving Day"
+    holidays[_observed(date(year, 12, 25))] = "Christmas Day"
+    for day, name in SPECIAL_CLOSURES.items():
+        if day.year == year:
+            holidays[day] = name
+    return holidays
+
+def nyse_early_closes(year: int) -> dict:
+    """13:00 closes: July 3rd, the day after Thanksgiving and Christmas Eve (when they are Mon-Thu sessions)"""
+    early = {}
+    july3 = date(year, 7, 3)
+    if july3.weekday() < 4:
+        early[july3] = "Independence Day eve"
+    early[_nth_weekday(year, 11, 3, 4) + timedelta(days=1)] = "Day after Thanksgiving"
+    christmas_eve = date(year, 12, 24)
+    if christmas_eve.weekday() < 4:
+        early[christmas_eve] = "Christmas Eve"
+    return early
+
+class MarketCalendar:
+    """Precomputed NYSE session table with O(1) lookups by day.
+
+    Years outside the precomputed range are added on first use.
+    """
+    def __init__(self, first_year: int = None, last_year: int = None):
+        this_year = date.today().year
+        self.sessions = {}      # date -> Session
+        self.holidays = {}      # date -> holiday name
+        self.early_closes = {}  # date -> reason
+        self._next = {}         # every calendar day -> first session day on or after it
+        self._prev = {}         # every calendar day -> last session day on or before it
+        self.first_year = self.last_year = None
+        self.clock = None       # callable returning an aware datetime in place of the wall clock (replay)
+        self._build(first_year or this_year - 5, last_year or this_year + 5)
+
+    def _build(self, first_year: int, last_year: int):
+        if self.first_year is not None:
+            first_year = min(first_year, self.first_year)
+            last_year = max(last_year, self.last_year)
+        self.first_year, self.last_year = first_year, last_year
+        for year in range(first_year, last_year + 1):
+            self.holidays.update(nyse_holidays(year))
+            self.early_closes.update(nyse_early_closes(year))
+
+        day, end = date(first_year, 1, 1), date(last_year, 12, 31)
+        days = []
+        while day <= end:
+            if day.weekday() < 5 and day not in self.holidays:
+                close = EARLY_CLOSE if day in self.early_closes else REGULAR_CLOSE
+                self.sessions[day] = Session(
+                    day, datetime.combine(day, REGULAR_OPEN, NY), datetime.combine(day, close, NY), close == EARLY_CLOSE)
+            days.append(day)
+            day += timedelta(days=1)
+
+        last = None
+        for day in days:
+            if day in self.sessions:
+                last = day
+            self._prev[day] = last
+        upcoming = None
+        for day in reversed(days):
+            if day in self.sessions:
+                upcoming = day
+            self._next[day] = upcoming
+
+    def _ensure(self, day: date):
+        if not (self.first_year <= day.year <= self.last_year):
+            self._build(min(day.year, self.first_year), max(day.year + 1, self.last_year))
+
+    def now(self) -> datetime:
+        return self.clock() if self.clock else datetime.now(NY)
+
+    def session(self, day: date = None):
+        """Session of a calendar day (NY date), None on weekends and holidays"""
+        day = day or self.now().date()
+        self._ensure(day)
+        return self.sessions.get(day)
+
+    def is_session(self, day: date = None) -> bool:
+        return self.session(day) is not None
+
+    def is_open(self, when: datetime = None) -> bool:
+        """Regular trading hours are in progress at `when` (aware or NY-local naive)"""
+        when = self.to_ny(when)
+        session = self.session(when.date())
+        return session is not None and session.open <= when < session.close
+
+    def next_session(self, day: date = None, inclusive: bool = True):
+        day = day or self.now().date()
+        if not inclusive:
+            day += timedelta(days=1)
+        self._ensure(day)
+        found = self._next.get(day)
+        if found is None: # past the end of the table
+            self._build(self.first_year, day.year + 1)
+            found = self._next.get(day)
+        return self.sessions[found]
+
+    def previous_session(self, day: date = None, inclusive: bool = True):
+        day = day or self.now().date()
+        if not inclusive:
+            day -= timedelta(days=1)
+        self._ensure(day)
+        found = self._prev.get(day)
+        if found is None:
+            self._build(day.year - 1, self.last_year)
+            found = self._prev.get(day)
+        return self.sessions[found]
+
+    def current_or_next_open(self, when: datetime = None) -> datetime:
+        """When regular trading hours next start (or started, if in session)"""
+        when = self.to_ny(when)
+        session = self.session(when.date())
+        if session and when < session.close:
+            return session.open
+        return self.next_session(when.date(), inclusive=False).open
+
+    def status(self, when: datetime = None):
+        """(code, label) with code in open / pre / post / closed, for display"""
+        when = self.to_ny(when)
+        day = when.date()
+        session = self.session(day)
+        if session is None:
+            reason = self.holidays.get(day) or "Weekend"
+            return "closed", reason
+        if when < session.open:
+            return "pre", f"Opens {session.open:%H:%M}"
+        if when < session.close:
+            return "open", f"Early close {session.close:%H:%M}" if session.early_close else f"Closes {session.close:%H:%M}"
+        return "post", "After hours"
+
+    def to_ny(self, when: datetime = None) -> datetime:
+        if when is None:
+            return self.now()
+        if when.tzinfo is None:
+            return when.replace(tzinfo=NY)
+        return when.astimezone(NY)
+
+NYSE = MarketCalendar()
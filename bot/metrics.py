@@ -0,0 +1,269 @@
+import asyncio
+import bisect
+import json
+import logging
+import math
+import os
+import sys
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.children = {} # label values tuple -> child
+
+    def labels(self, *values):
+        """Child for one label combination; call sites keep it to skip the lookup on the hot path"""
+        values = tuple(str(v) for v in values)
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._new_child()
+        return child
+
+    def remove(self, *values):
+        self.children.pop(tuple(str(v) for v in values), None)
+
+    def _default(self):
+        return self.labels()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class _Value:
+    __slots__ = ("value", "fn")
+
+    def __init__(self):
+        self.value = 0.0
+        self.fn = None
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, fn):
+        """Evaluate `fn` at scrape time instead of storing a value"""
+        self.fn = fn
+
+    def get(self):
+        return self.fn() if self.fn else self.value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}"]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def set_function(self, fn):
+        self._default().set_function(fn)
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), child.counts):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logger.error(f"Error rendering metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+def current_rss_bytes():
+    """Resident set size of this process without requiring psutil"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024 # peak, not current
+    except Exception:
+        return 0
+
+class BotMetrics:
+    """All metrics exported by the bot process"""
+    def __init__(self):
+        self.registry = r = MetricsRegistry()
+        self.ticks = r.counter("bot_ticks_total", "Ticker updates received", ("symbol",))
+        self.bar_updates = r.counter("bot_bar_updates_total", "Bar stream updates received", ("symbol",))
+        self.callback_latency = r.histogram("bot_strategy_callback_seconds", "Strategy callback duration", ("callback", "strategy"))
+        self.loop_lag = r.gauge("bot_event_loop_lag_seconds", "Most recent event-loop scheduling lag")
+        self.loop_lag_hist = r.histogram("bot_event_loop_lag_hist_seconds", "Event-loop scheduling lag",
+                                         buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+        self.history_queue = r.gauge("bot_history_queue_depth", "Historical data requests waiting for a pacing slot")
+        self.history_requests = r.counter("bot_history_requests_total", "Historical data requests sent")
+        self.history_wait = r.counter("bot_history_pacing_wait_seconds_total", "Time historical requests spent waiting on pacing")
+        self.state_save = r.histogram("bot_state_save_seconds", "bot_state.json write duration",
+                                      buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+        self.state_size = r.gauge("bot_state_save_bytes", "Size of the last bot_state.json write")
+        self.open_orders = r.gauge("bot_open_orders", "Orders not yet filled or cancelled")
+        self.memory = r.gauge("bot_memory_rss_bytes", "Resident memory of the bot process")
+        self.connected = r.gauge("bot_ib_connected", "1 when connected to TWS/Gateway")
+        self.conflated = r.counter("bot_conflated_events_total", "Events replaced by a newer one before being handled", ("type",))
+        self.degraded_skips = r.counter("bot_degraded_skipped_total", "Handlers skipped while in degraded mode", ("type",))
+        self.degraded = r.gauge("bot_degraded_mode", "1 while event-loop lag protection is active")
+        self.reconnects = r.counter("bot_reconnects_total", "Recoveries after losing the TWS/Gateway connection")
+        self.recovery = r.histogram("bot_recovery_seconds", "Time from disconnect to every feed resubscribed",
+                                    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0))
+        self.order_queue_latency = r.histogram("bot_order_queue_seconds", "Time order messages waited in the gateway", ("lane",),
+                                               buckets=(0.0, 0.001, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+        self.order_messages = r.counter("bot_order_messages_total", "Order API messages sent", ("lane",))
+        self.order_queue = r.gauge("bot_order_queue_depth", "Order jobs waiting for rate-limit tokens")
+        self.stop_modifies = r.counter("bot_stop_modifies_total", "Stop modifications sent by the stop manager")
+        self.tick_by_tick = r.gauge("bot_tick_by_tick_symbols", "Symbols currently on tick-by-tick data")
+        self.tick_mode_switches = r.counter("bot_tick_mode_switches_total", "Data mode switches", ("mode",))
+        self.stop_coalesced = r.counter("bot_stop_coalesced_total", "Stop changes replaced by a newer one before being sent")
+        self.memory.set_function(current_rss_bytes)
+
+class MetricsServer:
+    """Minimal HTTP endpoint serving the registry in Prometheus text format (pull based).
+
+    Extra read-only JSON routes (e.g. the chart page's /bars) can be added with add_route.
+    """
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server = None
+        self.routes = {} # path -> fn(query dict) returning a JSON-serializable object
+
+    def add_route(self, path: str, handler):
+        self.routes[path] = handler
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5)
+            path = request.split(b" ", 2)[1].decode() if request.count(b" ") >= 2 else "/"
+            route, _, query = path.partition("?")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+            if route in ("/metrics", "/"):
+                status, body = "200 OK", self.registry.render().encode()
+            elif route in self.routes:
+                params = {k: v[-1] for k, v in parse_qs(query).items()}
+                try:
+                    status, body = "200 OK", json.dumps(self.routes[route](params), separators=(',', ':')).encode()
+                except (KeyError, ValueError) as e:
+                    status, body = "400 Bad Request", json.dumps({"error": str(e)}).encode()
+                content_type = "application/json"
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
@@ -20,6 +20,11 @@ class TradeState:
     status: str = "WAITING_FOR_ORB" 
     atr: float = 0.0
     last_price: float = 0.0
+    realized_pnl: float = 0.0
+    entry_order_id: Optional[int] = None
+    stop_order_id: Optional[int] = None
+    entry_status: str = ""
+    stop_status: str = ""
     logs: list[str] = field(default_factory=list)
 
     def add_log(self, message: str):
@@ -0,0 +1,105 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from ib_insync import IB
+
+logger = logging.getLogger(__name__)
+
+# Priority lanes, lowest value first: protective traffic always goes before new risk
+CANCEL, PROTECT, ENTRY = 0, 1, 2
+LANE_NAMES = {CANCEL: "cancel", PROTECT: "protect", ENTRY: "entry"}
+
+MAX_JOB_MESSAGES = 2 # a bracket (entry + stop) is the largest job; the bucket must hold it
+
+class OrderGateway:
+    """Single exit for the bot's order messages: token-bucket rate limit plus priority lanes.
+
+    IB allows about 50 API messages per second; the bucket is sized below that so
+    market data requests keep some headroom. When tokens are available and nothing
+    is queued a message is sent synchronously, so the normal path adds no latency.
+    Otherwise jobs wait in a heap ordered by (lane, arrival) and are drained as
+    tokens refill.
+    """
+    def __init__(self, ib: IB, rate: float = 40.0, burst: int = 40):
+        self.ib = ib
+        self.rate = rate
+        self.burst = max(int(burst), MAX_JOB_MESSAGES)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.queue = []  # heap of (lane, seq, queued_at, messages, label)
+        self._seq = itertools.count()
+        self._task = None
+        self.metrics = None # BotMetrics, set by the bot
+        self._latency = {}  # lane -> histogram child
+
+    def configure(self, cfg: dict):
+        rate = float(cfg.get('rate_per_s', self.rate))
+        if rate > 0:
+            self.rate = rate
+        else:
+            # A zero rate never refills the bucket (and divides by zero when waiting for tokens)
+            logger.error(f"order_gateway.rate_per_s must be positive, got {rate}; keeping {self.rate}")
+        burst = int(cfg.get('burst', self.burst))
+        if burst < MAX_JOB_MESSAGES:
+            # A job larger than the bucket could never be sent and would block every lane behind it
+            logger.warning(f"order_gateway.burst {burst} is below the largest job ({MAX_JOB_MESSAGES} messages), using {MAX_JOB_MESSAGES}")
+            burst = MAX_JOB_MESSAGES
+        self.burst = burst
+        self.tokens = min(self.tokens, self.burst)
+
+    def depth(self):
+        return len(self.queue)
+
+    def place(self, contract, order, lane: int = ENTRY, label: str = ""):
+        self.submit(lane, [lambda: self.ib.placeOrder(contract, order)], label)
+
+    def cancel(self, order, label: str = ""):
+        self.submit(CANCEL, [lambda: self.ib.cancelOrder(order)], label)
+
+    def submit(self, lane: int, messages, label: str = ""):
+        """Send `messages` (callables, one API message each) back to back, now or when tokens allow"""
+        now = time.monotonic()
+        if not self.queue and self._take(len(messages), now):
+            self._send(lane, messages, label, 0.0)
+            return
+        heapq.heappush(self.queue, (lane, next(self._seq), now, messages, label))
+        logger.info(f"Order gateway throttling: {label or LANE_NAMES[lane]} queued ({len(self.queue)} waiting)")
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _take(self, n: int, now: float):
+        self._refill(now)
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+    async def _drain(self):
+        while self.queue:
+            # Re-read the heap top each round: a cancel arriving meanwhile jumps ahead of queued entries
+            lane, _, queued_at, messages, label = self.queue[0]
+            now = time.monotonic()
+            if not self._take(len(messages), now):
+                await asyncio.sleep((len(messages) - self.tokens) / self.rate)
+                continue
+            heapq.heappop(self.queue)
+            self._send(lane, messages, label, now - queued_at)
+
+    def _send(self, lane: int, messages, label: str, waited: float):
+        for message in messages:
+            try:
+                message()
+            except Exception as e:
+                logger.error(f"Error sending {LANE_NAMES[lane]} order message {label}: {e}")
+        if self.metrics:
+            child = self._latency.get(lane)
+            if child is None:
+                child = self._latency[lane] = self.metrics.order_queue_latency.labels(LANE_NAMES[lane])
+            child.observe(waited)
+            self.metrics.order_messages.labels(LANE_NAMES[lane]).inc(len(messages))
@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field
+import logging
+from ib_insync import IB, MarketOrder, StopOrder
+from bot.order_gateway import OrderGateway, PROTECT, ENTRY
+
+logger = logging.getLogger(__name__)
+
+DONE_STATES = {'Cancelled', 'ApiCancelled', 'Inactive'}
+FINAL_STATES = DONE_STATES | {'Filled'}
+
+@dataclass
+class OrderRef:
+    strategy: object # BaseStrategy owning the order
+    leg: str         # 'entry', 'stop' or 'exit'
+    quantity: float = 0.0 # order size
+    filled: float = 0.0   # shares applied from executions
+    exec_ids: set = field(default_factory=set) # executions already applied (IB replays them after a reconnect)
+
+    @property
+    def symbol(self):
+        return self.strategy.symbol
+
+class OrderManager:
+    """Tracks every bot order by orderId and routes IB order/execution events to its strategy.
+
+    Subscribes once to orderStatusEvent and execDetailsEvent; each event is a
+    single dict lookup, so there is no polling of ib.trades() and no scan over
+    working orders. Cancelled orders leave the index at once, filled ones once
+    the strategy is flat again, so a bot running for days holds only the
+    orders of open trades.
+    """
+    def __init__(self, ib: IB, gateway: OrderGateway = None):
+        self.ib = ib
+        self.gateway = gateway or OrderGateway(ib)
+        self.index = {}        # orderId -> OrderRef
+        self.working = set()   # orderIds not yet filled or cancelled
+        self.by_strategy = {}  # strategy key -> orderIds in the index
+        self.journal = None    # TradeJournal, set by the bot
+        ib.orderStatusEvent += self.on_order_status
+        ib.execDetailsEvent += self.on_exec_details
+
+    def detach(self):
+        self.ib.orderStatusEvent -= self.on_order_status
+        self.ib.execDetailsEvent -= self.on_exec_details
+
+    def place(self, strategy, contract, order, leg: str):
+        """Index the order under a pre-assigned orderId and hand it to the gateway"""
+        self._register(strategy, order, leg)
+        lane = ENTRY if leg == 'entry' else PROTECT # stops and exits reduce risk
+        self.gateway.place(contract, order, lane, label=f"{strategy.symbol} {leg}")
+        return order
+
+    def place_bracket(self, strategy, contract, side: str, quantity: int, stop_price: float):
+        """Market entry + protective stop; the stop is only transmitted with the parent"""
+        parent = MarketOrder(side, quantity)
+        parent.transmit = False
+        self._register(strategy, parent, 'entry')
+
+        stop_side = 'SELL' if side == 'BUY' else 'BUY'
+        stop_order = StopOrder(stop_side, quantity, stop_price)
+        stop_order.parentId = parent.orderId
+        stop_order.transmit = True
+        self._register(strategy, stop_order, 'stop')
+
+        # One gateway job: both legs go out back to back, in the entry lane
+        self.gateway.submit(ENTRY, [
+            lambda: self.ib.placeOrder(contract, parent),
+            lambda: self.ib.placeOrder(contract, stop_order),
+        ], label=f"{strategy.symbol} bracket")
+        return parent, stop_order
+
+    def modify(self, contract, order):
+        """Resend a working order with changed fields (e.g. a stop price) ahead of new entries"""
+        self.gateway.place(contract, order, PROTECT, label=f"{contract.symbol} modify {order.orderId}")
+
+    def cancel(self, order):
+        self.gateway.cancel(order, label=f"cancel {order.orderId}")
+
+    def _register(self, strategy, order, leg: str):
+        # Pre-assign the orderId (placeOrder keeps a non-zero one) so the order is indexed before it is sent
+        if not order.orderId:
+            order.orderId = self.ib.client.getReqId()
+        self.index[order.orderId] = OrderRef(strategy, leg, quantity=order.totalQuantity)
+        self.by_strategy.setdefault(strategy.key, set()).add(order.orderId)
+        self.working.add(order.orderId)
+        if self.journal:
+            self.journal.record_order(strategy, order, leg)
+
+    def on_order_status(self, trade):
+        order_id = trade.order.orderId
+        ref = self.index.get(order_id)
+        if not ref:
+            return
+        try:
+            ref.strategy.on_order_status(ref.leg, trade)
+        except Exception as e:
+            logger.error(f"Error handling order status {order_id} for {ref.symbol}: {e}", extra={"symbol": ref.symbol})
+        status = trade.orderStatus.status
+        if status in FINAL_STATES:
+            self.working.discard(order_id)
+        if status in DONE_STATES:
+            self._forget(ref.strategy, order_id)
+        self._prune(ref.strategy)
+
+    def on_exec_details(self, trade, fill):
+        self._apply_fill(trade.order.orderId, fill)
+
+    def reconcile(self, fills):
+        """Apply executions that happened while disconnected.
+
+        IB replays them on connect (reqExecutions) without emitting execDetailsEvent.
+        Returns the number of fills applied.
+        """
+        return sum(self._apply_fill(fill.execution.orderId, fill) for fill in fills)
+
+    def _apply_fill(self, order_id: int, fill):
+        ref = self.index.get(order_id)
+        if not ref:
+            return False
+        # Executions are replayed after a reconnect; apply each one once
+        exec_id = fill.execution.execId
+        if exec_id in ref.exec_ids:
+            return False
+        ref.exec_ids.add(exec_id)
+        ref.filled += fill.execution.shares
+        try:
+            ref.strategy.on_fill(ref.leg, fill)
+        except Exception as e:
+            logger.error(f"Error handling fill {exec_id} for {ref.symbol}: {e}", extra={"symbol": ref.symbol})
+        if self.journal:
+            self.journal.record_fill(ref.strategy, ref.leg, fill)
+        self._prune(ref.strategy)
+        return True
+
+    def _forget(self, strategy, order_id: int):
+        del self.index[order_id]
+        orders = self.by_strategy.get(strategy.key)
+        if orders is not None:
+            orders.discard(order_id)
+            if not orders:
+                del self.by_strategy[strategy.key]
+
+    def _prune(self, strategy):
+        """Drop a flat strategy's finished orders whose executions have all been applied"""
+        if strategy.state.position:
+            return
+        for order_id in list(self.by_strategy.get(strategy.key, ())):
+            ref = self.index[order_id]
+            if order_id not in self.working and ref.filled >= ref.quantity:
+                self._forget(strategy, order_id)
+
+    def open_orders(self):
+        return len(self.working)
+
+    def has_working(self, strategy):
+        """The strategy still has an order that is neither filled nor cancelled"""
+        return any(order_id in self.working for order_id in self.by_strategy.get(strategy.key, ()))
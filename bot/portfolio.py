@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from datetime import date
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PositionExposure:
+    symbol: str
+    quantity: int = 0 # signed: >0 long, <0 short
+    avg_price: float = 0.0
+    stop: float = 0.0
+    last_price: float = 0.0
+
+    def unrealized_pnl(self):
+        return (self.last_price - self.avg_price) * self.quantity
+
+    def open_risk(self):
+        """Dollar loss if the stop is hit from the current price"""
+        if not self.stop:
+            return 0.0
+        return max(0.0, (self.last_price - self.stop) * self.quantity)
+
+    def notional(self):
+        return self.last_price * self.quantity
+
+class PortfolioAggregator:
+    """Keeps account-wide P&L, risk and exposure totals up to date in O(1) per price update.
+
+    Each position contributes to the running totals; on every change its old
+    contribution is subtracted and the new one added, so nothing is rescanned.
+    """
+    def __init__(self, risk_config: dict = None):
+        self.positions = {}   # strategy key -> PositionExposure
+        self.by_symbol = {}   # symbol -> set of strategy keys holding a position
+        self.unrealized_pnl = 0.0
+        self.realized_pnl = 0.0
+        self.open_risk = 0.0
+        self.gross_exposure = 0.0
+        self.net_exposure = 0.0
+        self.pending = {}     # strategy key -> [unfilled quantity, risk per share, entry price] of a submitted entry
+        self.pending_risk = 0.0
+        self.pending_notional = 0.0
+        self.day = date.today()
+        self.max_daily_loss = 0.0
+        self.max_open_risk = 0.0
+        self.account = None   # AccountCache, set by the bot once connected
+        self.configure(risk_config or {})
+
+    def configure(self, risk_config: dict):
+        """Account-level limits (0 disables a limit)"""
+        self.max_daily_loss = float(risk_config.get('max_daily_loss_usd', 0) or 0)
+        self.max_open_risk = float(risk_config.get('max_open_risk_usd', 0) or 0)
+
+    def _remove(self, pos: PositionExposure):
+        self.unrealized_pnl -= pos.unrealized_pnl()
+        self.open_risk -= pos.open_risk()
+        self.gross_exposure -= abs(pos.notional())
+        self.net_exposure -= pos.notional()
+
+    def _add(self, pos: PositionExposure):
+        self.unrealized_pnl += pos.unrealized_pnl()
+        self.open_risk += pos.open_risk()
+        self.gross_exposure += abs(pos.notional())
+        self.net_exposure += pos.notional()
+
+    def update_position(self, key: str, symbol: str, quantity: int, avg_price: float, stop: float = 0.0, last_price: float = None):
+        """Insert, change or (quantity == 0) drop the position held by a strategy"""
+        pos = self.positions.get(key)
+        if pos:
+            self._remove(pos)
+        if quantity == 0:
+            if pos:
+                del self.positions[key]
+                self.by_symbol.get(symbol, set()).discard(key)
+            if not self.positions:
+                # Re-anchor the running totals so float drift can't accumulate
+                self.unrealized_pnl = self.open_risk = self.gross_exposure = self.net_exposure = 0.0
+            return
+        if not pos:
+            pos = PositionExposure(symbol=symbol)
+            self.positions[key] = pos
+            self.by_symbol.setdefault(symbol, set()).add(key)
+        pos.quantity = quantity
+        pos.avg_price = avg_price
+        pos.stop = stop or 0.0
+        pos.last_price = last_price if last_price else (pos.last_price or avg_price)
+        self._add(pos)
+
+    def reserve_entry(self, key: str, quantity: int, entry_price: float, stop_price: float):
+        """Hold a submitted entry's risk and notional against the limits until it fills or fails"""
+        self.release_entry(key)
+        reservation = [abs(quantity), abs(entry_price - stop_price), entry_price]
+        self.pending[key] = reservation
+        self.pending_risk += reservation[0] * reservation[1]
+        self.pending_notional += reservation[0] * reservation[2]
+
+    def fill_entry(self, key: str, shares: float):
+        """Move filled entry shares out of the reservation (the position carries them from now on)"""
+        reservation = self.pending.get(key)
+        if not reservation:
+            return
+        shares = min(abs(shares), reservation[0])
+        reservation[0] -= shares
+        self.pending_risk -= shares * reservation[1]
+        self.pending_notional -= shares * reservation[2]
+        if reservation[0] <= 0:
+            self.release_entry(key)
+
+    def release_entry(self, key: str):
+        """Drop what is left of an entry's reservation (filled, cancelled or rejected)"""
+        reservation = self.pending.pop(key, None)
+        if reservation:
+            self.pending_risk -= reservation[0] * reservation[1]
+            self.pending_notional -= reservation[0] * reservation[2]
+        if not self.pending:
+            self.pending_risk = self.pending_notional = 0.0
+
+    def update_stop(self, key: str, stop: float):
+        pos = self.positions.get(key)
+        if pos:
+            self._remove(pos)
+            pos.stop = stop
+            self._add(pos)
+
+    def on_price(self, symbol: str, price: float):
+        """Apply a new trade price to every position on the symbol"""
+        keys = self.by_symbol.get(symbol)
+        if not keys or price != price or price <= 0:
+            return
+        for key in keys:
+            pos = self.positions[key]
+            self._remove(pos)
+            pos.last_price = price
+            self._add(pos)
+
+    def record_realized(self, pnl: float):
+        self._roll_day()
+        self.realized_pnl += pnl
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self.day:
+            self.day = today
+            self.realized_pnl = 0.0
+
+    def daily_pnl(self):
+        self._roll_day()
+        return self.realized_pnl + self.unrealized_pnl
+
+    def check_entry(self, quantity: int, entry_price: float, stop_price: float):
+        """Returns (allowed, reason) for a new entry against the account limits.
+
+        Entries submitted but not filled yet count through their reservation, so a
+        burst of signals can't all pass against the same headroom.
+        """
+        if self.max_daily_loss > 0 and self.daily_pnl() <= -self.max_daily_loss:
+            return False, f"Daily max loss reached ({self.daily_pnl():.2f} <= -{self.max_daily_loss:.2f})"
+        new_risk = abs(entry_price - stop_price) * abs(quantity)
+        committed = self.open_risk + self.pending_risk
+        if self.max_open_risk > 0 and committed + new_risk > self.max_open_risk:
+            return False, f"Max open risk exceeded ({committed:.2f} + {new_risk:.2f} > {self.max_open_risk:.2f})"
+        buying_power = self.account.buying_power() if self.account else None
+        if buying_power is not None:
+            available = buying_power - self.pending_notional
+            if abs(quantity) * entry_price > available:
+                return False, f"Insufficient buying power ({abs(quantity) * entry_price:.2f} > {available:.2f})"
+        return True, ""
+
+    def to_dict(self):
+        return {
+            "unrealized_pnl": round(self.unrealized_pnl, 2),
+            "realized_pnl": round(self.realized_pnl, 2),
+            "daily_pnl": round(self.daily_pnl(), 2),
+            "open_risk": round(self.open_risk, 2),
+            "pending_entries": len(self.pending),
+            "pending_risk": round(self.pending_risk, 2),
+            "gross_exposure": round(self.gross_exposure, 2),
+            "net_exposure": round(self.net_exposure, 2),
+            "open_positions": len(self.positions),
+            "max_daily_loss_usd": self.max_daily_loss,
+            "max_open_risk_usd": self.max_open_risk
+        }
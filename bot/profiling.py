@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class CallbackProfiler:
+    """Per-callback timings (by callback, symbol and strategy) plus an optional stack sampler.
+
+    Can be switched on and off while the bot runs. When disabled the hot path
+    only pays an attribute check.
+    """
+    def __init__(self, output_dir: str, sample_interval: float = 0.005):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.enabled = False
+        self.stats = {}          # (callback, symbol, strategy) -> [calls, total_s, max_s]
+        self.stacks = Counter()  # collapsed stack -> samples (written by the sampler thread)
+        self._lock = threading.Lock()
+        self.started_at = None
+        self._sampler = None
+        self._stop_sampler = threading.Event()
+        self._target_thread = None
+        self._decoder = None
+
+    def record(self, callback: str, symbol: str, strategy: str, elapsed: float):
+        key = (callback, symbol, strategy)
+        entry = self.stats.get(key)
+        if entry is None:
+            self.stats[key] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+    def set_enabled(self, enabled: bool, ib=None):
+        if enabled == self.enabled:
+            return
+        if enabled:
+            self.stats.clear()
+            with self._lock:
+                self.stacks.clear()
+            self.started_at = time.time()
+            self.enabled = True
+            self._patch_decoder(ib)
+            self._start_sampler()
+            logger.info("Profiling enabled")
+        else:
+            self.enabled = False
+            self._stop_sampling()
+            self._unpatch_decoder()
+            self.dump()
+            logger.info("Profiling disabled")
+
+    def toggle(self, ib=None):
+        self.set_enabled(not self.enabled, ib)
+
+    def reattach(self, ib):
+        """After a reconnect: wrap the connection's current decoder again (no-op when disabled or unchanged)"""
+        if not self.enabled:
+            return
+        decoder = getattr(getattr(ib, 'client', None), 'decoder', None)
+        if decoder is self._decoder and decoder is not None and 'interpret' in decoder.__dict__:
+            return
+        self._unpatch_decoder()
+        self._patch_decoder(ib)
+
+    # IB message decoding: wrap the client's Decoder.interpret on the instance
+    def _patch_decoder(self, ib):
+        client = getattr(ib, 'client', None)
+        decoder = getattr(client, 'decoder', None)
+        if decoder is None:
+            return
+        original = decoder.interpret
+        profiler = self
+
+        def interpret(fields):
+            t0 = time.perf_counter()
+            try:
+                return original(fields)
+            finally:
+                msg_id = fields[0] if fields else '?'
+                profiler.record('ib_decode', '*', f"msg_{msg_id}", time.perf_counter() - t0)
+
+        decoder.interpret = interpret
+        self._decoder = decoder
+
+    def _unpatch_decoder(self):
+        if self._decoder is not None:
+            # Drop the instance attribute so the class method is used again
+            self._decoder.__dict__.pop('interpret', None)
+            self._decoder = None
+
+    # Stack sampler: a daemon thread that snapshots the event-loop thread's stack
+    def _start_sampler(self):
+        self._target_thread = threading.get_ident()
+        self._stop_sampler.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="stack-sampler", daemon=True)
+        self._sampler.start()
+
+    def _stop_sampling(self):
+        self._stop_sampler.set()
+        if self._sampler:
+            self._sampler.join(timeout=1.0)
+            self._sampler = None
+
+    def _sample_loop(self):
+        while not self._stop_sampler.wait(self.sample_interval):
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                continue
+            parts = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            stack = ";".join(reversed(parts))
+            with self._lock:
+                self.stacks[stack] += 1
+
+    def summary(self, top: int = 50):
+        rows = []
+        for (callback, symbol, strategy), (calls, total, max_s) in self.stats.items():
+            rows.append({
+                "callback": callback, "symbol": symbol, "strategy": strategy,
+                "calls": calls, "total_ms": round(total * 1000, 3),
+                "avg_us": round(total / calls * 1e6, 1), "max_ms": round(max_s * 1000, 3)
+            })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows[:top]
+
+    def dump(self):
+        """Write the callback summary (JSON) and the sampled stacks in collapsed/folded format"""
+        if not self.started_at:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._lock:
+            stacks = Counter(self.stacks)
+        # One folded file per profiling session, rewritten by each periodic dump
+        stamp = datetime.fromtimestamp(self.started_at).strftime("%Y%m%d-%H%M%S")
+        folded_path = os.path.join(self.output_dir, f"stacks-{stamp}.folded")
+        with open(folded_path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        self_time = Counter()
+        for stack, count in stacks.items():
+            self_time[stack.rsplit(";", 1)[-1]] += count
+        report = {
+            "generated_at": datetime.now().isoformat(),
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "enabled": self.enabled,
+            "callbacks": self.summary(),
+            "top_frames": [{"frame": frame, "samples": n} for frame, n in self_time.most_common(30)],
+            "total_samples": sum(stacks.values()),
+            "folded_file": folded_path,
+        }
+        with open(os.path.join(self.output_dir, "profile_summary.json"), "w") as f:
+            json.dump(report, f, indent=2)
+        return folded_path
@@ -0,0 +1,174 @@
+import logging
+import mmap
+import os
+import struct
+import time
+from datetime import datetime, timezone
+from bot.market_calendar import NYSE, NY
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECORDER = {
+    'enabled': False,
+    'path': 'data/recordings', # one file per bot run
+    'chunk_mb': 16,            # the file grows (and is re-mapped) by this much when full
+}
+
+MAGIC = b"BIKREV01"
+
+# Fixed-layout little-endian records; the leading type byte is never 0, so the
+# zero-filled tail of the last chunk (or of a crashed run) ends the journal.
+SYMBOL = 1 # symbol id -> name, written before the first record using the id
+TICK = 2   # one ticker of a pendingTickersEvent
+BAR = 3    # one bar of a keepUpToDate bar stream update
+TBT = 4    # one tick-by-tick print of the preceding TICK's ticker (ticker.tickByTicks)
+
+_SYMBOL = struct.Struct("<BHB")              # type, id, name length (name bytes follow)
+_TICK = struct.Struct("<BdHdddddddd")        # type, ts, id, last, lastSize, close, bid, bidSize, ask, askSize, volume
+_BAR = struct.Struct("<BdHBdddddddi")        # type, ts, id, flags, date, open, high, low, close, volume, average, barCount
+_TBT = struct.Struct("<BdHBddd")             # type, ts, id, tickType, time, price, size
+
+# BAR flags
+NEW_BAR = 1  # the update's has_new_bar
+SNAPSHOT = 2 # bar of the stream's initial contents: rebuilds the list, not dispatched
+RESET = 4    # first bar of a snapshot: the stream was (re)opened
+
+class EventRecorder:
+    """Append-only binary journal of the raw market data events the bot receives.
+
+    Records are packed straight into a memory-mapped file (no syscall per
+    event), so recording costs one struct.pack_into per ticker or bar update.
+    Bar streams are journaled as their changed last bar, plus the whole list
+    once per subscription, which is enough for `bot.replay` to rebuild them.
+    """
+    def __init__(self, path: str, chunk_mb: int = 16):
+        self.path = path
+        self.chunk = max(1, int(chunk_mb)) * 1024 * 1024
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, "w+b")
+        self.file.truncate(self.chunk)
+        self.map = mmap.mmap(self.file.fileno(), self.chunk)
+        self.map[:len(MAGIC)] = MAGIC
+        self.offset = len(MAGIC)
+        self.symbols = {} # symbol -> id
+        self.streams = {} # symbol -> bar list object already snapshotted
+        self.records = 0
+
+    @classmethod
+    def from_config(cls, config: dict, base_dir: str):
+        """None when recording is disabled"""
+        cfg = {**DEFAULT_RECORDER, **((config or {}).get('recorder') or {})}
+        if not cfg.get('enabled'):
+            return None
+        directory = cfg['path'] if os.path.isabs(cfg['path']) else os.path.join(base_dir, cfg['path'])
+        path = os.path.join(directory, f"{datetime.now():%Y%m%d-%H%M%S}.evj")
+        logger.info(f"Recording market data events to {path}")
+        return cls(path, chunk_mb=cfg.get('chunk_mb', 16))
+
+    def _reserve(self, size: int):
+        if self.offset + size > len(self.map):
+            length = len(self.map) + max(self.chunk, size)
+            self.map.close()
+            self.file.truncate(length)
+            self.map = mmap.mmap(self.file.fileno(), length)
+
+    def _symbol_id(self, symbol: str):
+        sid = self.symbols.get(symbol)
+        if sid is None:
+            sid = self.symbols[symbol] = len(self.symbols)
+            name = symbol.encode()
+            self._reserve(_SYMBOL.size + len(name))
+            _SYMBOL.pack_into(self.map, self.offset, SYMBOL, sid, len(name))
+            self.map[self.offset + _SYMBOL.size:self.offset + _SYMBOL.size + len(name)] = name
+            self.offset += _SYMBOL.size + len(name)
+        return sid
+
+    def tickers(self, tickers):
+        """Journal a pendingTickersEvent batch"""
+        ts = time.time()
+        for t in tickers:
+            sid = self._symbol_id(t.contract.symbol)
+            self._reserve(_TICK.size)
+            _TICK.pack_into(self.map, self.offset, TICK, ts, sid, t.last, t.lastSize, t.close,
+                            t.bid, t.bidSize, t.ask, t.askSize, t.volume)
+            self.offset += _TICK.size
+            self.records += 1
+            for tick in t.tickByTicks or ():
+                # Prints batched with this update: ticker.last only keeps the final one
+                self._reserve(_TBT.size)
+                _TBT.pack_into(self.map, self.offset, TBT, ts, sid, tick.tickType, tick.time.timestamp(),
+                               tick.price, tick.size)
+                self.offset += _TBT.size
+                self.records += 1
+
+    def bars(self, bars, has_new_bar: bool):
+        """Journal a bar stream update (the whole list the first time this stream object is seen)"""
+        if not bars:
+            return
+        ts = time.time()
+        symbol = bars.contract.symbol
+        sid = self._symbol_id(symbol)
+        flags = NEW_BAR if has_new_bar else 0
+        if self.streams.get(symbol) is not bars:
+            self.streams[symbol] = bars
+            for i, bar in enumerate(bars[:-1]):
+                self._bar(ts, sid, SNAPSHOT | (RESET if i == 0 else 0), bar)
+            if len(bars) == 1:
+                flags |= RESET
+        self._bar(ts, sid, flags, bars[-1])
+
+    def _bar(self, ts: float, sid: int, flags: int, bar):
+        self._reserve(_BAR.size)
+        _BAR.pack_into(self.map, self.offset, BAR, ts, sid, flags, NYSE.to_ny(bar.date).timestamp(),
+                       bar.open, bar.high, bar.low, bar.close, bar.volume, bar.average, bar.barCount)
+        self.offset += _BAR.size
+        self.records += 1
+
+    def close(self):
+        """Flush and cut the file at the last record"""
+        if self.map is None:
+            return
+        self.map.flush()
+        self.map.close()
+        self.map = None
+        self.file.truncate(self.offset)
+        self.file.close()
+        logger.info(f"Recorded {self.records} events ({self.offset / 1e6:.1f} MB) to {self.path}")
+
+def read_events(path: str):
+    """Yield (kind, ts, symbol, fields) from a journal; kind is TICK, TBT or BAR.
+
+    TICK fields: (last, lastSize, close, bid, bidSize, ask, askSize, volume)
+    TBT fields: (tickType, time, price, size), time UTC-aware; follows its ticker's TICK
+    BAR fields: (flags, date, open, high, low, close, volume, average, barCount), date NY-aware
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not an event journal")
+            names = {}
+            offset = len(MAGIC)
+            while offset < size:
+                kind = buf[offset]
+                if kind == TICK:
+                    rec = _TICK.unpack_from(buf, offset)
+                    offset += _TICK.size
+                    yield TICK, rec[1], names[rec[2]], rec[3:]
+                elif kind == TBT:
+                    rec = _TBT.unpack_from(buf, offset)
+                    offset += _TBT.size
+                    yield TBT, rec[1], names[rec[2]], (rec[3], datetime.fromtimestamp(rec[4], timezone.utc)) + rec[5:]
+                elif kind == BAR:
+                    rec = _BAR.unpack_from(buf, offset)
+                    offset += _BAR.size
+                    yield BAR, rec[1], names[rec[2]], (rec[3], datetime.fromtimestamp(rec[4], NY)) + rec[5:]
+                elif kind == SYMBOL:
+                    _, sid, length = _SYMBOL.unpack_from(buf, offset)
+                    start = offset + _SYMBOL.size
+                    names[sid] = bytes(buf[start:start + length]).decode()
+                    offset = start + length
+                else:
+                    return # zero-filled tail: end of the journal
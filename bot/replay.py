@@ -0,0 +1,311 @@
+"""Replay a recorded event journal (bot.recorder) through ORBBot.
+
+The bot runs unchanged against ReplayIB, which plays TWS: it serves the
+recorded tickers and bar streams, and fills the bot's orders against the
+recorded prices. The market calendar runs on the recorded clock, so session
+and opening-range logic see the original day. Nothing touches the live
+files: no metrics port, trade journal or recording, a read-only bar archive,
+and the state goes to `<journal>.state.json`.
+
+Usage:
+    python -m bot.replay data/recordings/20261019-092500.evj            # real time
+    python -m bot.replay data/recordings/20261019-092500.evj --speed 10
+    python -m bot.replay data/recordings/20261019-092500.evj --max      # as fast as possible
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from eventkit import Event
+from ib_insync import (BarData, BarDataList, Ticker, Trade, OrderStatus, Execution, Fill, CommissionReport,
+                       TickByTickAllLast, TickAttribLast)
+from bot.market_calendar import NYSE, NY
+from bot.recorder import read_events, TICK, TBT, NEW_BAR, SNAPSHOT, RESET
+
+logger = logging.getLogger(__name__)
+
+class _ReplayClient:
+    def __init__(self):
+        self._ids = itertools.count(1)
+
+    def getReqId(self):
+        return next(self._ids)
+
+class ReplayIB:
+    """The part of ib_insync's IB the bot uses, fed from a journal instead of TWS.
+
+    Market orders fill at the next recorded trade price, stops when the price
+    crosses them, limits when it is marketable; children of a bracket only
+    once their parent filled.
+    """
+    def __init__(self):
+        self.pendingTickersEvent = Event('pendingTickersEvent')
+        self.orderStatusEvent = Event('orderStatusEvent')
+        self.execDetailsEvent = Event('execDetailsEvent')
+        self.errorEvent = Event('errorEvent')
+        self.connectedEvent = Event('connectedEvent')
+        self.disconnectedEvent = Event('disconnectedEvent')
+        self.accountValueEvent = Event('accountValueEvent')
+        self.updatePortfolioEvent = Event('updatePortfolioEvent')
+        self.client = _ReplayClient()
+        self.tickers = {}  # symbol -> Ticker
+        self.streams = {}  # symbol -> keepUpToDate BarDataList
+        self.trades = {}   # orderId -> Trade
+        self.working = {}  # symbol -> [Trade] able to fill
+        self.children = {} # parent orderId -> [Trade]
+        self._exec_ids = itertools.count(1)
+        self.placed = 0
+        self.fills = 0
+
+    def isConnected(self):
+        return True
+
+    async def qualifyContractsAsync(self, *contracts):
+        return list(contracts)
+
+    def reqMktData(self, contract, *args, **kwargs):
+        ticker = self.tickers.get(contract.symbol)
+        if ticker is None:
+            ticker = self.tickers[contract.symbol] = Ticker(contract=contract)
+        return ticker
+
+    def cancelMktData(self, contract):
+        self.tickers.pop(contract.symbol, None)
+
+    def reqTickByTickData(self, contract, tickType: str, numberOfTicks: int = 0, ignoreSize: bool = False):
+        return self.reqMktData(contract) # the journal holds the live ticker's updates and its tick-by-tick prints
+
+    def cancelTickByTickData(self, contract, tickType: str):
+        pass
+
+    async def reqHistoricalDataAsync(self, contract, endDateTime='', durationStr='', barSizeSetting='',
+                                     whatToShow='', useRTH=True, formatDate=1, keepUpToDate=False, **kwargs):
+        if not keepUpToDate:
+            return [] # history comes from the bar archive
+        bars = BarDataList()
+        bars.contract = contract
+        bars.barSizeSetting = barSizeSetting
+        bars.keepUpToDate = True
+        self.streams[contract.symbol] = bars
+        return bars
+
+    def cancelHistoricalData(self, bars):
+        if self.streams.get(bars.contract.symbol) is bars:
+            del self.streams[bars.contract.symbol]
+
+    async def reqCurrentTimeAsync(self):
+        return NYSE.now()
+
+    def accountValues(self, account: str = ''):
+        return []
+
+    def portfolio(self, account: str = ''):
+        return []
+
+    def placeOrder(self, contract, order):
+        trade = self.trades.get(order.orderId)
+        if trade is not None:
+            return trade # modification: the working order is held by reference
+        if not order.orderId:
+            order.orderId = self.client.getReqId()
+        trade = Trade(contract=contract, order=order, orderStatus=OrderStatus(
+            orderId=order.orderId, status='Submitted', remaining=order.totalQuantity))
+        self.trades[order.orderId] = trade
+        if order.parentId and order.parentId in self.trades and not self.trades[order.parentId].isDone():
+            self.children.setdefault(order.parentId, []).append(trade)
+        else:
+            self.working.setdefault(contract.symbol, []).append(trade)
+        self.placed += 1
+        self.orderStatusEvent.emit(trade)
+        return trade
+
+    def cancelOrder(self, order):
+        trade = self.trades.get(order.orderId)
+        if trade is None or trade.isDone():
+            return
+        orders = self.working.get(trade.contract.symbol) or []
+        if trade in orders:
+            orders.remove(trade)
+        for children in self.children.values():
+            if trade in children:
+                children.remove(trade)
+        trade.orderStatus.status = 'Cancelled'
+        self.orderStatusEvent.emit(trade)
+        for child in self.children.pop(order.orderId, []):
+            self.cancelOrder(child.order)
+
+    def match(self, symbol: str, price: float):
+        """Fill the symbol's working orders against a recorded trade price"""
+        orders = self.working.get(symbol)
+        if not orders or price != price or price <= 0:
+            return
+        for trade in list(orders):
+            order = trade.order
+            buy = order.action == 'BUY'
+            fill_price = price
+            if order.orderType == 'STP' and not (price >= order.auxPrice if buy else price <= order.auxPrice):
+                continue
+            if order.orderType == 'LMT':
+                if not (price <= order.lmtPrice if buy else price >= order.lmtPrice):
+                    continue
+                fill_price = min(price, order.lmtPrice) if buy else max(price, order.lmtPrice)
+            orders.remove(trade)
+            self._fill(trade, fill_price)
+
+    def _fill(self, trade, price: float):
+        order = trade.order
+        now = NYSE.now().astimezone(timezone.utc)
+        execution = Execution(
+            execId=f"replay-{next(self._exec_ids)}", time=now, orderId=order.orderId,
+            side='BOT' if order.action == 'BUY' else 'SLD', shares=order.totalQuantity, price=price)
+        fill = Fill(trade.contract, execution, CommissionReport(), now)
+        trade.fills.append(fill)
+        trade.orderStatus.status = 'Filled'
+        trade.orderStatus.filled = order.totalQuantity
+        trade.orderStatus.remaining = 0
+        trade.orderStatus.avgFillPrice = price
+        self.fills += 1
+        for child in self.children.pop(order.orderId, []):
+            self.working.setdefault(child.contract.symbol, []).append(child)
+        self.orderStatusEvent.emit(trade)
+        self.execDetailsEvent.emit(trade, fill)
+
+    def apply_ticker(self, symbol: str, ts: float, fields):
+        ticker = self.tickers.get(symbol)
+        if ticker is None:
+            return None
+        (ticker.last, ticker.lastSize, ticker.close, ticker.bid, ticker.bidSize,
+         ticker.ask, ticker.askSize, ticker.volume) = fields
+        ticker.time = datetime.fromtimestamp(ts, timezone.utc)
+        return ticker
+
+    def apply_tick_by_tick(self, symbol: str, fields):
+        """Attach a recorded print to the ticker's tickByTicks for the current batch"""
+        ticker = self.tickers.get(symbol)
+        if ticker is None:
+            return None
+        tick_type, tick_time, price, size = fields
+        ticker.tickByTicks.append(TickByTickAllLast(tick_type, tick_time, price, size, TickAttribLast(), '', ''))
+        return ticker
+
+    def apply_bar(self, symbol: str, fields):
+        """Update the symbol's bar stream; emits its updateEvent unless the record is part of a snapshot"""
+        bars = self.streams.get(symbol)
+        if bars is None:
+            return
+        flags, bar_date, open_, high, low, close, volume, average, bar_count = fields
+        bar = BarData(date=bar_date, open=open_, high=high, low=low, close=close,
+                      volume=volume, average=average, barCount=bar_count)
+        if flags & RESET:
+            bars.clear()
+        if bars and bars[-1].date == bar_date:
+            bars[-1] = bar
+        else:
+            bars.append(bar)
+        if not flags & SNAPSHOT:
+            bars.updateEvent.emit(bars, bool(flags & NEW_BAR))
+
+async def replay(path: str, config_path: str = "config.yaml", speed: float = 1.0, state_file: str = None):
+    """Push a journal through a fresh ORBBot; speed 1 = real time, 0 = as fast as possible. Returns a summary."""
+    from main import ORBBot, base_dir
+    from bot.bar_archive import BarArchive
+
+    events = read_events(path)
+    first = next(events, None)
+    if first is None:
+        raise SystemExit(f"{path} holds no events")
+    now = first[1]
+    NYSE.clock = lambda: datetime.fromtimestamp(now, NY)
+
+    bot = ORBBot(config_path, overrides={
+        'metrics': {'enabled': False}, 'journal': {'enabled': False}, 'recorder': {'enabled': False}})
+    if bot.archive:
+        bot.archive.close()
+        bot.archive = BarArchive.from_config(bot.config, base_dir, readonly=True)
+    bot.state_file = state_file or path + ".state.json"
+    ib = bot.ib = ReplayIB()
+    loop = asyncio.get_running_loop()
+    counts = {'ticks': 0, 'bars': 0}
+    try:
+        await bot.start()
+        wall0 = loop.time()
+        batch, batch_ts = [], None
+
+        def flush():
+            if batch:
+                ib.pendingTickersEvent.emit(list(batch))
+                for ticker in batch:
+                    ticker.tickByTicks = [] # as ib_insync does once the batch is delivered
+                batch.clear()
+
+        for kind, ts, symbol, fields in itertools.chain([first], events):
+            if ts != batch_ts:
+                flush() # one pendingTickersEvent per recorded batch
+                batch_ts = ts
+                if speed > 0:
+                    delay = (ts - first[1]) / speed - (loop.time() - wall0)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                else:
+                    await asyncio.sleep(0) # let the bar handlers and order gateway run
+                now = ts
+                bot.scheduler.run_due() # timed jobs (session open/close included) on the recorded clock
+            if kind == TICK:
+                ticker = ib.apply_ticker(symbol, ts, fields)
+                if ticker is not None:
+                    ib.match(symbol, ticker.last if ticker.last == ticker.last else ticker.close)
+                    batch.append(ticker)
+                    counts['ticks'] += 1
+            elif kind == TBT:
+                ticker = ib.apply_tick_by_tick(symbol, fields)
+                if ticker is not None:
+                    ib.match(symbol, fields[2])
+            else:
+                flush()
+                ib.apply_bar(symbol, fields)
+                counts['bars'] += 1
+        flush()
+        for _ in range(10):
+            await asyncio.sleep(0) # drain queued bar updates and order jobs
+        elapsed = loop.time() - wall0
+    finally:
+        await bot.shutdown()
+        NYSE.clock = None
+
+    return {
+        "journal": path,
+        "recorded_s": round(now - first[1], 1),
+        "replay_s": round(elapsed, 3),
+        "ticks": counts['ticks'],
+        "bar_updates": counts['bars'],
+        "events_per_s": round((counts['ticks'] + counts['bars']) / elapsed) if elapsed > 0 else None,
+        "orders": ib.placed,
+        "fills": ib.fills,
+        "strategies": {key: {"status": s.state.status, "position": s.state.position,
+                             "realized_pnl": round(s.state.realized_pnl, 2)}
+                       for key, s in bot.active_strategies.items()},
+        "state_file": bot.state_file,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("journal", help="event journal written by the recorder (.evj)")
+    parser.add_argument("--config", default=None, help="bot config (default: config.yaml of the repo)")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = real time, 10 = ten times faster")
+    parser.add_argument("--max", action="store_true", help="as fast as possible")
+    parser.add_argument("--state", default=None, help="state file to write (default: <journal>.state.json)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    config_path = args.config or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.yaml")
+    t0 = time.perf_counter()
+    summary = asyncio.run(replay(args.journal, config_path, 0 if args.max else args.speed, args.state))
+    summary["total_s"] = round(time.perf_counter() - t0, 3)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# Position sizing and stop math shared by the bot and the dashboard.
+# No third-party imports: the trading process loads it without the UI stack.
+
+def live_equity_config(risk_config: dict, net_liquidation):
+    """Risk config sized off the account's live NetLiquidation instead of the configured
+    `account_equity` (unless `equity_source: config`, or no live value is known yet)"""
+    if not net_liquidation or risk_config.get('equity_source', 'account') != 'account':
+        return risk_config
+    return {**risk_config, 'account_equity': net_liquidation}
+
+def calc_quantity(stop_distance: float, risk_config: dict):
+    """Calculate quantity based on risk % and stop distance"""
+    if stop_distance <= 0:
+        return 0
+        
+    equity = risk_config.get('account_equity', 100000)
+    risk_pct = risk_config.get('risk_per_trade_percent', 1.0) / 100.0
+    max_risk_usd = risk_config.get('max_risk_usd', 500)
+    
+    risk_amt = min(equity * risk_pct, max_risk_usd)
+    
+    quantity = int(risk_amt / stop_distance)
+    return max(1, quantity)
+
+def calculate_capped_stop(entry_price: float, raw_stop: float, side: str, atr: float, max_stop_atr: float):
+    """Apply ATR-based stop loss limit"""
+    if max_stop_atr <= 0 or atr <= 0:
+        return raw_stop
+
+    atr_limit_dist = atr * max_stop_atr
+    raw_dist = abs(entry_price - raw_stop)
+    
+    if raw_dist > atr_limit_dist:
+        capped_stop = entry_price - atr_limit_dist if side == 'BUY' else entry_price + atr_limit_dist
+        return round(capped_stop, 2)
+        
+    return round(raw_stop, 2)
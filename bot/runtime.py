@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RUNTIME = {
+    # 'production': native asyncio only (no nest_asyncio), optional fast loop
+    # 'compat': previous behaviour, nest_asyncio patched re-entrant loop
+    'mode': 'production',
+    'fast_loop': True,
+}
+
+def runtime_config(config: dict):
+    cfg = dict(DEFAULT_RUNTIME)
+    cfg.update((config or {}).get('runtime') or {})
+    return cfg
+
+def fast_loop_factory():
+    """uvloop (or winloop on Windows) event loop factory when installed, else None"""
+    for module_name in ('uvloop', 'winloop'):
+        try:
+            module = __import__(module_name)
+            return module.new_event_loop
+        except ImportError:
+            continue
+    return None
+
+def run(main_coro_fn, config: dict):
+    """Run the bot's main coroutine on the loop implementation selected in `runtime`"""
+    cfg = runtime_config(config)
+    loop_factory = None
+    if cfg['mode'] == 'production' and cfg['fast_loop']:
+        loop_factory = fast_loop_factory()
+    logger.info(f"Runtime: {cfg['mode']} ({'fast loop' if loop_factory else 'asyncio loop'})")
+
+    if loop_factory is None:
+        return asyncio.run(main_coro_fn())
+    if hasattr(asyncio, 'Runner'):
+        with asyncio.Runner(loop_factory=loop_factory) as runner:
+            return runner.run(main_coro_fn())
+    # Python < 3.11 has no asyncio.Runner: drive the loop by hand
+    loop = loop_factory()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(main_coro_fn())
+    finally:
+        try:
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+def apply_compat_patches(config: dict):
+    """nest_asyncio re-entrant loop, only outside production mode. Call from inside the running loop."""
+    if runtime_config(config)['mode'] == 'production':
+        return False
+    import nest_asyncio
+    nest_asyncio.apply()
+    return True
@@ -0,0 +1,158 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import zlib
+from datetime import timedelta
+from bot.market_calendar import NYSE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEDULER = {
+    'atr_refresh_s': 1800,   # intraday ATR refresh per strategy, during regular hours
+    'pre_open_minutes': 15,  # pre-open warmup this long before the open
+    'spread_s': 60,          # window the warmup of all symbols is spread over
+}
+
+MAX_SLEEP = 1.0 # seconds; bounds how late a job runs when the clock jumps (replay)
+
+class Job:
+    __slots__ = ("key", "fn", "when", "interval", "anchor", "offset", "phase", "market_hours", "cancelled")
+
+    def __init__(self, key, fn, when: float, interval: float = 0.0, anchor: str = None,
+                 offset: timedelta = None, phase: float = 0.0, market_hours: bool = False):
+        self.key = key                   # (owner, name); scheduling the same key replaces the job
+        self.fn = fn                     # sync or async callable without arguments
+        self.when = when                 # next run, epoch seconds on the session clock
+        self.interval = interval         # recurring every `interval` seconds (0 = not)
+        self.anchor = anchor             # 'open' / 'close': runs once per session at anchor + offset
+        self.offset = offset
+        self.phase = phase               # spread offset within the interval / spread window
+        self.market_hours = market_hours # recurring job skipped outside regular hours
+        self.cancelled = False
+
+def _phase(key, window: float):
+    """Stable per-job offset in [0, window): the same job lands at the same spot every run"""
+    if window <= 0:
+        return 0.0
+    return zlib.crc32(repr(key).encode()) % int(window * 1000) / 1000.0
+
+class Scheduler:
+    """Heap of timed jobs on the session clock (NYSE.now(), so replays run on recorded time).
+
+    Jobs are one-off, recurring every N seconds, or once per session relative
+    to the open or close (holidays and early closes come from the calendar).
+    Recurring and warmup jobs get a stable per-key phase, so hundreds of
+    symbols spread their refreshes instead of firing together. Async jobs run
+    as tasks: a slow job never holds the others back.
+    """
+    def __init__(self, cfg: dict = None):
+        self.heap = []      # (when, seq, Job)
+        self.jobs = {}      # key -> Job
+        self.tasks = set()  # running async jobs
+        self._seq = itertools.count()
+        self._wake = None
+        self.configure(cfg or {})
+
+    def configure(self, cfg: dict):
+        self.cfg = {**DEFAULT_SCHEDULER, **cfg}
+        self.atr_refresh = float(self.cfg['atr_refresh_s'])
+        self.pre_open = timedelta(minutes=self.cfg['pre_open_minutes'])
+        self.spread = float(self.cfg['spread_s'])
+
+    @staticmethod
+    def now():
+        return NYSE.now().timestamp()
+
+    def _push(self, job: Job):
+        old = self.jobs.get(job.key)
+        if old is not None:
+            old.cancelled = True # lazy removal: skipped when it reaches the top of the heap
+        self.jobs[job.key] = job
+        heapq.heappush(self.heap, (job.when, next(self._seq), job))
+        if self._wake is not None and self.heap[0][2] is job:
+            self._wake.set()
+        return job
+
+    def at(self, when, fn, key):
+        """Run once at `when` (aware datetime)"""
+        return self._push(Job(key, fn, when.timestamp()))
+
+    def every(self, interval: float, fn, key, market_hours: bool = False):
+        """Run every `interval` seconds, first at a stable phase within one interval"""
+        phase = _phase(key, interval)
+        return self._push(Job(key, fn, self.now() + phase, interval=interval, phase=phase, market_hours=market_hours))
+
+    def daily(self, anchor: str, offset: timedelta, fn, key, spread: float = 0.0):
+        """Run once per session at its open/close + offset (+ a stable phase within `spread` seconds)"""
+        job = Job(key, fn, 0.0, anchor=anchor, offset=offset, phase=_phase(key, spread))
+        job.when = self._next_session_time(job, self.now())
+        return self._push(job)
+
+    def _next_session_time(self, job: Job, after: float):
+        session = NYSE.session() or NYSE.next_session()
+        while True:
+            when = (getattr(session, job.anchor) + job.offset).timestamp() + job.phase
+            if when > after:
+                return when
+            session = NYSE.next_session(session.day, inclusive=False)
+
+    def cancel(self, key):
+        job = self.jobs.pop(key, None)
+        if job is not None:
+            job.cancelled = True
+
+    def cancel_owner(self, owner):
+        """Drop every job of an owner (e.g. a strategy being removed)"""
+        for key in [key for key in self.jobs if key[0] == owner]:
+            self.cancel(key)
+
+    def run_due(self):
+        """Run the jobs whose time has come; returns how many ran"""
+        now = self.now()
+        ran = 0
+        while self.heap and self.heap[0][0] <= now:
+            _, _, job = heapq.heappop(self.heap)
+            if job.cancelled:
+                continue
+            if job.interval:
+                job.when = max(job.when + job.interval, now)
+            elif job.anchor:
+                job.when = self._next_session_time(job, now)
+            else:
+                del self.jobs[job.key]
+            if job.interval or job.anchor:
+                heapq.heappush(self.heap, (job.when, next(self._seq), job))
+            if job.market_hours and not NYSE.is_open():
+                continue
+            self._run(job)
+            ran += 1
+        return ran
+
+    def _run(self, job: Job):
+        try:
+            result = job.fn()
+        except Exception as e:
+            logger.error(f"Scheduled job {job.key} failed: {e}")
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self.tasks.add(task)
+            task.add_done_callback(lambda t, key=job.key: self._done(t, key))
+
+    def _done(self, task, key):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Scheduled job {key} failed: {task.exception()}")
+
+    async def run(self):
+        self._wake = asyncio.Event()
+        while True:
+            self.run_due()
+            delay = self.heap[0][0] - self.now() if self.heap else MAX_SLEEP
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=min(max(delay, 0.0), MAX_SLEEP))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import yaml
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCREENER = {
+    'lookback_days': 45,
+    'max_price': 500.0,
+    'min_atr_pct': 2.0,
+    'min_avg_volume': 1000000,
+    'min_gap_pct': 0.0,
+    'min_price': 5.0,
+    'sort_by': 'atr_pct',
+    'top_n': 10,
+    'universe': [], # empty: every symbol with daily bars in the archive
+}
+
+def screener_config(config: dict):
+    return {**DEFAULT_SCREENER, **((config or {}).get('screener') or {})}
+
+def daily_panel(archive, symbols=None, lookback_days: int = 45):
+    """Completed daily bars of the whole universe as symbol x day matrices (one SQL read).
+
+    Today's (still forming) daily bar is left out so the last column is the prior close.
+    """
+    today = date.today()
+    df = archive.universe_frame('1 day', since=today - timedelta(days=lookback_days), until=today)
+    if symbols:
+        df = df[df['symbol'].isin(symbols)]
+    if df.empty:
+        return None
+    return {field: df.pivot(index='symbol', columns='ts', values=field).sort_index(axis=1)
+            for field in ('open', 'high', 'low', 'close', 'volume')}
+
+def compute_metrics(panel, prices=None, atr_period: int = 14, volume_period: int = 20):
+    """ATR(14) and ATR%, average volume, last close, gap % vs the prior close (needs current `prices`)"""
+    high, low, close = panel['high'].to_numpy(), panel['low'].to_numpy(), panel['close'].to_numpy()
+    prev_close = np.concatenate([np.full((close.shape[0], 1), np.nan), close[:, :-1]], axis=1)
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    index = panel['close'].index
+
+    # Columns are days: roll along axis 1 (transpose so pandas rolls over rows)
+    atr = pd.DataFrame(tr.T).rolling(atr_period, min_periods=atr_period - 4).mean().ffill().iloc[-1].to_numpy()
+    avg_volume = panel['volume'].T.rolling(volume_period, min_periods=5).mean().ffill().iloc[-1].to_numpy()
+    last_close = panel['close'].T.ffill().iloc[-1].to_numpy()
+    last_day = panel['close'].notna().to_numpy()[:, ::-1].argmax(axis=1)
+    days = panel['close'].columns.to_numpy()
+
+    metrics = pd.DataFrame({
+        'last_close': last_close,
+        'atr': atr,
+        'atr_pct': atr / last_close * 100.0,
+        'avg_volume': avg_volume,
+        'last_session': pd.to_datetime(days[len(days) - 1 - last_day], unit='s').date,
+    }, index=index)
+    price = pd.Series(prices or {}, dtype=float).reindex(index)
+    metrics['price'] = price.fillna(metrics['last_close'])
+    metrics['gap_pct'] = (price / metrics['last_close'] - 1.0) * 100.0
+    return metrics
+
+def screen(metrics: pd.DataFrame, cfg: dict):
+    """Apply the filters in one vectorized mask and return the ranked top N"""
+    # Symbols whose archive stops before the latest session would be ranked on stale closes
+    fresh = metrics['last_session'] == metrics['last_session'].max()
+    mask = fresh & (
+        (metrics['price'] >= cfg['min_price']) &
+        (metrics['price'] <= cfg['max_price']) &
+        (metrics['atr_pct'] >= cfg['min_atr_pct']) &
+        (metrics['avg_volume'] >= cfg['min_avg_volume'])
+    )
+    if cfg.get('min_gap_pct'):
+        mask &= metrics['gap_pct'].abs() >= cfg['min_gap_pct']
+    sort_by = cfg.get('sort_by', 'atr_pct')
+    ranked = metrics[mask.fillna(False)]
+    if sort_by == 'gap_pct':
+        ranked = ranked.reindex(ranked['gap_pct'].abs().sort_values(ascending=False).index)
+    else:
+        ranked = ranked.sort_values(sort_by, ascending=False)
+    return ranked.head(int(cfg['top_n']))
+
+def run_screen(archive, config: dict, prices=None):
+    """Full scan with the `screener` config section; returns (ranked top N, universe size)"""
+    cfg = screener_config(config)
+    panel = daily_panel(archive, cfg['universe'] or None, cfg['lookback_days'])
+    if panel is None:
+        return pd.DataFrame(), 0
+    metrics = compute_metrics(panel, prices)
+    return screen(metrics, cfg), len(metrics)
+
+def write_symbols(config_path: str, symbols):
+    """Replace trading.symbols with the screener result (strategies fall back to trading.strategy)"""
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    config['trading']['symbols'] = list(symbols)
+    with open(config_path, 'w') as f:
+        yaml.safe_dump(config, f)
+    return config
+
+async def backfill(ib, archive, symbols, lookback_days: int = 45, history_cfg: dict = None):
+    """Bring the archive's daily bars up to date for a universe, within IB pacing limits"""
+    from ib_insync import Stock
+    from bot.history import HistoricalDataPacer
+    history_cfg = history_cfg or {}
+    pacer = HistoricalDataPacer(
+        ib,
+        max_concurrent=history_cfg.get('max_concurrent', 50),
+        max_requests=history_cfg.get('max_requests', 0),
+        window=history_cfg.get('window_s', 600))
+
+    async def one(symbol):
+        duration = archive.missing_duration(symbol, '1 day', lookback_days)
+        bars = await pacer.request(
+            Stock(symbol, 'SMART', 'USD'), endDateTime='', durationStr=duration,
+            barSizeSetting='1 day', whatToShow='TRADES', useRTH=True)
+        archive.store(symbol, '1 day', bars)
+
+    results = await asyncio.gather(*(one(s) for s in symbols), return_exceptions=True)
+    failed = [s for s, r in zip(symbols, results) if isinstance(r, Exception)]
+    if failed:
+        logger.warning(f"Backfill failed for {len(failed)} symbols: {', '.join(failed[:20])}")
+    return len(symbols) - len(failed)
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+    from bot.bar_archive import BarArchive
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config_path = os.path.join(base_dir, "config.yaml")
+    parser = argparse.ArgumentParser(description="Pre-market screener over the local daily bar archive")
+    parser.add_argument("--backfill", metavar="FILE", help="update daily bars for the tickers in FILE (one per line) from IB first")
+    parser.add_argument("--top", type=int, help="override screener.top_n")
+    parser.add_argument("--write", action="store_true", help="write the result into trading.symbols")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+    archive = BarArchive.from_config(config, base_dir)
+    if archive is None:
+        raise SystemExit("Bar archive is disabled (archive.enabled)")
+
+    if args.backfill:
+        from ib_insync import IB
+        with open(args.backfill) as f:
+            universe = [line.strip().upper() for line in f if line.strip() and not line.startswith('#')]
+        ib = IB()
+        ibkr = config.get('ibkr', {})
+        ib.connect(ibkr.get('host', '127.0.0.1'), ibkr.get('port', 7497), clientId=97)
+        try:
+            done = ib.run(backfill(ib, archive, universe, screener_config(config)['lookback_days'], config.get('history')))
+            print(f"Backfilled {done}/{len(universe)} symbols")
+        finally:
+            ib.disconnect()
+
+    if args.top:
+        config.setdefault('screener', {})['top_n'] = args.top
+    # Pre-market prices from the running bot, when available, feed the gap filter
+    prices = {}
+    try:
+        with open(os.path.join(base_dir, "bot_state.json")) as f:
+            prices = {k: v['last_price'] for k, v in json.load(f).items()
+                      if not k.startswith('_') and ':' not in k and v.get('last_price')}
+    except (OSError, ValueError):
+        pass
+
+    t0 = time.perf_counter()
+    ranked, universe_size = run_screen(archive, config, prices)
+    print(f"Screened {universe_size} symbols in {time.perf_counter() - t0:.2f}s")
+    print(ranked.round(2).to_string() if not ranked.empty else "No symbol passed the filters")
+    if args.write and not ranked.empty:
+        write_symbols(config_path, ranked.index)
+        print(f"trading.symbols <- {', '.join(ranked.index)}")
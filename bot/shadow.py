@@ -0,0 +1,191 @@
+import itertools
+import logging
+from datetime import datetime, timezone
+from ib_insync import MarketOrder, StopOrder, Execution, Fill, CommissionReport, Trade, OrderStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHADOW = {
+    'enabled': False,
+    'slippage_bps': 1.0,
+    'variants': [], # [{name, strategy, params: {...}, symbols: [...]}], empty symbols = every traded symbol
+}
+
+def shadow_config(config: dict):
+    return {**DEFAULT_SHADOW, **((config or {}).get('shadow') or {})}
+
+def shadow_variants(shadow_cfg: dict, symbol: str):
+    """Variants configured for a symbol: (variant name, base strategy name, parameter overrides)"""
+    if not shadow_cfg.get('enabled'):
+        return []
+    out = []
+    for spec in shadow_cfg.get('variants') or []:
+        symbols = spec.get('symbols') or []
+        if symbols and symbol not in symbols:
+            continue
+        base = spec.get('strategy', 'ORB_5min')
+        out.append((spec.get('name') or base, base, spec.get('params') or {}))
+    return out
+
+def shadow_key(symbol: str, variant: str):
+    return f"{symbol}~{variant}"
+
+class ArchiveOnlyHistory:
+    """History source for shadow variants: never sends a request to IB.
+
+    The live strategies keep the bar archive current, so BaseStrategy.load_history
+    reads everything a variant needs from it.
+    """
+    async def request(self, contract, **kwargs):
+        return []
+
+class _SimOrder:
+    __slots__ = ("strategy", "contract", "order", "leg", "active")
+
+    def __init__(self, strategy, contract, order, leg, active):
+        self.strategy = strategy
+        self.contract = contract
+        self.order = order
+        self.leg = leg
+        self.active = active
+
+class FillSimulator:
+    """Local stand-in for OrderManager used by shadow strategies: orders never reach IB.
+
+    Market orders fill at the next trade price, stops trigger when the price
+    crosses them; both with `slippage_bps` against the order. Bracket children
+    only become active once their parent filled, as at IB. Fills are delivered
+    through the strategies' on_order_status / on_fill, so variants run the same
+    code paths as the live strategy.
+    """
+    def __init__(self, slippage_bps: float = 1.0):
+        self.slippage = slippage_bps / 10000.0
+        self.working = {}   # symbol -> [_SimOrder]
+        self.children = {}  # parent orderId -> [_SimOrder]
+        self._ids = itertools.count(-1, -1) # negative ids can't collide with IB's
+        self._exec_ids = itertools.count(1)
+        self.fills = 0
+
+    def configure(self, shadow_cfg: dict):
+        self.slippage = float(shadow_cfg.get('slippage_bps', 1.0)) / 10000.0
+
+    def place(self, strategy, contract, order, leg: str):
+        self._register(strategy, contract, order, leg)
+        return order
+
+    def place_bracket(self, strategy, contract, side: str, quantity: int, stop_price: float):
+        parent = MarketOrder(side, quantity)
+        self._register(strategy, contract, parent, 'entry')
+        stop_order = StopOrder('SELL' if side == 'BUY' else 'BUY', quantity, stop_price)
+        stop_order.parentId = parent.orderId
+        self._register(strategy, contract, stop_order, 'stop')
+        return parent, stop_order
+
+    def modify(self, contract, order):
+        pass # working orders are held by reference: changed fields apply from the next price
+
+    def cancel(self, order):
+        for orders in self.working.values():
+            for sim in orders:
+                if sim.order is order:
+                    orders.remove(sim)
+                    self._status(sim, 'Cancelled')
+                    for child in self.children.pop(order.orderId, []):
+                        if child in orders:
+                            orders.remove(child)
+                            self._status(child, 'Cancelled')
+                    return
+
+    def open_orders(self):
+        return sum(len(orders) for orders in self.working.values())
+
+    def remove_strategy(self, strategy):
+        """Drop the working orders of a variant being removed"""
+        for symbol, orders in self.working.items():
+            self.working[symbol] = [sim for sim in orders if sim.strategy is not strategy]
+
+    def _register(self, strategy, contract, order, leg: str):
+        if not order.orderId:
+            order.orderId = next(self._ids)
+        sim = _SimOrder(strategy, contract, order, leg, active=not order.parentId)
+        self.working.setdefault(contract.symbol, []).append(sim)
+        if order.parentId:
+            self.children.setdefault(order.parentId, []).append(sim)
+        self._status(sim, 'Submitted')
+
+    def on_price(self, symbol: str, price: float):
+        """Match the symbol's working orders against a new trade price"""
+        orders = self.working.get(symbol)
+        if not orders or price != price or price <= 0:
+            return
+        for sim in list(orders):
+            if not sim.active or sim not in orders:
+                continue
+            fill_price = self._match(sim.order, price)
+            if fill_price is not None:
+                orders.remove(sim)
+                self._fill(sim, fill_price)
+
+    def _match(self, order, price: float):
+        buy = order.action == 'BUY'
+        slipped = price * (1 + self.slippage) if buy else price * (1 - self.slippage)
+        if order.orderType == 'MKT':
+            return slipped
+        if order.orderType == 'STP':
+            triggered = price >= order.auxPrice if buy else price <= order.auxPrice
+            return slipped if triggered else None
+        if order.orderType == 'LMT':
+            marketable = price <= order.lmtPrice if buy else price >= order.lmtPrice
+            return (min(price, order.lmtPrice) if buy else max(price, order.lmtPrice)) if marketable else None
+        return None
+
+    def _fill(self, sim, price: float):
+        now = datetime.now(timezone.utc)
+        order = sim.order
+        execution = Execution(
+            execId=f"sim-{next(self._exec_ids)}", time=now, orderId=order.orderId,
+            side='BOT' if order.action == 'BUY' else 'SLD', shares=order.totalQuantity, price=price)
+        self.fills += 1
+        for child in self.children.pop(order.orderId, []):
+            child.active = True
+        self._status(sim, 'Filled', filled=order.totalQuantity, price=price)
+        try:
+            sim.strategy.on_fill(sim.leg, Fill(sim.contract, execution, CommissionReport(), now))
+        except Exception as e:
+            logger.error(f"Error in shadow fill for {sim.strategy.key}: {e}", extra={"symbol": sim.contract.symbol})
+
+    def _status(self, sim, status: str, filled: float = 0.0, price: float = 0.0):
+        trade = Trade(contract=sim.contract, order=sim.order, orderStatus=OrderStatus(
+            orderId=sim.order.orderId, status=status, filled=filled,
+            remaining=sim.order.totalQuantity - filled, avgFillPrice=price))
+        try:
+            sim.strategy.on_order_status(sim.leg, trade)
+        except Exception as e:
+            logger.error(f"Error in shadow order status for {sim.strategy.key}: {e}", extra={"symbol": sim.contract.symbol})
+
+def shadow_summary(shadows: dict, live_strategies: dict):
+    """Rows comparing every variant's P&L with the live strategy it derives from (same symbol and base strategy).
+
+    `shadows` maps variant key -> (base strategy name, strategy instance).
+    """
+    def pnl(state):
+        unrealized = (state.last_price - state.entry_price) * state.position if state.position and state.entry_price else 0.0
+        return state.realized_pnl + unrealized
+
+    live_pnl = {}
+    for strategy in live_strategies.values():
+        live_pnl[(strategy.symbol, strategy.name)] = pnl(strategy.state)
+
+    rows = []
+    for key, (base, strategy) in shadows.items():
+        state = strategy.state
+        total = pnl(state)
+        live = live_pnl.get((strategy.symbol, base))
+        rows.append({
+            "key": key, "symbol": strategy.symbol, "variant": strategy.name, "strategy": base,
+            "status": state.status, "position": state.position,
+            "realized_pnl": round(state.realized_pnl, 2), "pnl": round(total, 2),
+            "live_pnl": round(live, 2) if live is not None else None,
+            "vs_live": round(total - live, 2) if live is not None else None,
+        })
+    return rows
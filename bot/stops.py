@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STOPS = {
+    'enabled': False,
+    'interval_s': 10.0,     # at most one modify per stop order per interval
+    'breakeven_r': 0.0,     # stop to the entry price once a bar closes this many R in favour (0 = off)
+    'trail_atr': 0.0,       # trail the stop this many ATR behind the best high/low since entry (0 = off)
+    'trail_after_r': 0.0,   # start trailing once a bar closes this many R in favour
+    'eod_exit_minutes': 0,  # flatten this many minutes before the session close (0 = off)
+}
+
+FINAL_STATES = {'Filled', 'Cancelled', 'ApiCancelled', 'Inactive'}
+
+def stops_config(config: dict):
+    return {**DEFAULT_STOPS, **((config or {}).get('stops') or {})}
+
+class _Tracked:
+    __slots__ = ("order_id", "entry", "risk", "extreme")
+
+    def __init__(self, order_id: int, entry: float, risk: float):
+        self.order_id = order_id
+        self.entry = entry
+        self.risk = risk      # initial stop distance (1R)
+        self.extreme = entry  # best high (long) / low (short) since entry
+
+class StopManager:
+    """Moves protective stops by rule on each closed bar and sends the changes coalesced.
+
+    Price rules run per open position when a 1 min bar closes; the end-of-day
+    exit is a scheduler job at a fixed time before the close. A new stop price
+    replaces the one still pending for the same order (latest wins), and each
+    order gets at most one modify per `interval_s`, so trailing many positions
+    costs one amendment per order per interval however often the rules fire.
+    Rules come from the `stops` config section; a strategy's risk config can
+    override them under a `stops` key (per-strategy risk or shadow variant params).
+    """
+    def __init__(self, stops_cfg: dict = None):
+        self.tracked = {}   # strategy key -> _Tracked
+        self.pending = {}   # stop orderId -> (strategy, new stop price)
+        self.last_sent = {} # stop orderId -> monotonic time of its last modify
+        self.sent = 0
+        self.coalesced = 0
+        self.metrics = None # BotMetrics, set by the bot
+        self._flush_handle = None
+        self.configure(stops_cfg or {})
+
+    def configure(self, stops_cfg: dict):
+        self.cfg = {**DEFAULT_STOPS, **stops_cfg}
+        self.enabled = bool(self.cfg['enabled'])
+        self.interval = float(self.cfg['interval_s'])
+
+    def rules(self, strategy):
+        return {**self.cfg, **(strategy.risk_config.get('stops') or {})}
+
+    def on_bar_close(self, strategies, bars):
+        """Evaluate the rules of every strategy holding a position against the bar that just closed"""
+        if not self.enabled or len(bars) < 2:
+            return
+        bar = bars[-2] # the last bar of a keepUpToDate list is still forming
+        for strategy in strategies:
+            try:
+                self.evaluate(strategy, bar)
+            except Exception as e:
+                logger.error(f"Error evaluating stop rules for {strategy.key}: {e}", extra={"symbol": strategy.symbol})
+        if self.pending:
+            self._schedule()
+
+    def evaluate(self, strategy, bar):
+        state = strategy.state
+        if not state.position or not state.entry_price:
+            self.tracked.pop(strategy.key, None)
+            return
+        stop = strategy.stop_order
+        if stop is None or state.stop_status in FINAL_STATES or strategy.exit_pending:
+            return
+        rules = self.rules(strategy)
+        track = self.tracked.get(strategy.key)
+        if track is None or track.order_id != stop.orderId:
+            track = self.tracked[strategy.key] = _Tracked(stop.orderId, state.entry_price, abs(state.entry_price - stop.auxPrice))
+
+        long = state.position > 0
+        track.extreme = max(track.extreme, bar.high) if long else min(track.extreme, bar.low)
+        gain = (bar.close - track.entry) if long else (track.entry - bar.close)
+        gain_r = gain / track.risk if track.risk > 0 else 0.0
+
+        candidates = []
+        if rules['breakeven_r'] and gain_r >= rules['breakeven_r']:
+            candidates.append(track.entry)
+        if rules['trail_atr'] and state.atr and gain_r >= rules['trail_after_r']:
+            offset = rules['trail_atr'] * state.atr
+            candidates.append(track.extreme - offset if long else track.extreme + offset)
+        if not candidates:
+            return
+
+        new_stop = round(max(candidates) if long else min(candidates), 2)
+        current = self.pending[stop.orderId][1] if stop.orderId in self.pending else stop.auxPrice
+        # Stops only tighten, and never to the wrong side of the market
+        if long and not (current < new_stop < bar.close):
+            return
+        if not long and not (bar.close < new_stop < current):
+            return
+        if stop.orderId in self.pending:
+            self.coalesced += 1
+            if self.metrics:
+                self.metrics.stop_coalesced.inc()
+        self.pending[stop.orderId] = (strategy, new_stop)
+
+    def schedule(self, strategy, scheduler):
+        """(Re)register a strategy's end-of-day exit: eod_exit_minutes before every session close"""
+        minutes = self.rules(strategy)['eod_exit_minutes']
+        key = (strategy.key, 'eod_exit')
+        if self.enabled and minutes:
+            scheduler.daily('close', -timedelta(minutes=minutes), lambda: self.end_of_day(strategy), key)
+        else:
+            scheduler.cancel(key)
+
+    def end_of_day(self, strategy):
+        if not strategy.state.position or strategy.exit_pending:
+            return
+        if strategy.stop_order is not None:
+            self.pending.pop(strategy.stop_order.orderId, None)
+        strategy.exit_position("EOD exit")
+
+    def _schedule(self):
+        if self._flush_handle is not None:
+            return
+        now = time.monotonic()
+        due = min(self.last_sent.get(order_id, -self.interval) + self.interval for order_id in self.pending)
+        self._flush_handle = asyncio.get_running_loop().call_later(max(0.0, due - now), self.flush)
+
+    def flush(self):
+        """Send the pending stops whose order is out of its interval; the rest wait for the next flush"""
+        self._flush_handle = None
+        now = time.monotonic()
+        for order_id, (strategy, price) in list(self.pending.items()):
+            if now - self.last_sent.get(order_id, -self.interval) < self.interval:
+                continue
+            del self.pending[order_id]
+            stop = strategy.stop_order
+            if stop is None or stop.orderId != order_id or strategy.state.stop_status in FINAL_STATES:
+                continue
+            try:
+                strategy.modify_stop(price)
+            except Exception as e:
+                logger.error(f"Error modifying stop {order_id} for {strategy.key}: {e}", extra={"symbol": strategy.symbol})
+                continue
+            self.last_sent[order_id] = now
+            self.sent += 1
+            if self.metrics:
+                self.metrics.stop_modifies.inc()
+        # Orders out of their interval need no timestamp any more
+        for order_id, sent_at in list(self.last_sent.items()):
+            if now - sent_at >= self.interval and order_id not in self.pending:
+                del self.last_sent[order_id]
+        if self.pending:
+            self._schedule()
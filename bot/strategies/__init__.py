@@ -1 +1,58 @@
-# Init file for strategies package
+# Strategy plugin registry: name -> "module:Class", imported the first time a strategy is used.
+# Extra strategies can be added with register() or an installed package's
+# 'bot_ibkr.strategies' entry points (name = "package.module:Class").
+import importlib
+import logging
+from bot.config import DEFAULT_STRATEGY
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'bot_ibkr.strategies'
+
+_registry = {
+    'ORB_5min': 'bot.strategies.orb_5min:ORB5MinStrategy',
+    'VWAP_1min': 'bot.strategies.vwap_1min:VWAP1MinStrategy',
+    'Monitor_Only': 'bot.strategies.monitor_only:MonitorOnlyStrategy',
+}
+_loaded = {}          # name -> class, after the first import
+_entry_points = None  # name -> entry point, scanned on first need
+
+def register(name: str, target):
+    """Add a strategy: a BaseStrategy subclass or its "module:Class" path"""
+    _registry[name] = target
+    _loaded.pop(name, None)
+
+def _plugins():
+    global _entry_points
+    if _entry_points is None:
+        _entry_points = {}
+        try:
+            from importlib.metadata import entry_points
+            for ep in entry_points(group=ENTRY_POINT_GROUP):
+                _entry_points[ep.name] = ep
+        except Exception as e:
+            logger.warning(f"Could not scan strategy plugins: {e}")
+    return _entry_points
+
+def available():
+    """Every strategy name that can be configured (built-in, registered and installed plugins)"""
+    return list(_registry) + [name for name in _plugins() if name not in _registry]
+
+def get_strategy(name: str):
+    """Strategy class for a configured name; unknown names fall back to the default strategy"""
+    cls = _loaded.get(name)
+    if cls is not None:
+        return cls
+    target = _registry.get(name)
+    if target is None and name in _plugins():
+        cls = _plugins()[name].load()
+    elif isinstance(target, str):
+        module_name, _, class_name = target.partition(':')
+        cls = getattr(importlib.import_module(module_name), class_name)
+    elif target is not None:
+        cls = target
+    else:
+        logger.warning(f"Unknown strategy {name}, using {DEFAULT_STRATEGY}")
+        return get_strategy(DEFAULT_STRATEGY)
+    _loaded[name] = cls
+    return cls
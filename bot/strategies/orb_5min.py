@@ -1,32 +1,98 @@
 from bot.strategy import BaseStrategy
 from bot.models import ORBLevels
-from ib_insync import MarketOrder, StopOrder
+from bot.market_calendar import NYSE
+from datetime import timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
 class ORB5MinStrategy(BaseStrategy):
+    """Opening range breakout. The range is folded incrementally from the shared 1 min bar stream."""
+    ORB_WINDOWS = (1, 5, 15, 30)
+    ARM_GRACE = timedelta(seconds=10) # IB updates the forming bar about every 5 s: wait for the window's last update
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        minutes = int(self.risk_config.get('orb_window_minutes', 5))
+        if minutes not in self.ORB_WINDOWS:
+            logger.warning(f"Unsupported ORB window {minutes} min for {self.symbol}, using 5")
+            minutes = 5
+        self.orb_window = timedelta(minutes=minutes)
+        self.range_session = None # session day the range is being built for
+        self._stream = None       # bar list being scanned (replaced on resubscription)
+        self._scanned = 0         # bars of the stream already folded into the range
+        self._range = None        # ORBLevels under construction
+
     async def initialize(self):
         await super().initialize() # ATR(14) calculation
-        # Fetch today's 5min bars
-        bars = await self.ib.reqHistoricalDataAsync(
-            self.contract, endDateTime='', durationStr='1 D',
-            barSizeSetting='5 mins', whatToShow='TRADES', useRTH=True)
-        
-        if not bars:
+        # Levels come from the live 1 min stream, see build_range
+
+    def register_jobs(self, scheduler):
+        super().register_jobs(scheduler)
+        # Arm after the window even if no trade prints the next bar (illiquid names)
+        scheduler.daily('open', self.orb_window + self.ARM_GRACE, self.arm_range, key=(self.key, 'orb_arm'))
+
+    def arm_range(self):
+        if self.state.status == "WAITING_FOR_ORB" and self._stream is not None:
+            self.build_range(self._stream)
+
+    def build_range(self, bars):
+        """Fold closed 1 min bars of the opening window into the range; arm once the window is over.
+
+        The last bar of a keepUpToDate list is still forming, so it is only folded
+        once a newer bar arrived, or ARM_GRACE after the window (the arm job) when
+        no trade printed the next bar.
+        """
+        session = NYSE.session()
+        now = NYSE.now()
+        if session is None or not bars or now >= session.close:
             return
+        if self.range_session != session.day or self._stream is not bars or len(bars) < self._scanned:
+            self.range_session, self._stream, self._scanned, self._range = session.day, bars, 0, None
+
+        start, end = session.open, session.open + self.orb_window
+        window_over = now >= end + self.ARM_GRACE
+        while self._scanned < (len(bars) if window_over else len(bars) - 1):
+            bar = bars[self._scanned]
+            bar_time = NYSE.to_ny(bar.date)
+            if bar_time >= end:
+                break
+            if bar_time >= start:
+                if self._range is None:
+                    self._range = ORBLevels(high=bar.high, low=bar.low, open=bar.open, close=bar.close,
+                                            candle_time=bar.date.isoformat())
+                else:
+                    self._range.high = max(self._range.high, bar.high)
+                    self._range.low = min(self._range.low, bar.low)
+                    self._range.close = bar.close
+            self._scanned += 1
+
+        window_closed = window_over or (self._scanned < len(bars) and NYSE.to_ny(bars[self._scanned].date) >= end)
+        if window_closed and self._range is not None:
+            self.state.levels = self._range
+            self.state.status = "MONITORING"
+            minutes = int(self.orb_window.total_seconds() // 60)
+            self.add_log(f"ORB Levels set ({minutes} min): High={self.state.levels.high}, Low={self.state.levels.low}")
 
-        # The first bar of the day (Retail Trading Hours)
-        first_bar = bars[0]
-        self.state.levels = ORBLevels(
-            high=first_bar.high, 
-            low=first_bar.low, 
-            open=first_bar.open,
-            close=first_bar.close,
-            candle_time=first_bar.date.isoformat() if hasattr(first_bar.date, 'isoformat') else str(first_bar.date)
-        )
-        self.state.status = "MONITORING"
-        self.add_log(f"ORB Levels set: High={self.state.levels.high}, Low={self.state.levels.low}")
+    async def on_session_start(self, session):
+        # New session: yesterday's range no longer applies unless a trade is in progress
+        self.disarm()
+
+    async def on_session_end(self, session):
+        # Disarm at the close: a pre-market print above today's high must not trigger tomorrow
+        self.disarm()
+        await super().on_session_end(session)
+
+    def disarm(self):
+        """Drop the range under construction; a flat strategy waits for the next opening range"""
+        self.range_session, self._stream, self._scanned, self._range = None, None, 0, None
+        if self.reset_session():
+            self.state.status = "WAITING_FOR_ORB"
+
+    def trigger_levels(self):
+        if self.state.status == "MONITORING" and self.state.levels:
+            return (self.state.levels.high,)
+        return ()
 
     def on_ticker_update(self, last_price: float, ticker):
         if self.state.status == "MONITORING" and self.state.levels:
@@ -35,22 +101,22 @@ class ORB5MinStrategy(BaseStrategy):
 
     async def on_bar_update(self, bars, has_new_bar: bool):
         await super().on_bar_update(bars, has_new_bar) # Handles ATR refresh
+        if self.state.status == "WAITING_FOR_ORB":
+            self.build_range(bars)
 
     def execute_entry(self, price: float):
-        self.state.status = "IN_TRADE"
-        self.state.entry_price = price
+        if not self.entry_allowed():
+            return
         raw_stop = self.state.levels.low
-        self.state.stop_loss = self.get_capped_stop(price, raw_stop)
+        stop_loss = self.get_capped_stop(price, raw_stop)
         
-        stop_dist = abs(price - self.state.stop_loss)
+        stop_dist = abs(price - stop_loss)
         quantity = self.calculate_quantity(stop_dist, self.risk_config)
+        if not self.check_risk_limits(quantity, price, stop_loss):
+            return # still MONITORING: the next breakout print re-checks once the hold is over
         
-        parent = MarketOrder('BUY', quantity)
-        stop_order = StopOrder('SELL', quantity, self.state.stop_loss)
-        stop_order.parentId = parent.orderId
-        stop_order.transmit = True
-        
-        self.ib.placeOrder(self.contract, parent)
-        self.ib.placeOrder(self.contract, stop_order)
+        self.state.entry_price = price
+        self.state.stop_loss = stop_loss
+        self.place_bracket('BUY', quantity, self.state.stop_loss, price)
         
         self.add_log(f"Entry BUY at {price}. Stop Loss at {self.state.stop_loss}")
@@ -1,5 +1,5 @@
 from bot.strategy import BaseStrategy
-from ib_insync import MarketOrder, StopOrder
+from bot.market_calendar import NYSE
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,15 +16,19 @@ class VWAP1MinStrategy(BaseStrategy):
     async def initialize(self):
         await super().initialize() # ATR(14)
         # Fetch today's 1min bars to catch up with VWAP
-        bars = await self.ib.reqHistoricalDataAsync(
-            self.contract, endDateTime='', durationStr='1 D',
-            barSizeSetting='1 min', whatToShow='TRADES', useRTH=True)
+        bars = await self.load_history('1 min', 1)
         
         if bars:
             await self.on_bar_update(bars, has_new_bar=False)
             self.add_log(f"Initialized VWAP: {self.vwap:.2f} using {len(bars)} previous bars.")
         
-        self.state.status = "MONITORING" if self.state.status == "WAITING_FOR_ORB" else self.state.status
+        if self.state.status == "WAITING_FOR_ORB":
+            self.state.status = "MONITORING" if NYSE.is_open() else "WAITING_FOR_OPEN"
+
+    def trigger_levels(self):
+        if self.state.status == "MONITORING" and self.signal_candle_high:
+            return (self.signal_candle_high,)
+        return ()
 
     def on_ticker_update(self, last_price: float, ticker):
         if self.state.status == "MONITORING" and self.signal_candle_high:
@@ -35,11 +39,15 @@ class VWAP1MinStrategy(BaseStrategy):
         await super().on_bar_update(bars, has_new_bar)
         if not bars: return
 
-        # Recalculate daily VWAP
+        # Recalculate the session VWAP: the shared stream runs across sessions, so only
+        # the bars of the last bar's day count
         self.vwap_sum_pv = 0.0
         self.vwap_sum_vol = 0
         
-        for bar in bars:
+        day = NYSE.to_ny(bars[-1].date).date()
+        for bar in reversed(bars):
+            if NYSE.to_ny(bar.date).date() != day:
+                break
             self.vwap_sum_pv += bar.average * bar.volume
             self.vwap_sum_vol += bar.volume
         
@@ -48,27 +56,45 @@ class VWAP1MinStrategy(BaseStrategy):
 
         # Check for signal: Close above VWAP
         last_bar = bars[-1]
-        if self.state.status == "MONITORING" and not self.signal_candle_high:
+        if self.state.status == "MONITORING" and not self.signal_candle_high and self.vwap_sum_vol > 0:
             if last_bar.close > self.vwap:
                 self.signal_candle_high = last_bar.high
                 self.signal_candle_low = last_bar.low
                 self.add_log(f"Signal Candle Found! Close ({last_bar.close:.2f}) > VWAP ({self.vwap:.2f}). Monitoring high: {self.signal_candle_high}")
 
+    async def on_session_start(self, session):
+        self.reset_vwap()
+        if self.reset_session():
+            self.state.status = "MONITORING"
+
+    async def on_session_end(self, session):
+        # Disarm at the close: today's signal candle must not trigger before the next open
+        self.reset_vwap()
+        if self.reset_session():
+            self.state.status = "WAITING_FOR_OPEN"
+        await super().on_session_end(session)
+
+    def reset_vwap(self):
+        """VWAP and the signal candle are per session"""
+        self.vwap_sum_pv = 0.0
+        self.vwap_sum_vol = 0
+        self.vwap = 0.0
+        self.signal_candle_high = None
+        self.signal_candle_low = None
+
     def execute_entry(self, price: float):
-        self.state.status = "IN_TRADE"
-        self.state.entry_price = price
+        if not self.entry_allowed():
+            return
         raw_stop = self.signal_candle_low # Stop at low of signal candle
-        self.state.stop_loss = self.get_capped_stop(price, raw_stop)
+        stop_loss = self.get_capped_stop(price, raw_stop)
         
-        stop_dist = abs(price - self.state.stop_loss)
+        stop_dist = abs(price - stop_loss)
         quantity = self.calculate_quantity(stop_dist, self.risk_config)
+        if not self.check_risk_limits(quantity, price, stop_loss):
+            return # still MONITORING: the next breakout print re-checks once the hold is over
         
-        parent = MarketOrder('BUY', quantity)
-        stop_order = StopOrder('SELL', quantity, self.state.stop_loss)
-        stop_order.parentId = parent.orderId
-        stop_order.transmit = True
-        
-        self.ib.placeOrder(self.contract, parent)
-        self.ib.placeOrder(self.contract, stop_order)
+        self.state.entry_price = price
+        self.state.stop_loss = stop_loss
+        self.place_bracket('BUY', quantity, self.state.stop_loss, price)
         
         self.add_log(f"VWAP Breakout Entry at {price}. Stop Loss at {self.state.stop_loss}")
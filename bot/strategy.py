@@ -1,31 +1,66 @@
 from abc import ABC, abstractmethod
-import time
+import sqlite3
 from bot.models import TradeState
-from ib_insync import IB, Stock
-from bot.ui_utils import calc_quantity, calculate_capped_stop
+from ib_insync import IB, Stock, MarketOrder, StopOrder
+from bot.market_calendar import NYSE
+from bot.risk import calc_quantity, calculate_capped_stop, live_equity_config
 
 class BaseStrategy(ABC):
+    RISK_RETRY_S = 30 # a signal blocked by the account limits is re-checked at most this often
+
     def __init__(self, ib: IB, state: TradeState, risk_config: dict = None):
         self.ib = ib
         self.state = state
         self.risk_config = risk_config or {}
         self.symbol = state.symbol
         self.contract = Stock(self.symbol, 'SMART', 'USD')
-        self.last_atr_update = 0
+        self.key = state.symbol  # state key, set by the bot when several strategies share a symbol
+        self.name = None         # configured strategy name (e.g. ORB_5min), set by the bot
+        self.portfolio = None    # PortfolioAggregator, set by the bot
+        self.account = None      # AccountCache (live NetLiquidation for sizing), set by the bot
+        self.orders = None       # OrderManager, set by the bot
+        self.history = None      # HistoricalDataPacer, set by the bot
+        self.archive = None      # BarArchive, set by the bot
+        self.atr_fallback = None # callable giving the ATR when no daily history is available (shadows), set by the bot
+        self.stop_order = None   # working protective stop, moved by the StopManager
+        self.exit_pending = False # flatten requested: the exit goes out once the stop is cancelled
+        self.blocked_until = 0.0  # session-clock time before which a risk-blocked signal is ignored
+        self.retired = False      # removed from the config: manages its open trade, takes no new entries
+        self.scheduler = None    # Scheduler, set through register_jobs
 
     async def initialize(self):
         """Initial data fetching like ORB levels or historical ATR"""
         await self.update_atr()
 
+    async def request_history(self, **kwargs):
+        """Historical bars for this contract, paced through the bot's request queue when available"""
+        if self.history:
+            return await self.history.request(self.contract, **kwargs)
+        return await self.ib.reqHistoricalDataAsync(self.contract, **kwargs)
+
+    async def load_history(self, bar_size: str, days: int):
+        """TRADES/RTH bars for the last `days`: read from the local archive, only the missing tail requested from IB"""
+        if self.archive:
+            try:
+                duration = self.archive.missing_duration(self.symbol, bar_size, days)
+                bars = await self.request_history(
+                    endDateTime='', durationStr=duration,
+                    barSizeSetting=bar_size, whatToShow='TRADES', useRTH=True)
+                self.archive.store(self.symbol, bar_size, bars)
+                return self.archive.load_recent(self.symbol, bar_size, days)
+            except sqlite3.Error as e:
+                self.add_log(f"Bar archive error ({e}), requesting {bar_size} bars from IB")
+        return await self.request_history(
+            endDateTime='', durationStr=f'{days} D',
+            barSizeSetting=bar_size, whatToShow='TRADES', useRTH=True)
+
     async def update_atr(self):
         """Fetch 14 days of daily bars to calculate ATR(14)"""
         try:
-            bars = await self.ib.reqHistoricalDataAsync(
-                self.contract, endDateTime='', durationStr='30 D',
-                barSizeSetting='1 day', whatToShow='TRADES', useRTH=True)
+            bars = await self.load_history('1 day', 30)
             
             if len(bars) < 15:
-                self.state.atr = 0.0
+                self.state.atr = self.atr_fallback() if self.atr_fallback else 0.0
                 return
 
             # Simple ATR calculation
@@ -48,11 +83,11 @@ class BaseStrategy(ABC):
             self.add_log(f"ATR(14) calculated: {self.state.atr:.2f}")
         except Exception as e:
             self.add_log(f"Error calculating ATR: {e}")
-        finally:
-            self.last_atr_update = time.time()
 
     def calculate_quantity(self, stop_distance: float, risk_config: dict):
         """Calculate quantity based on risk % and stop distance"""
+        if self.account:
+            risk_config = live_equity_config(risk_config, self.account.net_liquidation())
         final_qty = calc_quantity(stop_distance, risk_config)
         self.add_log(f"Calc Size: StopDist={stop_distance:.2f} -> Qty={final_qty}")
         return final_qty
@@ -68,6 +103,162 @@ class BaseStrategy(ABC):
             
         return capped_stop
 
+    def check_risk_limits(self, quantity: int, entry_price: float, stop_price: float):
+        """Account-level limits (daily max loss, max open risk) checked before any order goes out.
+
+        A blocked signal leaves the strategy armed: it is checked again after
+        RISK_RETRY_S, once risk may have freed up.
+        """
+        if not self.portfolio:
+            return True
+        allowed, reason = self.portfolio.check_entry(quantity, entry_price, stop_price)
+        if not allowed:
+            self.blocked_until = NYSE.now().timestamp() + self.RISK_RETRY_S
+            self.add_log(f"Entry blocked: {reason} (re-checking in {self.RISK_RETRY_S}s)")
+        return allowed
+
+    def entry_on_hold(self):
+        """True while a signal blocked by the account limits waits for its re-check"""
+        return self.blocked_until > 0 and NYSE.now().timestamp() < self.blocked_until
+
+    def entry_allowed(self):
+        """New entries may go out: regular hours, not retired and no risk-blocked signal on hold"""
+        return NYSE.is_open() and not self.retired and not self.entry_on_hold()
+
+    def sync_portfolio(self):
+        """Push this strategy's position into the portfolio aggregator"""
+        if self.portfolio:
+            self.portfolio.update_position(
+                self.key, self.symbol, self.state.position,
+                self.state.entry_price or 0.0, self.state.stop_loss or 0.0, self.state.last_price)
+
+    def place_bracket(self, side: str, quantity: int, stop_price: float, entry_price: float = None):
+        """Send a market entry with its protective stop through the order manager (rate-limited gateway).
+
+        With the expected `entry_price`, the entry's risk is reserved in the portfolio until it fills or fails.
+        """
+        self.state.status = "ENTRY_SUBMITTED"
+        if self.portfolio and entry_price:
+            self.portfolio.reserve_entry(self.key, quantity, entry_price, stop_price)
+        if self.orders:
+            parent, stop_order = self.orders.place_bracket(self, self.contract, side, quantity, stop_price)
+        else:
+            parent = MarketOrder(side, quantity)
+            parent.transmit = False
+            self.ib.placeOrder(self.contract, parent)
+            stop_order = StopOrder('SELL' if side == 'BUY' else 'BUY', quantity, stop_price)
+            stop_order.parentId = parent.orderId
+            stop_order.transmit = True
+            self.ib.placeOrder(self.contract, stop_order)
+        self.state.entry_order_id = parent.orderId
+        self.state.stop_order_id = stop_order.orderId
+        self.stop_order = stop_order
+        self.exit_pending = False
+        return parent, stop_order
+
+    def modify_stop(self, stop_price: float):
+        """Move the working protective stop (PROTECT lane, ahead of new entries)"""
+        old = self.stop_order.auxPrice
+        self.stop_order.auxPrice = stop_price
+        if self.orders:
+            self.orders.modify(self.contract, self.stop_order)
+        else:
+            self.ib.placeOrder(self.contract, self.stop_order)
+        self.state.stop_loss = stop_price
+        self.sync_portfolio()
+        self.add_log(f"Stop moved {old:.2f} -> {stop_price:.2f}")
+
+    def exit_position(self, reason: str):
+        """Flatten at market: the stop is cancelled first and the exit sent once IB confirms it"""
+        if not self.state.position or self.exit_pending:
+            return
+        self.exit_pending = True
+        self.add_log(f"{reason}: closing {self.state.position:+g}")
+        if self.stop_order is not None and self.state.stop_status not in ('Filled', 'Cancelled', 'ApiCancelled', 'Inactive'):
+            if self.orders:
+                self.orders.cancel(self.stop_order)
+            else:
+                self.ib.cancelOrder(self.stop_order)
+        else:
+            self._send_exit()
+
+    def _send_exit(self):
+        quantity = abs(self.state.position)
+        order = MarketOrder('SELL' if self.state.position > 0 else 'BUY', quantity)
+        if self.orders:
+            self.orders.place(self, self.contract, order, 'exit')
+        else:
+            self.ib.placeOrder(self.contract, order)
+
+    def on_order_status(self, leg: str, trade):
+        """Order status event for one of this strategy's orders"""
+        status = trade.orderStatus.status
+        if leg == 'entry':
+            self.state.entry_status = status
+            if self.portfolio and status in ('Filled', 'Cancelled', 'ApiCancelled', 'Inactive'):
+                self.portfolio.release_entry(self.key)
+            if status in ('Cancelled', 'ApiCancelled', 'Inactive') and self.state.position == 0:
+                self.state.status = "ENTRY_FAILED"
+                self.add_log(f"Entry order {trade.order.orderId} {status}")
+        elif leg == 'stop':
+            self.state.stop_status = status
+            if self.exit_pending and status in ('Cancelled', 'ApiCancelled', 'Inactive') and self.state.position:
+                self._send_exit()
+        elif leg == 'exit':
+            if status in ('Cancelled', 'ApiCancelled', 'Inactive'):
+                # The stop is already gone: put protection back so the position isn't left naked
+                self.exit_pending = False
+                self.add_log(f"Exit order {trade.order.orderId} {status}")
+                if self.state.position:
+                    self._replace_stop()
+
+    def _replace_stop(self):
+        """Re-place a stand-alone protective stop for the open position at the last stop price"""
+        if not self.state.stop_loss:
+            self.add_log(f"No stop price known: position {self.state.position:+g} left without a stop")
+            return
+        order = StopOrder('SELL' if self.state.position > 0 else 'BUY', abs(self.state.position), self.state.stop_loss)
+        if self.orders:
+            self.orders.place(self, self.contract, order, 'stop')
+        else:
+            self.ib.placeOrder(self.contract, order)
+        self.stop_order = order
+        self.state.stop_order_id = order.orderId
+        self.state.stop_status = ""
+        self.add_log(f"Protective stop re-placed at {self.state.stop_loss:.2f}")
+
+    def on_fill(self, leg: str, fill):
+        """Execution event for one of this strategy's orders"""
+        shares = fill.execution.shares
+        price = fill.execution.price
+        signed = shares if fill.execution.side == 'BOT' else -shares
+
+        if leg == 'entry':
+            # Weighted average across partial fills
+            prev_qty = self.state.position
+            prev_avg = self.state.entry_price if prev_qty else 0.0
+            self.state.position = prev_qty + signed
+            self.state.entry_price = (prev_avg * prev_qty + price * signed) / self.state.position
+            self.state.status = "IN_TRADE"
+            if self.portfolio:
+                self.portfolio.fill_entry(self.key, shares)
+            self.add_log(f"Entry fill: {signed:+g} @ {price:.2f} -> Pos={self.state.position} Avg={self.state.entry_price:.2f}")
+        else:
+            pnl = (price - self.state.entry_price) * -signed
+            self.state.position += signed
+            self.state.realized_pnl += pnl
+            if self.portfolio:
+                self.portfolio.record_realized(pnl)
+            self.add_log(f"{leg.capitalize()} fill: {signed:+g} @ {price:.2f} (P&L {pnl:+.2f}) -> Pos={self.state.position}")
+            if self.state.position == 0:
+                self.state.status = "CLOSED"
+                self.exit_pending = False
+        self.sync_portfolio()
+
+    def trigger_levels(self):
+        """Prices an entry is armed on right now; near one, the bot switches the symbol to tick-by-tick data"""
+        return ()
+
     @abstractmethod
     def on_ticker_update(self, last_price: float, ticker):
         """Real-time signal check"""
@@ -75,10 +266,47 @@ class BaseStrategy(ABC):
 
     @abstractmethod
     async def on_bar_update(self, bars, has_new_bar: bool):
-        """Periodic bar updates (1min, 5min etc)"""
-        # Periodic ATR Refresh (every 30 mins)
-        if time.time() - self.last_atr_update > 1800:
-            await self.update_atr()
+        """Periodic bar updates (1min, 5min etc); time-driven work runs from the scheduler, see register_jobs"""
+        pass
+
+    def register_jobs(self, scheduler):
+        """Time-driven work: intraday ATR refresh and pre-open warmup. Subclasses add theirs (call super)."""
+        self.scheduler = scheduler
+        scheduler.every(scheduler.atr_refresh, self.update_atr, key=(self.key, 'atr'), market_hours=True)
+        scheduler.daily('open', -scheduler.pre_open, self.on_pre_open, key=(self.key, 'pre_open'), spread=scheduler.spread)
+
+    async def on_pre_open(self):
+        """Warmup before the open (spread across symbols): ATR including the last complete daily bar"""
+        await self.update_atr()
+
+    async def on_session_start(self, session):
+        """Called by the bot when regular trading hours begin"""
+        pass
+
+    def reset_session(self):
+        """Forget the previous session's trade when flat, so the strategy can arm again.
+
+        Returns False (and changes nothing) while a position is open or being closed.
+        """
+        if self.state.position or self.exit_pending:
+            return False
+        if self.portfolio:
+            self.portfolio.release_entry(self.key)
+        self.state.levels = None
+        self.state.entry_price = self.state.stop_loss = None
+        self.state.entry_order_id = self.state.stop_order_id = None
+        self.state.entry_status = self.state.stop_status = ""
+        self.stop_order = None
+        self.blocked_until = 0.0
+        return True
+
+    async def on_session_end(self, session):
+        """End-of-day work: ATR from the now complete daily bar, ready for the next session.
+
+        Subclasses disarm flat strategies first (reset_session), so no level of
+        this session can trigger before the next open.
+        """
+        await self.update_atr()
 
     def add_log(self, message: str):
         self.state.add_log(message)
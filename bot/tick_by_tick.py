@@ -0,0 +1,150 @@
+import logging
+import time
+from ib_insync import IB
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TICK_BY_TICK = {
+    'enabled': False,
+    'tick_type': 'AllLast',  # 'AllLast' (every trade print) or 'BidAsk' (trigger on the midpoint)
+    'proximity_atr': 0.1,    # switch a symbol to tick-by-tick within this many ATR of an armed level
+    'release_atr': 0.25,     # and back to snapshots beyond this many (hysteresis)
+    'min_hold_s': 30,        # minimum time on tick-by-tick before releasing, against flapping
+    'max_symbols': 3,        # concurrent tick-by-tick subscriptions (IB's quota is small)
+}
+
+QUOTA_ERRORS = {10189, 10190} # tick-by-tick request refused / max number of tick-by-tick requests reached
+
+class TickByTickManager:
+    """Moves trigger-critical symbols from conflated snapshots to tick-by-tick data and back.
+
+    reqMktData's `last` is a ~250 ms snapshot, so a breakout can run past its
+    level before the strategy sees it. While a price is within `proximity_atr`
+    of a level a strategy is armed on (BaseStrategy.trigger_levels), the symbol
+    also gets reqTickByTickData on the same contract: ib_insync writes every
+    print into the feed's existing Ticker, so the strategies need no change.
+    At most `max_symbols` are held; a closer candidate takes the slot of the
+    farthest one.
+    """
+    def __init__(self, ib: IB, cfg: dict = None):
+        self.ib = ib
+        self.active = {}   # symbol -> [feed, tick type, since (monotonic), distance in ATR]
+        self.capacity = None # lowered when IB refuses a request for quota
+        self.metrics = None  # BotMetrics, set by the bot
+        self.configure(cfg or {})
+        ib.errorEvent += self.on_error
+
+    def configure(self, cfg: dict):
+        self.cfg = {**DEFAULT_TICK_BY_TICK, **cfg}
+        self.enabled = bool(self.cfg['enabled'])
+        self.tick_type = self.cfg['tick_type']
+        self.proximity = float(self.cfg['proximity_atr'])
+        self.release_at = float(self.cfg['release_atr'])
+        self.min_hold = float(self.cfg['min_hold_s'])
+        self.max_symbols = int(self.cfg['max_symbols'])
+        self.capacity = None
+        if not self.enabled:
+            self.release_all()
+        # A lowered max_symbols applies now: the farthest symbols go back to snapshots first
+        while len(self.active) > self.max_symbols:
+            self.release(max(self.active, key=lambda s: self.active[s][3]))
+
+    def detach(self):
+        self.ib.errorEvent -= self.on_error
+
+    @staticmethod
+    def distance(feed, price: float):
+        """Distance in ATR from the price to the nearest level a live strategy is armed on (inf if none)"""
+        nearest = float('inf')
+        for strategy in feed.strategies.values():
+            atr = strategy.state.atr
+            if atr <= 0:
+                continue
+            for level in strategy.trigger_levels():
+                nearest = min(nearest, abs(price - level) / atr)
+        return nearest
+
+    @staticmethod
+    def batch_high(ticker, price: float):
+        """Highest AllLast print of the ticker's batch (at least `price`).
+
+        ib_insync leaves only the batch's last print in ticker.last; the others are
+        in ticker.tickByTicks. Entries trigger on breakouts above a level, so a
+        print through it followed by a lower one in the same batch still counts.
+        """
+        for tick in ticker.tickByTicks or ():
+            if tick.price > price:
+                price = tick.price
+        return price
+
+    def on_price(self, feed, price: float, allow_new: bool = True):
+        """Called with each price handled for the feed; switches its data mode when needed"""
+        if not self.enabled or price != price or price <= 0:
+            return
+        distance = self.distance(feed, price)
+        held = self.active.get(feed.symbol)
+        if held is not None:
+            held[3] = distance
+            if distance > self.release_at and time.monotonic() - held[2] >= self.min_hold:
+                self.release(feed.symbol)
+        elif distance <= self.proximity and allow_new:
+            limit = min(self.max_symbols, self.capacity if self.capacity is not None else self.max_symbols)
+            if len(self.active) >= limit:
+                farthest = max(self.active, key=lambda s: self.active[s][3], default=None)
+                if farthest is None or self.active[farthest][3] <= distance:
+                    return
+                self.release(farthest)
+            self.acquire(feed, distance)
+
+    def acquire(self, feed, distance: float):
+        try:
+            self.ib.reqTickByTickData(feed.contract, self.tick_type)
+        except Exception as e:
+            logger.error(f"Error requesting tick-by-tick data for {feed.symbol}: {e}", extra={"symbol": feed.symbol})
+            return
+        self.active[feed.symbol] = [feed, self.tick_type, time.monotonic(), distance]
+        feed.tick_type = self.tick_type
+        if self.metrics:
+            self.metrics.tick_mode_switches.labels("tick_by_tick").inc()
+        logger.info(f"{feed.symbol}: tick-by-tick ({self.tick_type}), {distance:.2f} ATR from an armed level",
+                    extra={"symbol": feed.symbol})
+
+    def release(self, symbol: str):
+        held = self.active.pop(symbol, None)
+        if held is None:
+            return
+        feed, tick_type = held[0], held[1]
+        feed.tick_type = None
+        try:
+            if self.ib.isConnected():
+                self.ib.cancelTickByTickData(feed.contract, tick_type)
+        except Exception as e:
+            logger.error(f"Error cancelling tick-by-tick data for {symbol}: {e}", extra={"symbol": symbol})
+        if self.metrics:
+            self.metrics.tick_mode_switches.labels("snapshot").inc()
+        logger.info(f"{symbol}: back to snapshots", extra={"symbol": symbol})
+
+    def release_all(self):
+        for symbol in list(self.active):
+            self.release(symbol)
+
+    def resubscribe(self):
+        """Reopen the held subscriptions after a reconnect (TWS dropped them with the connection)"""
+        for symbol, held in self.active.items():
+            try:
+                self.ib.reqTickByTickData(held[0].contract, held[1])
+            except Exception as e:
+                logger.error(f"Error requesting tick-by-tick data for {symbol}: {e}", extra={"symbol": symbol})
+
+    def on_error(self, req_id, error_code, error_string, contract):
+        if error_code not in QUOTA_ERRORS or contract is None or contract.symbol not in self.active:
+            return
+        held = self.active.pop(contract.symbol)
+        held[0].tick_type = None
+        # Stay below what IB accepted until the config is reloaded
+        self.capacity = len(self.active)
+        logger.warning(f"{contract.symbol}: tick-by-tick refused ({error_code}: {error_string}), "
+                       f"holding at most {self.capacity} symbols", extra={"symbol": contract.symbol})
+
+    def symbols(self):
+        return sorted(self.active)
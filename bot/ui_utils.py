@@ -16,40 +16,22 @@ try:
     asyncio.get_event_loop()
 except RuntimeError:
     asyncio.set_event_loop(asyncio.new_event_loop())
-nest_asyncio.apply()
 
 from ib_insync import IB, Stock, MarketOrder, StopOrder
+from bot.bar_archive import BarArchive
+from bot.market_calendar import NYSE
 
-def calc_quantity(stop_distance: float, risk_config: dict):
-    """Calculate quantity based on risk % and stop distance"""
-    if stop_distance <= 0:
-        return 0
-        
-    equity = risk_config.get('account_equity', 100000)
-    risk_pct = risk_config.get('risk_per_trade_percent', 1.0) / 100.0
-    max_risk_usd = risk_config.get('max_risk_usd', 500)
-    
-    risk_amt = min(equity * risk_pct, max_risk_usd)
-    
-    quantity = int(risk_amt / stop_distance)
-    return max(1, quantity)
+def _ensure_nested_loop():
+    """The sync IB helpers below need a re-entrant loop inside Streamlit.
 
-def calculate_capped_stop(entry_price: float, raw_stop: float, side: str, atr: float, max_stop_atr: float):
-    """Apply ATR-based stop loss limit"""
-    if max_stop_atr <= 0 or atr <= 0:
-        return raw_stop
-
-    atr_limit_dist = atr * max_stop_atr
-    raw_dist = abs(entry_price - raw_stop)
-    
-    if raw_dist > atr_limit_dist:
-        capped_stop = entry_price - atr_limit_dist if side == 'BUY' else entry_price + atr_limit_dist
-        return round(capped_stop, 2)
-        
-    return round(raw_stop, 2)
+    Applied lazily so that importing this module (e.g. from the bot process)
+    doesn't patch the bot's event loop.
+    """
+    nest_asyncio.apply()
 
 def place_manual_order(symbol, quantity, order_type='MARKET', side='BUY', stop_price=None, transmit=True):
     """Sends a manual order to IBKR for testing"""
+    _ensure_nested_loop()
     config = load_config()
     ibkr_params = config.get('ibkr', {})
     
@@ -90,9 +72,42 @@ def place_manual_order(symbol, quantity, order_type='MARKET', side='BUY', stop_p
         if ib.isConnected():
             ib.disconnect()
 
+def _candle_dict(last, bar_size):
+    start_time = last.date
+
+    # Parse minutes from bar_size (e.g., '5 mins' -> 5)
+    try:
+        mins = int(bar_size.split()[0]) if 'min' in bar_size else 0
+        if 'day' in bar_size:
+            end_time = start_time + timedelta(days=1)
+        else:
+            end_time = start_time + timedelta(minutes=mins)
+    except:
+        end_time = start_time
+
+    return {
+        'high': last.high,
+        'low': last.low,
+        'open': last.open,
+        'close': last.close,
+        'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S') if hasattr(start_time, 'strftime') else str(start_time),
+        'end_time': end_time.strftime('%Y-%m-%d %H:%M:%S') if hasattr(end_time, 'strftime') else str(end_time)
+    }
+
 def fetch_last_candle(symbol, bar_size='5 mins'):
-    """Fetches the OHLC of the very last bar from IBKR"""
+    """OHLC of the very last bar: local bar archive first, IBKR only when it has nothing current"""
     config = load_config()
+    archive = None
+    try:
+        archive = BarArchive.from_config(config, SCRIPT_DIR)
+        last = archive.last_bar(symbol, bar_size) if archive else None
+        if last:
+            archive.close()
+            return _candle_dict(last, bar_size)
+    except Exception as e:
+        print(f"Error reading bar archive for {symbol}: {e}")
+
+    _ensure_nested_loop()
     ibkr_params = config.get('ibkr', {})
     
     ib = IB()
@@ -111,27 +126,9 @@ def fetch_last_candle(symbol, bar_size='5 mins'):
             barSizeSetting=bar_size, whatToShow='TRADES', useRTH=True)
         
         if bars:
-            last = bars[-1]
-            start_time = last.date
-            
-            # Parse minutes from bar_size (e.g., '5 mins' -> 5)
-            try:
-                mins = int(bar_size.split()[0]) if 'min' in bar_size else 0
-                if 'day' in bar_size:
-                    end_time = start_time + timedelta(days=1)
-                else:
-                    end_time = start_time + timedelta(minutes=mins)
-            except:
-                end_time = start_time
-
-            return {
-                'high': last.high,
-                'low': last.low,
-                'open': last.open,
-                'close': last.close,
-                'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S') if hasattr(start_time, 'strftime') else str(start_time),
-                'end_time': end_time.strftime('%Y-%m-%d %H:%M:%S') if hasattr(end_time, 'strftime') else str(end_time)
-            }
+            if archive:
+                archive.store(symbol, bar_size, bars)
+            return _candle_dict(bars[-1], bar_size)
         return None
     except Exception as e:
         print(f"Error fetching candle for {symbol}: {e}")
@@ -139,6 +136,8 @@ def fetch_last_candle(symbol, bar_size='5 mins'):
     finally:
         if ib.isConnected():
             ib.disconnect()
+        if archive:
+            archive.close()
 
 SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATE_FILE = os.path.join(SCRIPT_DIR, "bot_state.json")
@@ -251,6 +250,10 @@ def render_sidebar():
     st.sidebar.page_link("dashboard.py", label="📈 Monitoramento", icon="📊")
     st.sidebar.page_link("pages/1_Configuration.py", label="⚙️ Configurações", icon="🛠️")
     st.sidebar.page_link("pages/2_Execution_Feedback.py", label="🛡️ Feedback de Execução", icon="🛡️")
+    st.sidebar.page_link("pages/3_Logs.py", label="📜 Logs", icon="📜")
+    st.sidebar.page_link("pages/4_Profiling.py", label="⏱️ Profiling", icon="⏱️")
+    st.sidebar.page_link("pages/5_Charts.py", label="🕯️ Gráficos", icon="🕯️")
+    st.sidebar.page_link("pages/6_Analytics.py", label="📒 Análise de Trades", icon="📒")
     
     st.sidebar.divider()
     
@@ -289,20 +292,25 @@ def render_sidebar():
     else:
         status_label = "🔴 Offline"
 
-    # Market Status Indicator
-    is_open = False
-    if ny_time.weekday() < 5: # Mon-Fri
-        market_open = ny_time.replace(hour=9, minute=30, second=0, microsecond=0)
-        market_close = ny_time.replace(hour=16, minute=0, second=0, microsecond=0)
-        if market_open <= ny_time <= market_close:
-            is_open = True
-    market_status = "🟢" if is_open else "🔴"
+    # Market Status Indicator (NYSE session table: holidays and early closes included)
+    market_code, _ = NYSE.status(ny_time)
+    market_status = "🟢" if market_code == "open" else "🔴"
+    session = NYSE.session(ny_time.date())
+    if market_code == "open":
+        market_note = f"Fecha às {session.close:%H:%M}" + (" (pregão reduzido)" if session.early_close else "")
+    elif market_code == "pre":
+        market_note = f"Abre às {session.open:%H:%M}" + (f", fecha às {session.close:%H:%M}" if session.early_close else "")
+    else:
+        next_session = NYSE.next_session(ny_time.date(), inclusive=False)
+        closed_reason = "Pós-mercado" if market_code == "post" else NYSE.holidays.get(ny_time.date(), "Fim de semana")
+        market_note = f"{closed_reason} | Próximo pregão: {next_session.day:%d/%m}"
 
     col_status1, col_status2 = st.sidebar.columns(2)
     col_status1.markdown(f"**IBKR:** {status_label}")
     col_status2.markdown(f"**Mkt:** {market_status}")
     
     st.sidebar.markdown(f"**NY:** `{ny_time.strftime('%H:%M:%S')}`")
+    st.sidebar.caption(market_note)
     
     # Account Switch (Condensado)
     config_path = os.path.join(SCRIPT_DIR, "config.yaml")
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+def sizing_inputs(state: dict, symbols: list, asset_strats: dict):
+    """One row per executable symbol with the entry and raw stop the bot would use.
+
+    ORB with levels: entry at the range high, stop at the range low.
+    Otherwise (VWAP, or ORB still waiting): entry at the last price, 1 ATR stop distance.
+    """
+    rows = []
+    for symbol in symbols:
+        strategies = [n for n in asset_strats.get(symbol, []) if n != "Monitor_Only"]
+        if not strategies:
+            continue
+        s_data = state.get(symbol, {})
+        levels = s_data.get('levels') or {}
+        atr = float(s_data.get('atr') or 0.0)
+        price = float(s_data.get('last_price') or 0.0)
+        if "ORB_5min" in strategies and levels.get('high'):
+            entry, raw_stop, basis = float(levels['high']), float(levels.get('low', 0.0)), "ORB"
+        else:
+            entry, raw_stop, basis = price, price - atr, "ATR"
+        rows.append({
+            "symbol": symbol, "strategies": ", ".join(strategies), "status": s_data.get('status', ''),
+            "entry": entry, "raw_stop": raw_stop, "atr": atr, "basis": basis
+        })
+    return pd.DataFrame(rows, columns=["symbol", "strategies", "status", "entry", "raw_stop", "atr", "basis"])
+
+def risk_matrix(inputs: pd.DataFrame, atr_multipliers, risk_pcts, risk_cfg: dict):
+    """Quantity, capped stop, dollar risk and notional for every symbol x max_stop_atr x risk % in one pass.
+
+    Mirrors calc_quantity / calculate_capped_stop (BUY side) with NumPy broadcasting:
+    axis 0 = symbols, axis 1 = ATR multipliers, axis 2 = risk %.
+    """
+    n_sym, n_atr, n_risk = len(inputs), len(atr_multipliers), len(risk_pcts)
+    if n_sym == 0 or n_atr == 0 or n_risk == 0:
+        return pd.DataFrame(columns=["symbol", "strategies", "status", "basis", "max_stop_atr", "risk_pct",
+                                     "entry", "stop", "capped", "qty", "dollar_risk", "notional"])
+
+    entry = inputs["entry"].to_numpy(float)[:, None, None]
+    raw_stop = inputs["raw_stop"].to_numpy(float)[:, None, None]
+    atr = inputs["atr"].to_numpy(float)[:, None, None]
+    mult = np.asarray(atr_multipliers, float)[None, :, None]
+    pct = np.asarray(risk_pcts, float)[None, None, :]
+
+    # ATR cap: only when both the multiplier and the ATR are positive
+    raw_dist = np.abs(entry - raw_stop)
+    limit = atr * mult
+    active = (mult > 0) & (atr > 0)
+    capped = active & (raw_dist > limit)
+    stop = np.where(capped, np.round(entry - limit, 2), np.where(active, np.round(raw_stop, 2), raw_stop))
+    stop = np.broadcast_to(stop, (n_sym, n_atr, n_risk))
+    capped = np.broadcast_to(capped, (n_sym, n_atr, n_risk))
+    dist = np.abs(entry - stop)
+
+    equity = float(risk_cfg.get('account_equity', 100000))
+    max_risk_usd = float(risk_cfg.get('max_risk_usd', 500))
+    risk_amt = np.minimum(equity * pct / 100.0, max_risk_usd)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        qty = np.where(dist > 0, np.maximum(1, np.floor(risk_amt / dist)), 0).astype(np.int64)
+
+    idx_sym = np.repeat(np.arange(n_sym), n_atr * n_risk)
+    return pd.DataFrame({
+        "symbol": inputs["symbol"].to_numpy()[idx_sym],
+        "strategies": inputs["strategies"].to_numpy()[idx_sym],
+        "status": inputs["status"].to_numpy()[idx_sym],
+        "basis": inputs["basis"].to_numpy()[idx_sym],
+        "max_stop_atr": np.broadcast_to(mult, (n_sym, n_atr, n_risk)).ravel(),
+        "risk_pct": np.broadcast_to(pct, (n_sym, n_atr, n_risk)).ravel(),
+        "entry": np.broadcast_to(entry, (n_sym, n_atr, n_risk)).ravel(),
+        "stop": stop.ravel(),
+        "capped": capped.ravel(),
+        "qty": qty.ravel(),
+        "dollar_risk": (qty * dist).ravel().round(2),
+        "notional": (qty * entry).ravel().round(2),
+    })
@@ -33,6 +33,26 @@ state_data = load_state()
 # Sidebar
 render_sidebar()
 
+# Portfolio Summary
+portfolio = (state_data or {}).get("_portfolio")
+if portfolio:
+    p1, p2, p3, p4, p5 = st.columns(5)
+    p1.metric("P&L Dia", f"${portfolio.get('daily_pnl', 0):,.2f}")
+    p2.metric("P&L Aberto", f"${portfolio.get('unrealized_pnl', 0):,.2f}")
+    p3.metric("Risco Aberto (Stop)", f"${portfolio.get('open_risk', 0):,.2f}")
+    p4.metric("Exposição Bruta", f"${portfolio.get('gross_exposure', 0):,.2f}")
+    p5.metric("Exposição Líquida", f"${portfolio.get('net_exposure', 0):,.2f}")
+
+# Account values streamed from IB (NetLiquidation sizes the positions unless equity_source: config)
+account = (state_data or {}).get("_account")
+if account and account.get("net_liquidation") is not None:
+    a1, a2, a3, a4, a5 = st.columns(5)
+    a1.metric("Patrimônio Líquido", f"${account['net_liquidation']:,.2f}")
+    a2.metric("Poder de Compra", f"${account.get('buying_power') or 0:,.2f}")
+    a3.metric("Fundos Disponíveis", f"${account.get('available_funds') or 0:,.2f}")
+    a4.metric("Liquidez Excedente", f"${account.get('excess_liquidity') or 0:,.2f}")
+    a5.metric("Posições na Conta", f"{account.get('positions', 0)}")
+
 # Layout
 col1, col2 = st.columns([2, 1])
 
@@ -52,7 +72,8 @@ with col1:
                 "ORB/Sig Low": f"{levels.get('low'):.2f}" if levels.get('low') else "N/A",
                 "Entry": f"{value.get('entry_price'):.2f}" if value.get('entry_price') else "N/A",
                 "Stop Loss": f"{value.get('stop_loss'):.2f}" if value.get('stop_loss') else "N/A",
-                "Pos": value.get("position")
+                "Pos": value.get("position"),
+                "P&L Real.": f"{value.get('realized_pnl', 0.0):.2f}"
             })
         
         df = pd.DataFrame(table_data)
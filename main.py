@@ -3,47 +3,93 @@ import asyncio
 import yaml
 import logging
 import json
-from datetime import datetime
-import nest_asyncio
-from ib_insync import IB, Stock, util, MarketOrder, StopOrder, LimitOrder
+import signal
+import time
+from datetime import datetime, timedelta
 from bot.connection import IBConnection
-from bot.models import TradeState, ORBLevels
-from bot.strategies.orb_5min import ORB5MinStrategy
-from bot.strategies.vwap_1min import VWAP1MinStrategy
-from bot.strategies.monitor_only import MonitorOnlyStrategy
-
-STRATEGIES = {
-    'ORB_5min': ORB5MinStrategy,
-    'VWAP_1min': VWAP1MinStrategy,
-    'Monitor_Only': MonitorOnlyStrategy
-}
-
-# Set up logging
+from bot.config import strategy_names_for, risk_config_for, state_key
+from bot.feed import SymbolFeed
+from bot.portfolio import PortfolioAggregator
+from bot.account import AccountCache
+from bot.orders import OrderManager
+from bot.order_gateway import OrderGateway
+from bot.logging_setup import setup_logging
+from bot import runtime
+from bot.profiling import CallbackProfiler
+from bot.metrics import BotMetrics, MetricsServer
+from bot.lag import LoopLagMonitor
+from bot.history import HistoricalDataPacer
+from bot.bar_archive import BarArchive
+from bot.chart import bars_payload
+from bot.journal import TradeJournal
+from bot.recorder import EventRecorder
+from bot.stops import StopManager, stops_config
+from bot.scheduler import Scheduler
+from bot.tick_by_tick import TickByTickManager
+from bot.shadow import FillSimulator, ArchiveOnlyHistory, shadow_config, shadow_variants, shadow_key, shadow_summary
+from bot.market_calendar import NYSE
+from bot.models import TradeState
+from bot.strategies import get_strategy
+
+# Log file (the queued pipeline is set up in __main__ from the `logging` config section)
 base_dir = os.path.dirname(os.path.abspath(__file__))
 log_file = os.path.join(base_dir, "bot.log")
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("IBKRBot")
 
 class ORBBot:
-    def __init__(self, config_path="config.yaml"):
+    def __init__(self, config_path="config.yaml", overrides: dict = None):
         self.config_path = config_path
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
+        self.config.update(overrides or {}) # whole sections replaced, e.g. by bot.replay
         
-        self.states = {symbol: TradeState(symbol=symbol) for symbol in self.config['trading']['symbols']}
-        self.active_strategies = {}
+        self.states = {}            # state key -> TradeState (one per strategy instance)
+        self.active_strategies = {} # state key -> strategy instance
+        self.shadows = {}           # shadow key -> (base strategy name, strategy instance), simulated orders only
+        self.retiring = {}          # state key -> (symbol, strategy name, drop the symbol too): removed from config, not flat yet
+        self.simulator = FillSimulator()
+        self.simulator.configure(shadow_config(self.config))
+        self.feeds = {}             # symbol -> SymbolFeed shared by all strategies on it
+        self.portfolio = PortfolioAggregator(self.config['trading'])
+        self.account = None         # AccountCache (streamed account values), created once connected
+        self.orders = None          # OrderManager, created once connected
+        self.gateway = None         # OrderGateway (rate limit + priority lanes), created once connected
+        self.tick_mode = None       # TickByTickManager (tick-by-tick near armed levels), created once connected
+        self.stops = StopManager(stops_config(self.config)) # trailing / breakeven / EOD stop rules
+        self.scheduler = Scheduler(self.config.get('scheduler') or {}) # time-driven strategy jobs on the session clock
         
         # Use absolute path for state file
         base_dir = os.path.dirname(os.path.abspath(__file__))
         self.state_file = os.path.join(base_dir, "bot_state.json")
+        
+        profiling_cfg = self.config.get('profiling') or {}
+        self.profiler = CallbackProfiler(
+            os.path.join(base_dir, "profiles"),
+            sample_interval=profiling_cfg.get('sample_interval_ms', 5) / 1000.0)
+        self.last_profile_dump = 0
+        
+        self.metrics = BotMetrics()
+        self.stops.metrics = self.metrics
+        self.metrics_server = None
+        self.lag_monitor = LoopLagMonitor()
+        self.lag_monitor.configure(self.config.get('lag_protection') or {})
+        self.lag_monitor.listeners.append(self.on_loop_lag)
+        self.lag_monitor.mode_listeners.append(lambda degraded: self.metrics.degraded.set(1 if degraded else 0))
+        self.lag_monitor.mode_listeners.append(self.on_lag_mode)
+        self.pending_tickers = {}   # symbol -> (last_price, ticker, signal price), conflated while degraded
+        self.ticker_flush_scheduled = False
+        self.history = None         # HistoricalDataPacer, created once connected
+        self.archive = BarArchive.from_config(self.config, base_dir)
+        self.journal = TradeJournal.from_config(self.config, base_dir)
+        self.recorder = EventRecorder.from_config(self.config, base_dir) # raw event journal for bot.replay
+        self.conn = None
+        self.background_tasks = []
+        
+        self.market_open = None     # NYSE regular hours in progress, kept by the session jobs
+        self.reconnecting = False
+        self.reconnects = 0
+        self.last_recovery = None   # seconds the last reconnect took until every feed was back
         self.config_mtime = os.path.getmtime(self.config_path)
         
         self.is_running = False
@@ -51,24 +97,23 @@ class ORBBot:
     async def save_state(self):
         try:
             state_data = {}
-            for symbol, state in self.states.items():
+            for key, state in self.states.items():
                 d = state.to_dict()
-                # Find the strategy name assigned to this symbol
+                # Find the strategy name assigned to this state
                 strategy_name = "Unknown"
-                if symbol in self.active_strategies:
-                    strategy_name = self.active_strategies[symbol].__class__.__name__.replace("Strategy", "")
+                if key in self.active_strategies:
+                    strategy_name = self.active_strategies[key].__class__.__name__.replace("Strategy", "")
                 d["strategy"] = strategy_name
-                state_data[symbol] = d
+                state_data[key] = d
                 
             server_time = None
             is_connected = self.ib.isConnected() if self.ib else False
             if is_connected:
                 # get server time with timeout to prevent hanging the main loop
                 try:
-                    # reqCurrentTime is synchronous but we can wait for response
-                    # In ib_insync, reqCurrentTime() is usually fast but can block if socket is down
+                    # Native async request: no thread hop, and the timeout protects the loop if the socket is down
                     server_time_dt = await asyncio.wait_for(
-                        asyncio.to_thread(self.ib.reqCurrentTime), 
+                        self.ib.reqCurrentTimeAsync(), 
                         timeout=1.0
                     )
                     server_time = server_time_dt.isoformat()
@@ -76,23 +121,43 @@ class ORBBot:
                     # Fallback if server time request fails or times out
                     server_time = None
 
+            if self.shadows:
+                state_data["_shadow"] = shadow_summary(self.shadows, self.active_strategies)
+            state_data["_portfolio"] = self.portfolio.to_dict()
+            state_data["_portfolio"]["open_orders"] = self.orders.open_orders() if self.orders else 0
+            if self.account:
+                state_data["_account"] = self.account.to_dict()
             state_data["_bot_info"] = {
                 "last_update": datetime.now().isoformat(),
                 "is_connected": is_connected,
                 "server_time": server_time,
+                "loop_lag_ms": round(self.lag_monitor.lag * 1000, 1),
+                "degraded": self.lag_monitor.degraded,
+                "market": NYSE.status()[0],
+                "reconnects": self.reconnects,
+                "tick_by_tick": self.tick_mode.symbols() if self.tick_mode else [],
+                "last_recovery_s": round(self.last_recovery, 2) if self.last_recovery is not None else None,
                 "pid": os.getpid()
             }
+            t0 = time.perf_counter()
             with open(self.state_file, "w") as f:
                 json.dump(state_data, f, indent=4)
+                size = f.tell()
+            elapsed = time.perf_counter() - t0
+            self.metrics.state_save.observe(elapsed)
+            self.metrics.state_size.set(size)
+            if self.profiler.enabled:
+                self.profiler.record('save_state', '*', '*', elapsed)
         except Exception as e:
             logger.error(f"Error saving state: {e}")
 
     async def run(self):
-        nest_asyncio.apply()
+        runtime.apply_compat_patches(self.config)
         self.conn = IBConnection(
             host=self.config['ibkr']['host'],
             port=self.config['ibkr']['port'],
-            client_id=self.config['ibkr']['client_id']
+            client_id=self.config['ibkr']['client_id'],
+            account=self.config['ibkr'].get('account') or ''
         )
         self.ib = self.conn.ib
         
@@ -105,6 +170,26 @@ class ORBBot:
             return
         
         self.ib = self.conn.ib # Update reference after connection
+        await self.start(self.conn.account)
+        
+        try:
+            while self.is_running:
+                await self.check_config_update()
+                self.retire_flat()
+                await self.save_state()
+                self.dump_profile()
+                await asyncio.sleep(5)
+        except Exception as e:
+            logger.error(f"Error in main loop: {e}")
+        finally:
+            await self.shutdown()
+
+    async def start(self, account: str = ''):
+        """Everything after the connection: order routing, metrics, data feeds and strategies (also used by bot.replay)"""
+        self.account = AccountCache(self.ib, account, self.config['ibkr'].get('account_currency', 'USD'))
+        self.account.prime()
+        asyncio.get_running_loop().call_later(AccountCache.CHECK_AFTER_S, self.account.check_stream)
+        self.portfolio.account = self.account
 
         self.is_running = True
         await self.save_state() # Signal Online status immediately after connection
@@ -113,64 +198,377 @@ class ORBBot:
         
         # Subscribe TO ONCE for all assets
         self.ib.pendingTickersEvent += self.on_ticker_update
+        self.ib.disconnectedEvent += self.on_disconnected
+        self.gateway = OrderGateway(self.ib)
+        self.gateway.configure(self.config.get('order_gateway') or {})
+        self.gateway.metrics = self.metrics
+        self.orders = OrderManager(self.ib, self.gateway)
+        self.orders.journal = self.journal
+        self.tick_mode = TickByTickManager(self.ib, self.config.get('tick_by_tick') or {})
+        self.tick_mode.metrics = self.metrics
+        history_cfg = self.config.get('history') or {}
+        self.history = HistoricalDataPacer(
+            self.ib,
+            max_concurrent=history_cfg.get('max_concurrent', 50),
+            max_requests=history_cfg.get('max_requests', 0),
+            window=history_cfg.get('window_s', 600))
+        self.history.metrics = self.metrics
+        await self.start_metrics()
+        self.background_tasks.append(asyncio.create_task(self.scheduler.run()))
+        self.market_open = NYSE.is_open()
+        self.scheduler.daily('open', timedelta(0), lambda: self.on_session(True), key=('_bot', 'session_open'))
+        self.scheduler.daily('close', timedelta(0), lambda: self.on_session(False), key=('_bot', 'session_close'))
         
-        # Request data for each asset
-        for symbol, state in self.states.items():
-            contract = Stock(symbol, 'SMART', 'USD')
-            await self.ib.qualifyContractsAsync(contract)
-            
-            # Subscribe to real-time bars
-            self.ib.reqMktData(contract)
-            
-            # Subscribe to bars
-            bars = self.ib.reqHistoricalData(
-                contract, endDateTime='', durationStr='1 D',
-                barSizeSetting='1 min', whatToShow='TRADES', useRTH=True, keepUpToDate=True)
-            bars.updateEvent += self.on_bar_update
-            
-            # Initialize Strategy
-            strategy_name = self.config['trading'].get('strategy', 'ORB_5min')
-            strategy_name = self.config['trading'].get('asset_strategies', {}).get(symbol, strategy_name)
-            
-            StrategyClass = STRATEGIES.get(strategy_name, ORB5MinStrategy)
-            risk_config = self.config['trading']
-            self.active_strategies[symbol] = StrategyClass(self.ib, state, risk_config)
-            
-            logger.info(f"Initializing strategy for {symbol}...")
+        # Profiling can be switched on live: `profiling.enabled` in config.yaml or SIGUSR1
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, lambda: self.profiler.toggle(self.ib))
+        except (AttributeError, NotImplementedError, RuntimeError):
+            pass # No SIGUSR1 on Windows; use the config flag
+        self.profiler.set_enabled(bool((self.config.get('profiling') or {}).get('enabled')), self.ib)
+        
+        # One data feed per asset, fanned out to every strategy configured on it
+        trading_cfg = self.config['trading']
+        for symbol in trading_cfg['symbols']:
+            await self.add_symbol(symbol, trading_cfg)
+
+    async def shutdown(self):
+        self.is_running = False
+        for task in self.background_tasks:
+            task.cancel()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        if self.conn:
+            self.conn.disconnect()
+        self.profiler.set_enabled(False)
+        await self.save_state() # Save final disconnected state
+        if self.archive:
+            self.archive.close()
+        if self.journal:
+            self.journal.close()
+        if self.recorder:
+            self.recorder.close()
+
+    def on_disconnected(self):
+        if self.is_running and not self.reconnecting:
+            self.reconnecting = True
+            self.background_tasks = [t for t in self.background_tasks if not t.done()]
+            self.background_tasks.append(asyncio.create_task(self.recover()))
+
+    async def recover(self):
+        """Reconnect with jittered backoff, resubscribe every feed in parallel and apply fills missed meanwhile.
+
+        Strategies, states and orders are kept as they are; only the data lines are reopened.
+        """
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        logger.warning("Connection to TWS/Gateway lost. Reconnecting...")
+        try:
+            reconnect_cfg = self.config.get('reconnect') or {}
+            attempts = await self.conn.reconnect(
+                base_delay=reconnect_cfg.get('base_delay_s', 1.0),
+                max_delay=reconnect_cfg.get('max_delay_s', 60.0),
+                should_stop=lambda: not self.is_running)
+            if not self.ib.isConnected():
+                return
+            connected_after = loop.time() - t0
+
+            feeds = list(self.feeds.values())
+            results = await asyncio.gather(*(feed.resubscribe(self.on_bar_update) for feed in feeds), return_exceptions=True)
+            backfilled = 0
+            for feed, result in zip(feeds, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error resubscribing {feed.symbol}: {result}", extra={"symbol": feed.symbol})
+                else:
+                    backfilled += result
+            if self.tick_mode:
+                self.tick_mode.resubscribe()
+            self.profiler.reattach(self.ib) # decoder timings of the new connection
+            fills = self.orders.reconcile(self.ib.fills()) if self.orders else 0
+
+            self.last_recovery = loop.time() - t0
+            self.reconnects += 1
+            self.metrics.reconnects.inc()
+            self.metrics.recovery.observe(self.last_recovery)
+            logger.info(f"Recovered in {self.last_recovery:.1f}s (connected after {connected_after:.1f}s, {attempts} attempts): "
+                        f"{len(feeds)} feeds resubscribed, {backfilled} bars backfilled, {fills} missed fills applied")
+            await self.save_state()
+        except Exception as e:
+            logger.error(f"Error recovering connection: {e}")
+        finally:
+            self.reconnecting = False
+        if self.is_running and not self.ib.isConnected():
+            self.on_disconnected() # dropped again while resubscribing
+
+    async def on_session(self, is_open: bool):
+        """Session open/close (scheduler jobs on the NYSE calendar): re-arm strategies, disarm and run end-of-day work"""
+        self.market_open = is_open
+        session = NYSE.session() or NYSE.previous_session()
+        logger.info(f"NYSE session {session.day} {'opened' if is_open else 'closed'}")
+        shadows = [(key, strategy) for key, (_, strategy) in self.shadows.items()]
+        for key, strategy in list(self.active_strategies.items()) + shadows:
+            try:
+                if is_open:
+                    await strategy.on_session_start(session)
+                else:
+                    await strategy.on_session_end(session)
+            except Exception as e:
+                logger.error(f"Error in session handler for {key}: {e}", extra={"symbol": strategy.symbol})
+
+    async def start_metrics(self):
+        """Pull-based Prometheus endpoint on localhost plus the event-loop lag probe"""
+        metrics_cfg = self.config.get('metrics') or {}
+        self.metrics.connected.set_function(lambda: 1 if self.ib and self.ib.isConnected() else 0)
+        self.metrics.open_orders.set_function(lambda: self.orders.open_orders() if self.orders else 0)
+        self.metrics.order_queue.set_function(lambda: self.gateway.depth() if self.gateway else 0)
+        self.metrics.tick_by_tick.set_function(lambda: len(self.tick_mode.active) if self.tick_mode else 0)
+        self.metrics.history_queue.set_function(lambda: self.history.waiting if self.history else 0)
+        self.background_tasks.append(asyncio.create_task(self.lag_monitor.run()))
+        if not metrics_cfg.get('enabled', True):
+            return
+        self.metrics_server = MetricsServer(
+            self.metrics.registry,
+            host=metrics_cfg.get('host', '127.0.0.1'),
+            port=metrics_cfg.get('port', 9108))
+        self.metrics_server.add_route('/bars', self.chart_bars)
+        try:
+            await self.metrics_server.start()
+        except OSError as e:
+            logger.error(f"Could not start metrics endpoint: {e}")
+            self.metrics_server = None
+
+    def chart_bars(self, query: dict):
+        """/bars?symbol=X&since=<epoch s>: live 1 min bars and overlays for the chart page"""
+        feed = self.feeds.get(query['symbol'].upper())
+        if feed is None:
+            raise KeyError(f"no feed for {query['symbol']}")
+        return bars_payload(feed, float(query.get('since', 0)))
+
+    def on_loop_lag(self, lag: float):
+        self.metrics.loop_lag.set(lag)
+        self.metrics.loop_lag_hist.observe(lag)
+
+    def dump_profile(self):
+        """Periodic profile dump while profiling is on"""
+        interval = (self.config.get('profiling') or {}).get('dump_interval_s', 30)
+        if self.profiler.enabled and time.time() - self.last_profile_dump >= interval:
+            self.last_profile_dump = time.time()
             try:
-                await asyncio.wait_for(self.active_strategies[symbol].initialize(), timeout=30)
-                state.add_log(f"Started monitoring {symbol} with {strategy_name}")
-            except asyncio.TimeoutError:
-                logger.error(f"Timeout initializing {symbol}. Skipping for now.")
+                self.profiler.dump()
             except Exception as e:
-                logger.error(f"Error initializing {symbol}: {e}")
+                logger.error(f"Error dumping profile: {e}")
+
+    async def add_symbol(self, symbol: str, trading_cfg: dict):
+        """Open the shared feed for a symbol and start its strategies"""
+        feed = SymbolFeed(self.ib, symbol)
+        feed.profiler = self.profiler
+        feed.attach_metrics(self.metrics)
+        feed.lag_monitor = self.lag_monitor
+        feed.archive = self.archive
+        feed.stops = self.stops
+        self.feeds[symbol] = feed
+        try:
+            await feed.subscribe(self.on_bar_update)
+        except Exception as e:
+            logger.error(f"Error subscribing {symbol}: {e}", extra={"symbol": symbol})
         
+        for strategy_name in strategy_names_for(trading_cfg, symbol):
+            await self.add_strategy(feed, strategy_name, trading_cfg)
+        await self.add_shadows(feed, trading_cfg)
+
+    def remove_symbol(self, symbol: str):
+        """Drop a symbol and its data lines; deferred (see remove_strategy) while one of its strategies is not flat"""
+        feed = self.feeds.get(symbol)
+        if not feed:
+            return
+        removed = [self.remove_strategy(feed, strategy_name, drop_symbol=True) for strategy_name in list(feed.strategies)]
+        if not all(removed):
+            return # the feed stays until the open trades are closed
+        del self.feeds[symbol]
+        if self.tick_mode:
+            self.tick_mode.release(symbol)
+        feed.unsubscribe(self.on_bar_update)
+        self.metrics.ticks.remove(symbol)
+        self.metrics.bar_updates.remove(symbol)
+        self.remove_shadows(feed)
+
+    async def add_strategy(self, feed: SymbolFeed, strategy_name: str, trading_cfg: dict):
+        symbol = feed.symbol
+        key = state_key(symbol, strategy_name, primary=symbol not in self.states)
+        state = TradeState(symbol=symbol)
+        
+        StrategyClass = get_strategy(strategy_name)
+        risk_config = risk_config_for(trading_cfg, strategy_name)
+        strategy = StrategyClass(self.ib, state, risk_config)
+        strategy.key = key
+        strategy.name = strategy_name
+        strategy.portfolio = self.portfolio
+        strategy.account = self.account
+        strategy.orders = self.orders
+        strategy.history = self.history
+        strategy.archive = self.archive
+        strategy.register_jobs(self.scheduler)
+        self.stops.schedule(strategy, self.scheduler)
+        
+        self.states[key] = state
+        self.active_strategies[key] = strategy
+        feed.add_strategy(strategy_name, strategy)
+        
+        logger.info(f"Initializing {strategy_name} for {symbol}...", extra={"symbol": symbol})
         try:
-            while self.is_running:
-                await self.check_config_update()
-                await self.save_state()
-                await asyncio.sleep(5)
+            await asyncio.wait_for(strategy.initialize(), timeout=30)
+            if feed.bars:
+                # Catch up from the shared stream (e.g. an opening range that already completed)
+                await strategy.on_bar_update(feed.bars, False)
+            state.add_log(f"Started monitoring {symbol} with {strategy_name}")
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout initializing {strategy_name} for {symbol}. Skipping for now.", extra={"symbol": symbol})
         except Exception as e:
-            logger.error(f"Error in main loop: {e}")
-        finally:
-            self.is_running = False
-            if self.conn:
-                self.conn.disconnect()
-            await self.save_state() # Save final disconnected state
+            logger.error(f"Error initializing {strategy_name} for {symbol}: {e}", extra={"symbol": symbol})
+
+    def is_flat(self, strategy):
+        return not strategy.state.position and not (self.orders and self.orders.has_working(strategy))
+
+    def remove_strategy(self, feed: SymbolFeed, strategy_name: str, drop_symbol: bool = False):
+        """Drop a strategy removed from the config; returns False when deferred.
+
+        A strategy holding a position or working orders at IB is kept (retired:
+        no new entries, stops still managed) until it is flat, see retire_flat.
+        """
+        strategy = feed.strategies.get(strategy_name)
+        if strategy is None:
+            return True
+        if not self.is_flat(strategy):
+            if strategy.key not in self.retiring:
+                logger.warning(f"{strategy_name} on {feed.symbol} holds {strategy.state.position:+g} or working orders: "
+                               f"removal deferred until flat, no new entries", extra={"symbol": feed.symbol})
+            strategy.retired = True
+            self.retiring[strategy.key] = (feed.symbol, strategy_name, drop_symbol)
+            return False
+        self.retiring.pop(strategy.key, None)
+        feed.remove_strategy(strategy_name)
+        for key, active in list(self.active_strategies.items()):
+            if active is strategy:
+                self.scheduler.cancel_owner(key)
+                self.portfolio.update_position(key, feed.symbol, 0, 0.0)
+                self.portfolio.release_entry(key)
+                del self.active_strategies[key]
+                del self.states[key]
+        return True
+
+    def retire_flat(self):
+        """Complete the removals deferred while a strategy still had an open trade"""
+        for key, (symbol, strategy_name, drop_symbol) in list(self.retiring.items()):
+            feed = self.feeds.get(symbol)
+            strategy = feed.strategies.get(strategy_name) if feed else None
+            if strategy is None:
+                self.retiring.pop(key, None)
+            elif self.is_flat(strategy):
+                logger.info(f"{strategy_name} on {symbol} is flat: removing it", extra={"symbol": symbol})
+                if drop_symbol:
+                    self.remove_symbol(symbol)
+                else:
+                    self.remove_strategy(feed, strategy_name)
+
+    def unretire(self, feed: SymbolFeed, wanted):
+        """Strategies back in the config before their deferred removal: trade normally again"""
+        for strategy_name in wanted:
+            strategy = feed.strategies.get(strategy_name)
+            if strategy is not None and self.retiring.pop(strategy.key, None):
+                strategy.retired = False
+                logger.info(f"{strategy_name} on {feed.symbol} is configured again: removal cancelled", extra={"symbol": feed.symbol})
+        for key, (symbol, strategy_name, drop_symbol) in list(self.retiring.items()):
+            if symbol == feed.symbol and drop_symbol:
+                self.retiring[key] = (symbol, strategy_name, False) # the symbol stays, only the strategy goes
+
+    async def add_shadows(self, feed: SymbolFeed, trading_cfg: dict):
+        """Shadow variants of the `shadow` config on this symbol: same feed, simulated fills, no IB requests"""
+        feed.simulator = self.simulator
+        for variant, base, params in shadow_variants(shadow_config(self.config), feed.symbol):
+            StrategyClass = get_strategy(base)
+            risk_config = {**risk_config_for(trading_cfg, base), **params}
+            strategy = StrategyClass(self.ib, TradeState(symbol=feed.symbol), risk_config)
+            strategy.key = shadow_key(feed.symbol, variant)
+            strategy.name = variant
+            strategy.account = self.account
+            strategy.orders = self.simulator
+            strategy.history = ArchiveOnlyHistory()
+            strategy.archive = self.archive
+            # No archive (or a short one): reuse the live strategy's ATR instead of zeroing it on each refresh
+            strategy.atr_fallback = lambda feed=feed: next((s.state.atr for s in feed.strategies.values()), 0.0)
+            try:
+                await asyncio.wait_for(strategy.initialize(), timeout=30)
+                if feed.bars:
+                    await strategy.on_bar_update(feed.bars, False)
+            except Exception as e:
+                logger.error(f"Error initializing shadow {variant} for {feed.symbol}: {e}", extra={"symbol": feed.symbol})
+                continue
+            strategy.register_jobs(self.scheduler)
+            self.stops.schedule(strategy, self.scheduler)
+            self.shadows[strategy.key] = (base, strategy)
+            feed.add_shadow(variant, strategy)
+            logger.info(f"Shadow variant {variant} ({base}) running on {feed.symbol}", extra={"symbol": feed.symbol})
+
+    def remove_shadows(self, feed: SymbolFeed):
+        for variant in list(feed.shadows):
+            feed.remove_shadow(variant)
+            self.shadows.pop(shadow_key(feed.symbol, variant), None)
+            self.scheduler.cancel_owner(shadow_key(feed.symbol, variant))
 
     def on_ticker_update(self, tickers):
+        if self.recorder:
+            self.recorder.tickers(tickers)
+        degraded = self.lag_monitor.degraded
         for ticker in tickers:
-            symbol = ticker.contract.symbol
-            if symbol not in self.active_strategies: continue
+            feed = self.feeds.get(ticker.contract.symbol)
+            if not feed: continue
             
             last_price = ticker.last if ticker.last == ticker.last else ticker.close
-            self.states[symbol].last_price = last_price
-            self.active_strategies[symbol].on_ticker_update(last_price, ticker)
+            signal_price = last_price
+            if feed.tick_type == 'BidAsk' and ticker.bid > 0 and ticker.ask > 0:
+                last_price = signal_price = (ticker.bid + ticker.ask) / 2 # tick-by-tick quotes are fresher than the last snapshot
+            elif feed.tick_type == 'AllLast':
+                signal_price = TickByTickManager.batch_high(ticker, last_price) # strategies see every print
+            if degraded:
+                # Latest wins: the loop is behind, so only the newest price per symbol is worth handling
+                pending = self.pending_tickers.get(feed.symbol)
+                if pending:
+                    self.metrics.conflated.labels("ticker").inc()
+                    if feed.tick_type == 'AllLast':
+                        signal_price = max(signal_price, pending[2]) # a conflated print can still be the breakout
+                self.pending_tickers[feed.symbol] = (last_price, ticker, signal_price)
+                continue
+            feed.on_ticker_update(signal_price, ticker)
+            self.portfolio.on_price(feed.symbol, last_price)
+            if self.tick_mode:
+                self.tick_mode.on_price(feed, last_price)
+        
+        if self.pending_tickers and not self.ticker_flush_scheduled:
+            # Flush after the conflation window: batches arriving meanwhile merge into one update per symbol
+            self.ticker_flush_scheduled = True
+            asyncio.get_running_loop().call_later(self.lag_monitor.conflate_window, self.flush_tickers)
+
+    def flush_tickers(self):
+        self.ticker_flush_scheduled = False
+        pending, self.pending_tickers = self.pending_tickers, {}
+        for symbol, (last_price, ticker, signal_price) in pending.items():
+            feed = self.feeds.get(symbol)
+            if feed:
+                feed.on_ticker_update(signal_price, ticker)
+                self.portfolio.on_price(symbol, last_price)
+                if self.tick_mode:
+                    self.tick_mode.on_price(feed, last_price, allow_new=False) # no new subscriptions while behind
+
+    def on_lag_mode(self, degraded: bool):
+        if not degraded:
+            for feed in self.feeds.values():
+                feed.resume_bars() # bar updates (and bar closes) held back while degraded
 
     def on_bar_update(self, bars, has_new_bar: bool):
-        symbol = bars.contract.symbol
-        if symbol in self.active_strategies:
-            asyncio.create_task(self.active_strategies[symbol].on_bar_update(bars, has_new_bar))
+        if self.recorder:
+            self.recorder.bars(bars, has_new_bar)
+        feed = self.feeds.get(bars.contract.symbol)
+        if feed:
+            feed.submit_bars(bars, has_new_bar)
 
     async def check_config_update(self):
         current_mtime = os.path.getmtime(self.config_path)
@@ -181,38 +579,60 @@ class ORBBot:
             with open(self.config_path, 'r') as f:
                 new_config = yaml.safe_load(f)
             
-            new_symbols = set(new_config['trading']['symbols'])
-            current_symbols = set(self.states.keys())
+            new_profiling = new_config.get('profiling') or {}
+            if new_profiling != (self.config.get('profiling') or {}):
+                self.profiler.set_enabled(bool(new_profiling.get('enabled')), self.ib)
+            new_shadow = shadow_config(new_config)
+            rebuild_shadows = new_shadow != shadow_config(self.config)
+            new_tick_mode = new_config.get('tick_by_tick') or {}
+            tick_mode_changed = new_tick_mode != (self.config.get('tick_by_tick') or {})
+            new_scheduler = new_config.get('scheduler') or {}
+            scheduler_changed = new_scheduler != (self.config.get('scheduler') or {})
+            self.config = new_config
+            trading_cfg = new_config['trading']
+            self.portfolio.configure(trading_cfg)
+            self.lag_monitor.configure(new_config.get('lag_protection') or {})
+            if self.gateway:
+                self.gateway.configure(new_config.get('order_gateway') or {})
+            self.simulator.configure(new_shadow)
+            if self.tick_mode and tick_mode_changed:
+                self.tick_mode.configure(new_tick_mode)
+            self.stops.configure(stops_config(new_config))
+            self.scheduler.configure(new_scheduler)
+            shadows = [strategy for _, strategy in self.shadows.values()]
+            for strategy in list(self.active_strategies.values()) + shadows:
+                if scheduler_changed:
+                    strategy.register_jobs(self.scheduler) # ATR interval / pre-open offset / spread
+                self.stops.schedule(strategy, self.scheduler) # EOD exit time may have changed
+            
+            new_symbols = set(trading_cfg['symbols'])
+            current_symbols = set(self.feeds.keys())
 
             # Add new symbols
             for symbol in new_symbols - current_symbols:
-                logger.info(f"Adding new asset to monitor: {symbol}")
-                self.states[symbol] = TradeState(symbol=symbol)
-                contract = Stock(symbol, 'SMART', 'USD')
-                await self.ib.qualifyContractsAsync(contract)
-                
-                # Initialize strategy
-                strategy_name = new_config['trading'].get('strategy', 'ORB_5min')
-                strategy_name = new_config['trading'].get('asset_strategies', {}).get(symbol, strategy_name)
-                
-                StrategyClass = STRATEGIES.get(strategy_name, ORB5MinStrategy)
-                risk_config = new_config['trading']
-                self.active_strategies[symbol] = StrategyClass(self.ib, self.states[symbol], risk_config)
-                
-                try:
-                    await asyncio.wait_for(self.active_strategies[symbol].initialize(), timeout=30)
-                    self.states[symbol].add_log(f"Dynamic subscription started for {symbol} ({strategy_name})")
-                except asyncio.TimeoutError:
-                    logger.error(f"Timeout dynamic initializing {symbol}. Skipping.")
-                except Exception as e:
-                    logger.error(f"Error dynamic initializing {symbol}: {e}")
+                logger.info(f"Adding new asset to monitor: {symbol}", extra={"symbol": symbol})
+                await self.add_symbol(symbol, trading_cfg)
 
             # Remove symbols
             for symbol in current_symbols - new_symbols:
-                logger.info(f"Removing asset: {symbol}")
-                if symbol in self.active_strategies:
-                    del self.active_strategies[symbol]
-                del self.states[symbol]
+                logger.info(f"Removing asset: {symbol}", extra={"symbol": symbol})
+                self.remove_symbol(symbol)
+            
+            # Strategy changes on symbols that stay monitored (no new data lines needed)
+            for symbol in new_symbols & current_symbols:
+                feed = self.feeds[symbol]
+                wanted = strategy_names_for(trading_cfg, symbol)
+                self.unretire(feed, wanted)
+                for strategy_name in [n for n in feed.strategies if n not in wanted]:
+                    logger.info(f"Removing {strategy_name} from {symbol}", extra={"symbol": symbol})
+                    self.remove_strategy(feed, strategy_name)
+                for strategy_name in [n for n in wanted if n not in feed.strategies]:
+                    logger.info(f"Adding {strategy_name} to {symbol}", extra={"symbol": symbol})
+                    await self.add_strategy(feed, strategy_name, trading_cfg)
+                if rebuild_shadows:
+                    # Variants restart from scratch; their simulated positions are dropped
+                    self.remove_shadows(feed)
+                    await self.add_shadows(feed, trading_cfg)
             
             await self.save_state()
 
@@ -220,9 +640,11 @@ class ORBBot:
         self.is_running = False
 
 if __name__ == "__main__":
+    log_listener = None
     try:
         bot = ORBBot()
-        asyncio.run(bot.run())
+        log_listener = setup_logging(log_file, bot.config.get('logging'))
+        runtime.run(bot.run, bot.config)
     except KeyboardInterrupt:
         print("\nBot encerrado pelo usuário.")
     except Exception as e:
@@ -230,3 +652,6 @@ if __name__ == "__main__":
         import traceback
         traceback.print_exc()
         input("\nPressione ENTER para sair...")
+    finally:
+        if log_listener:
+            log_listener.stop()
@@ -4,6 +4,10 @@ import os
 import time
 import json
 from bot.ui_utils import render_sidebar, render_account_banner
+from bot.config import strategy_names_for
+from bot.strategies import available as available_strategies
+from bot.bar_archive import BarArchive
+from bot.screener import screener_config, run_screen, write_symbols
 
 # UI Setup
 st.set_page_config(page_title="Configurações do Robô", layout="wide")
@@ -70,6 +74,19 @@ with st.container(border=True):
     calculated_max_usd = equity * (risk_pct / 100.0)
     r_col5.metric("Risco Max USD", f"${calculated_max_usd:,.2f}")
 
+    l_col1, l_col2, l_col3, l_col4 = st.columns([1, 1, 1, 1], vertical_alignment="center")
+    l_col1.markdown("**Limites da Conta** (0 = desligado)")
+    with l_col2:
+        max_daily_loss = st.number_input("Perda Max Diária $", min_value=0.0, value=float(current_config['trading'].get('max_daily_loss_usd', 0.0)), step=100.0)
+    with l_col3:
+        max_open_risk = st.number_input("Risco Aberto Max $", min_value=0.0, value=float(current_config['trading'].get('max_open_risk_usd', 0.0)), step=100.0)
+    with l_col4:
+        orb_windows = [1, 5, 15, 30]
+        current_window = int(current_config['trading'].get('orb_window_minutes', 5))
+        orb_window = st.selectbox("Janela ORB (min)", options=orb_windows,
+                                  index=orb_windows.index(current_window) if current_window in orb_windows else 1,
+                                  help="Duração do opening range, montado a partir das barras de 1 min do feed ao vivo.")
+
 st.divider()
 
 with st.container(border=True):
@@ -108,18 +125,18 @@ with st.container(border=True):
             row_col2.write(f"${price:.2f}" if price > 0 else "N/A")
             row_col3.write(f"{atr:.2f}" if atr > 0 else "N/A")
             
-            current_strategy = asset_strategies.get(symbol, current_config['trading'].get('strategy', 'ORB_5min'))
-            options = ['ORB_5min', 'VWAP_1min', 'Monitor_Only']
-            try:
-                default_index = options.index(current_strategy)
-            except ValueError:
-                default_index = 0
+            current_strategies = strategy_names_for(current_config['trading'], symbol)
+            options = available_strategies()
+            default_choice = [s for s in current_strategies if s in options] or [options[0]]
                 
-            choice = row_col4.selectbox(f"Select_{symbol}", options=options, 
-                                 index=default_index,
+            # Várias estratégias podem rodar no mesmo ativo compartilhando o mesmo feed de dados
+            choice = row_col4.multiselect(f"Select_{symbol}", options=options, 
+                                 default=default_choice,
                                  key=f"strat_{symbol}",
                                  label_visibility="collapsed")
-            new_asset_strategies[symbol] = choice
+            if not choice:
+                choice = default_choice
+            new_asset_strategies[symbol] = choice[0] if len(choice) == 1 else choice
 
     st.divider()
     
@@ -128,7 +145,10 @@ with st.container(border=True):
             'risk_per_trade_percent': risk_pct,
             'account_equity': equity,
             'max_risk_usd': calculated_max_usd,
-            'max_stop_atr': max_stop_atr
+            'max_stop_atr': max_stop_atr,
+            'max_daily_loss_usd': max_daily_loss,
+            'max_open_risk_usd': max_open_risk,
+            'orb_window_minutes': orb_window
         }
         save_config(new_symbols, new_asset_strategies, risk_params, ibkr_params)
         st.success("✅ Configurações salvas com sucesso! O robô será atualizado em instantes.")
@@ -137,6 +157,57 @@ with st.container(border=True):
 
 st.divider()
 
+# Pre-market Screener over the local daily bar archive
+with st.container(border=True):
+    st.subheader("🔎 Screener Pré-Mercado")
+    st.markdown("Filtra todo o universo de barras diárias do arquivo local (ATR%, volume médio, gap e faixa de preço) e grava o **Top N** na lista de ativos. "
+                "Para atualizar o universo: `python -m bot.screener --backfill universo.txt`.")
+    scr_cfg = screener_config(current_config)
+    f_col1, f_col2, f_col3, f_col4, f_col5, f_col6, f_col7 = st.columns(7)
+    scr_filters = {
+        'min_price': f_col1.number_input("Preço Min $", min_value=0.0, value=float(scr_cfg['min_price']), step=1.0),
+        'max_price': f_col2.number_input("Preço Max $", min_value=0.0, value=float(scr_cfg['max_price']), step=10.0),
+        'min_atr_pct': f_col3.number_input("ATR% Min", min_value=0.0, value=float(scr_cfg['min_atr_pct']), step=0.1),
+        'min_avg_volume': f_col4.number_input("Vol. Médio Min", min_value=0, value=int(scr_cfg['min_avg_volume']), step=100000),
+        'min_gap_pct': f_col5.number_input("|Gap%| Min", min_value=0.0, value=float(scr_cfg['min_gap_pct']), step=0.5, help="Usa o último preço do robô; 0 = desligado"),
+        'top_n': f_col6.number_input("Top N", min_value=1, max_value=200, value=int(scr_cfg['top_n']), step=1),
+        'sort_by': f_col7.selectbox("Ordenar por", options=['atr_pct', 'gap_pct', 'avg_volume'],
+                                    index=['atr_pct', 'gap_pct', 'avg_volume'].index(scr_cfg['sort_by']) if scr_cfg['sort_by'] in ('atr_pct', 'gap_pct', 'avg_volume') else 0),
+    }
+
+    if st.button("▶️ Rodar Screener", use_container_width=True):
+        archive = BarArchive.from_config(current_config, SCRIPT_DIR, readonly=True)
+        if archive is None:
+            st.warning("Arquivo de barras inexistente ou desativado.")
+        else:
+            prices = {k: v.get('last_price') for k, v in load_state().items()
+                      if not k.startswith('_') and isinstance(v, dict) and v.get('last_price')}
+            t0 = time.perf_counter()
+            ranked, universe_size = run_screen(archive, {'screener': {**scr_cfg, **scr_filters}}, prices)
+            st.session_state['screener_result'] = (ranked, universe_size, time.perf_counter() - t0)
+            archive.close()
+
+    if 'screener_result' in st.session_state:
+        ranked, universe_size, elapsed = st.session_state['screener_result']
+        st.caption(f"{universe_size:,} ativos analisados em {elapsed:.2f}s")
+        if ranked.empty:
+            st.info("Nenhum ativo passou pelos filtros.")
+        else:
+            st.dataframe(ranked.round(2).rename(columns={
+                "last_close": "Fech. Anterior", "atr": "ATR", "atr_pct": "ATR%", "avg_volume": "Vol. Médio",
+                "last_session": "Último Pregão", "price": "Preço", "gap_pct": "Gap%"}), use_container_width=True)
+            if st.button(f"💾 Aplicar Top {len(ranked)} à lista de ativos", type="primary"):
+                config = write_symbols(CONFIG_FILE, ranked.index)
+                config['screener'] = {**scr_cfg, **scr_filters}
+                with open(CONFIG_FILE, 'w') as f:
+                    yaml.safe_dump(config, f)
+                del st.session_state['screener_result']
+                st.success("✅ Lista de ativos atualizada. O robô será atualizado em instantes.")
+                time.sleep(1)
+                st.rerun()
+
+st.divider()
+
 # Sizing Simulator for Testing
 with st.container(border=True):
     st.subheader("🧮 Simulador de Dimensionamento (Teste)")
@@ -3,6 +3,10 @@ import yaml
 import os
 import json
 from bot.ui_utils import render_sidebar, render_account_banner
+from bot.config import strategy_names_for
+from bot.whatif import sizing_inputs, risk_matrix
+from bot.risk import live_equity_config
+import pandas as pd
 
 # UI Setup
 st.set_page_config(page_title="Feedback de Execução", layout="wide")
@@ -30,13 +34,19 @@ def load_state():
     except:
         return {}
 
-def calculate_qty_ui(stop_dist, risk_cfg):
-    if stop_dist <= 0: return 0
-    equity = risk_cfg.get('account_equity', 100000)
-    risk_pct = risk_cfg.get('risk_per_trade_percent', 1.0) / 100.0
-    max_usd = risk_cfg.get('max_risk_usd', 500)
-    risk_amt = min(equity * risk_pct, max_usd)
-    return max(1, int(risk_amt / stop_dist))
+def file_version(path):
+    return os.path.getmtime(path) if os.path.exists(path) else 0
+
+@st.cache_data(max_entries=16)
+def compute_risk_matrix(state_version, config_version, atr_grid, risk_grid):
+    # Cached per state/config file version and grid; recomputed only when one of them changes
+    cfg = load_config() or {}
+    bot_state = load_state()
+    trading = live_equity_config(cfg.get('trading', {}), (bot_state.get('_account') or {}).get('net_liquidation'))
+    syms = trading.get('symbols', [])
+    strats = {s: strategy_names_for(trading, s) for s in syms}
+    inputs = sizing_inputs(bot_state, syms, strats)
+    return risk_matrix(inputs, list(atr_grid), list(risk_grid), trading)
 
 config = load_config()
 state = load_state()
@@ -49,9 +59,10 @@ Use isso como um checklist antes de deixar o robô operando.
 if not config:
     st.error("Não foi possível carregar a configuração.")
 else:
-    trading_cfg = config.get('trading', {})
+    # Same equity the bot sizes with: live NetLiquidation when it streams one
+    trading_cfg = live_equity_config(config.get('trading', {}), ((state or {}).get('_account') or {}).get('net_liquidation'))
     symbols = trading_cfg.get('symbols', [])
-    asset_strats = trading_cfg.get('asset_strategies', {})
+    asset_strats = {s: strategy_names_for(trading_cfg, s) for s in symbols}
     risk_pct = trading_cfg.get('risk_per_trade_percent', 0)
     max_usd = trading_cfg.get('max_risk_usd', 0)
 
@@ -62,71 +73,69 @@ else:
         c1.metric("Risco por Operação (%)", f"{risk_pct}%")
         c2.metric("Teto de Perda (USD)", f"${max_usd:,.2f}")
 
+    state_version = file_version(STATE_FILE)
+    config_version = file_version(CONFIG_FILE)
+    current_atr = float(trading_cfg.get('max_stop_atr', 0.0))
+    current_risk = float(trading_cfg.get('risk_per_trade_percent', 1.0))
+
     # Execution Lists
-    col_live, col_obs = st.columns(2)
+    col_live, col_obs = st.columns([2, 1])
 
     with col_live:
         st.subheader("🚀 Ativos em EXECUÇÃO REAL")
-        live_assets = [s for s in symbols if asset_strats.get(s) != "Monitor_Only"]
-        if not live_assets:
+        live = compute_risk_matrix(state_version, config_version, (current_atr,), (current_risk,))
+        if live.empty:
             st.info("Nenhum ativo configurado para execução real.")
         else:
-            for s in live_assets:
-                strat = asset_strats.get(s, "ORB_5min")
-                with st.expander(f"✅ **{s}** ({strat})", expanded=True):
-                    s_data = state.get(s, {})
-                    status = s_data.get('status', 'Aguardando...')
-                    atr = s_data.get('atr', 0)
-                    levels = s_data.get('levels')
-                    
-                    st.write(f"**Estratégia:** {strat}")
-                    st.write(f"**Status Atual:** {status}")
-                    
-                    # Quantity Logic
-                    estimated_qty = 0
-                    reason = ""
-                    
-                    if strat == "ORB_5min":
-                        if levels:
-                            stop_dist = abs(levels.get('high', 0) - levels.get('low', 0))
-                            estimated_qty = calculate_qty_ui(stop_dist, trading_cfg)
-                            reason = "(Baseado no tamanho do 1º candle)"
-                        elif atr > 0:
-                            estimated_qty = calculate_qty_ui(atr, trading_cfg)
-                            reason = "(Estimado por ATR enquanto aguarda ORB)"
-                    elif strat == "VWAP_1min":
-                        if atr > 0:
-                            estimated_qty = calculate_qty_ui(atr, trading_cfg)
-                            reason = "(Estimado por ATR para VWAP breakout)"
-                    
-                    if estimated_qty > 0:
-                        st.metric("📦 Qtd. Estimada", f"{estimated_qty} un", help=reason)
-                        st.caption(reason)
-                    else:
-                        st.warning("⚠️ Qtd. indisponível (Aguardando ATR/Níveis)")
-                        
-                    st.markdown("---")
-                    st.caption("⚠️ O robô ENVIARÁ ordens reais para este ativo.")
+            live_view = live[["symbol", "strategies", "status", "basis", "entry", "stop", "capped", "qty", "dollar_risk", "notional"]].rename(columns={
+                "symbol": "Ativo", "strategies": "Estratégias", "status": "Status", "basis": "Base",
+                "entry": "Entrada", "stop": "Stop", "capped": "Stop Limitado", "qty": "Qtd. Estimada",
+                "dollar_risk": "Risco $", "notional": "Nocional $"})
+            st.dataframe(live_view, use_container_width=True, hide_index=True)
+            st.caption("Base ORB: entrada na máxima e stop na mínima do range. Base ATR: entrada no último preço e stop a 1 ATR (VWAP ou ORB aguardando níveis). "
+                       "⚠️ O robô ENVIARÁ ordens reais para estes ativos.")
 
     with col_obs:
         st.subheader("👁️ Ativos em MONITORAMENTO")
-        obs_assets = [s for s in symbols if asset_strats.get(s) == "Monitor_Only"]
+        obs_assets = [s for s in symbols if asset_strats[s] == ["Monitor_Only"]]
         if not obs_assets:
             st.info("Nenhum ativo configurado apenas para monitoramento.")
         else:
-            for s in obs_assets:
-                with st.expander(f"🔍 **{s}**", expanded=True):
-                    s_data = state.get(s, {})
-                    status = s_data.get('status', 'Aguardando...')
-                    price = s_data.get('last_price', 0)
-                    
-                    st.write(f"**Status:** {status} | **Preço:** ${price:.2f}")
-                    st.caption("ℹ️ Somente leitura. Nenhuma ordem será enviada.")
+            obs_view = pd.DataFrame([{
+                "Ativo": s,
+                "Status": state.get(s, {}).get('status', 'Aguardando...'),
+                "Preço": state.get(s, {}).get('last_price', 0.0)
+            } for s in obs_assets])
+            st.dataframe(obs_view, use_container_width=True, hide_index=True)
+            st.caption("ℹ️ Somente leitura. Nenhuma ordem será enviada.")
+
+    # What-if Risk Matrix
+    with st.container(border=True):
+        st.subheader("🧮 Matriz What-if de Risco")
+        st.markdown("Quantidade, stop limitado, risco em dólar e nocional para todos os ativos × cada combinação de **Stop ATR** e **R%**.")
+        g_col1, g_col2 = st.columns(2)
+        atr_options = sorted({0.0, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, current_atr})
+        risk_options = sorted({0.25, 0.5, 0.75, 1.0, 1.5, 2.0, current_risk})
+        atr_grid = g_col1.multiselect("Stop ATR (0 = sem limite)", options=atr_options, default=sorted({0.0, current_atr, 0.5, 1.0}))
+        risk_grid = g_col2.multiselect("R%", options=risk_options, default=sorted({0.5, current_risk, 2.0}))
+
+        matrix = compute_risk_matrix(state_version, config_version, tuple(sorted(atr_grid)), tuple(sorted(risk_grid)))
+        if matrix.empty:
+            st.info("Sem dados para a matriz (aguardando preço/ATR ou nenhuma combinação selecionada).")
+        else:
+            st.dataframe(
+                matrix.drop(columns=["strategies", "status"]).rename(columns={
+                    "symbol": "Ativo", "basis": "Base", "max_stop_atr": "Stop ATR", "risk_pct": "R%",
+                    "entry": "Entrada", "stop": "Stop", "capped": "Limitado", "qty": "Qtd",
+                    "dollar_risk": "Risco $", "notional": "Nocional $"}),
+                use_container_width=True, hide_index=True, height=420)
+            st.caption(f"{len(matrix):,} cenários | Teto USD por operação: ${float(trading_cfg.get('max_risk_usd', 500)):,.2f}")
 
     st.divider()
 
     # Manual Execution Test Section
-    from bot.ui_utils import place_manual_order, calc_quantity, calculate_capped_stop, fetch_last_candle
+    from bot.ui_utils import place_manual_order, fetch_last_candle
+    from bot.risk import calc_quantity, calculate_capped_stop
     
     with st.container(border=True):
         st.subheader("🧪 Teste de Execução Manual (Calculado)")
@@ -0,0 +1,72 @@
+import streamlit as st
+import pandas as pd
+import os
+import glob
+from datetime import datetime, time as dtime
+from bot.ui_utils import render_sidebar, render_account_banner
+from bot.log_index import LogIndex, LogFilter
+
+# UI Setup
+st.set_page_config(page_title="Logs do Robô", layout="wide")
+render_account_banner()
+
+st.title("📜 Logs do Robô (bot.log)")
+
+# Paths
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOG_FILE = os.path.join(SCRIPT_DIR, "bot.log")
+
+@st.cache_resource
+def get_log_index(path):
+    # Kept across reruns: each rerun only indexes the bytes appended since the last one
+    return LogIndex(path)
+
+log_files = sorted(glob.glob(LOG_FILE + "*"), key=lambda p: (p != LOG_FILE, p))
+
+if not log_files:
+    st.info("Nenhum arquivo de log encontrado.")
+else:
+    with st.container(border=True):
+        f_col1, f_col2, f_col3, f_col4 = st.columns([1.2, 1.5, 1.5, 1])
+        with f_col1:
+            log_path = st.selectbox("Arquivo", options=log_files, format_func=os.path.basename)
+            symbol = st.text_input("Ativo", value="", placeholder="Ex: NVDA")
+        with f_col2:
+            levels = st.multiselect("Nível", options=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], default=[])
+            loggers = st.text_input("Logger (prefixos separados por vírgula)", value="", placeholder="Ex: ib_insync.wrapper, IBKRBot")
+        with f_col3:
+            mode = st.radio("Janela", ["Mais recentes", "Intervalo de tempo"], horizontal=True)
+            day = st.date_input("Dia", value=datetime.now().date(), disabled=mode == "Mais recentes")
+            t_col1, t_col2 = st.columns(2)
+            start_t = t_col1.time_input("De", value=dtime(9, 30), disabled=mode == "Mais recentes")
+            end_t = t_col2.time_input("Até", value=dtime(16, 0), disabled=mode == "Mais recentes")
+        with f_col4:
+            limit = st.number_input("Linhas", min_value=10, max_value=2000, value=200, step=50)
+            auto_refresh = st.toggle("Atualização automática", value=False)
+
+    index = get_log_index(log_path)
+    log_filter = LogFilter(levels=levels, loggers=[l.strip() for l in loggers.split(',')], symbol=symbol)
+
+    if mode == "Mais recentes":
+        entries = index.tail(log_filter, limit=int(limit))
+    else:
+        start_ts = datetime.combine(day, start_t).isoformat(timespec='milliseconds')
+        end_ts = datetime.combine(day, end_t).isoformat(timespec='milliseconds')
+        entries = index.read_range(start_ts, end_ts, log_filter, limit=int(limit))
+
+    st.caption(f"{len(entries)} linhas | Arquivo: {index.size / 1e6:,.1f} MB | Índice: {len(index.offsets)} pontos")
+
+    if entries:
+        df = pd.DataFrame(entries)
+        columns = [c for c in ["ts", "level", "logger", "symbol", "msg", "suppressed"] if c in df.columns]
+        st.dataframe(df[columns], use_container_width=True, hide_index=True, height=600)
+    else:
+        st.info("Nenhuma linha encontrada para os filtros selecionados.")
+
+    if auto_refresh:
+        import time
+        time.sleep(2)
+        st.rerun()
+
+# Sidebar
+render_sidebar()
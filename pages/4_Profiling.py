@@ -0,0 +1,86 @@
+import streamlit as st
+import pandas as pd
+import os
+import json
+import glob
+import time
+import yaml
+from bot.ui_utils import render_sidebar, render_account_banner
+
+# UI Setup
+st.set_page_config(page_title="Profiling do Robô", layout="wide")
+render_account_banner()
+
+st.title("⏱️ Profiling de Callbacks")
+
+# Paths
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_FILE = os.path.join(SCRIPT_DIR, "config.yaml")
+PROFILE_DIR = os.path.join(SCRIPT_DIR, "profiles")
+SUMMARY_FILE = os.path.join(PROFILE_DIR, "profile_summary.json")
+
+def load_config():
+    with open(CONFIG_FILE, 'r') as f:
+        return yaml.safe_load(f)
+
+def load_summary():
+    if not os.path.exists(SUMMARY_FILE):
+        return None
+    try:
+        with open(SUMMARY_FILE, "r") as f:
+            return json.load(f)
+    except:
+        return None
+
+config = load_config()
+profiling_cfg = config.get('profiling') or {}
+is_enabled = bool(profiling_cfg.get('enabled'))
+
+st.markdown("""
+Ligue o profiling com o robô rodando (sem reiniciar). O robô mede o tempo de cada callback
+por ativo e estratégia, amostra a pilha do event loop e grava arquivos *folded* prontos para flamegraph
+(`flamegraph.pl`, speedscope). No Linux/macOS também é possível alternar com `kill -USR1 <pid>`.
+""")
+
+with st.container(border=True):
+    c1, c2 = st.columns([1, 3], vertical_alignment="center")
+    c1.markdown(f"**Status:** {'🟢 Ligado' if is_enabled else '⚪ Desligado'}")
+    if c2.button("⏹️ Desligar Profiling" if is_enabled else "▶️ Ligar Profiling", type="primary"):
+        config.setdefault('profiling', {})['enabled'] = not is_enabled
+        with open(CONFIG_FILE, 'w') as f:
+            yaml.safe_dump(config, f)
+        st.success("Configuração salva. O robô aplicará em instantes.")
+        time.sleep(1)
+        st.rerun()
+
+summary = load_summary()
+if not summary:
+    st.info("Nenhum perfil gerado ainda.")
+else:
+    st.caption(f"Início: `{summary.get('started_at')}` | Gerado: `{summary.get('generated_at')}` | Amostras de pilha: {summary.get('total_samples', 0)}")
+
+    st.subheader("🔥 Callbacks mais custosos")
+    callbacks = summary.get("callbacks") or []
+    if callbacks:
+        df = pd.DataFrame(callbacks)
+        df = df.rename(columns={"callback": "Callback", "symbol": "Ativo", "strategy": "Estratégia",
+                                "calls": "Chamadas", "total_ms": "Total (ms)", "avg_us": "Média (µs)", "max_ms": "Máx (ms)"})
+        st.dataframe(df, use_container_width=True, hide_index=True)
+    else:
+        st.info("Nenhum callback medido.")
+
+    st.subheader("🧵 Frames mais amostrados (self time)")
+    frames = summary.get("top_frames") or []
+    if frames:
+        st.dataframe(pd.DataFrame(frames).rename(columns={"frame": "Frame", "samples": "Amostras"}),
+                     use_container_width=True, hide_index=True)
+
+    folded_files = sorted(glob.glob(os.path.join(PROFILE_DIR, "*.folded")), reverse=True)
+    if folded_files:
+        st.subheader("📥 Arquivos para Flamegraph")
+        for path in folded_files[:5]:
+            with open(path, "rb") as f:
+                st.download_button(os.path.basename(path), data=f.read(), file_name=os.path.basename(path), key=path)
+
+# Sidebar
+render_sidebar()
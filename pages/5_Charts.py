@@ -0,0 +1,148 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import os
+import json
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+from bot.ui_utils import render_sidebar, render_account_banner, load_config
+from bot.bar_archive import BarArchive
+from bot.chart import bars_columns, bars_frame, merge_bars, session_vwap, downsample_ohlc
+
+# UI Setup
+st.set_page_config(page_title="Gráficos ao Vivo", layout="wide")
+render_account_banner()
+
+st.title("📈 Gráficos ao Vivo")
+
+# Paths
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+config = load_config()
+metrics_cfg = config.get('metrics') or {}
+BOT_URL = f"http://{metrics_cfg.get('host', '127.0.0.1')}:{metrics_cfg.get('port', 9108)}"
+LIVE_ENABLED = metrics_cfg.get('enabled', True) # the bot only serves /bars from the metrics server
+
+@st.cache_resource
+def get_archive():
+    return BarArchive.from_config(config, SCRIPT_DIR, readonly=True)
+
+def archive_bars(symbol, since):
+    """1 min bars from the local archive as the same columnar frame the bot serves"""
+    archive = get_archive()
+    if archive is None:
+        return bars_frame({})
+    return bars_frame(bars_columns(archive.load(symbol, '1 min', since=since)))
+
+@st.cache_data(ttl=600)
+def archived_history(symbol, days, today):
+    # Older sessions don't change during the day: read once per symbol/range/day
+    return archive_bars(symbol, datetime.combine(today - timedelta(days=days), datetime.min.time(), timezone.utc))
+
+def fetch_live(symbol, since):
+    """Bars at or after `since` from the running bot (only the tail after the first call)"""
+    url = f"{BOT_URL}/bars?symbol={quote(symbol)}&since={since}"
+    with urllib.request.urlopen(url, timeout=1.5) as response:
+        return json.load(response)
+
+def refresh(symbol, days):
+    """Incremental update of the per-symbol cache kept in the session"""
+    cache = st.session_state.setdefault("chart_cache", {}).get((symbol, days))
+    if cache is None:
+        cache = st.session_state.chart_cache[(symbol, days)] = {"bars": None, "overlays": [], "source": "", "fig": None, "view_key": None}
+    bars = cache["bars"]
+    since = float(bars.index[-1]) if bars is not None and not bars.empty else 0.0
+    try:
+        if not LIVE_ENABLED:
+            raise RuntimeError("metrics server disabled")
+        payload = fetch_live(symbol, since)
+        update = bars_frame(payload['bars'])
+        cache["overlays"] = payload['overlays']
+        cache["source"] = "robô"
+    except Exception:
+        # Bot offline or symbol not subscribed: the archive has every closed 1 min bar
+        start = datetime.fromtimestamp(since, timezone.utc) if since else datetime.combine(datetime.now().date(), datetime.min.time(), timezone.utc)
+        update = archive_bars(symbol, start)
+        cache["overlays"] = []
+        cache["source"] = "arquivo local" if LIVE_ENABLED else "arquivo local (metrics.enabled desativado, sem dados ao vivo)"
+    if bars is None and days > 1:
+        bars = archived_history(symbol, days, datetime.now().date())
+    cache["bars"] = merge_bars(bars, update)
+    return cache
+
+def build_figure(symbol):
+    fig = go.Figure([
+        go.Candlestick(name=symbol, increasing_line_color="#26a69a", decreasing_line_color="#ef5350"),
+        go.Scatter(name="VWAP", mode="lines", line=dict(color="#ffb300", width=1.5)),
+    ])
+    fig.update_layout(
+        height=460, margin=dict(l=10, r=10, t=30, b=10), template="plotly_dark",
+        xaxis_rangeslider_visible=False, showlegend=False,
+        uirevision=symbol) # keeps zoom/pan across updates; the browser diffs instead of redrawing
+    fig.update_xaxes(rangebreaks=[dict(bounds=["sat", "mon"]), dict(bounds=[16, 9.5], pattern="hour")])
+    return fig
+
+def level_shapes(overlays):
+    shapes, annotations = [], []
+    styles = {"orb_high": ("#42a5f5", "dash", "ORB H"), "orb_low": ("#42a5f5", "dash", "ORB L"),
+              "entry": ("#66bb6a", "solid", "Entrada"), "stop": ("#ef5350", "solid", "Stop")}
+    for overlay in overlays:
+        for field, (color, dash, label) in styles.items():
+            value = overlay.get(field)
+            if not value:
+                continue
+            shapes.append(dict(type="line", xref="paper", x0=0, x1=1, y0=value, y1=value, line=dict(color=color, dash=dash, width=1)))
+            annotations.append(dict(xref="paper", x=1, y=value, text=f"{label} {value:.2f}", showarrow=False,
+                                    xanchor="right", yanchor="bottom", font=dict(size=10, color=color)))
+    return shapes, annotations
+
+def render_chart(symbol, days, max_points):
+    cache = refresh(symbol, days)
+    bars = cache["bars"]
+    if bars is None or bars.empty:
+        st.info(f"{symbol}: sem barras (robô offline e arquivo vazio).")
+        return
+
+    # Downsample and restyle only when the data changed since the last run
+    view_key = (len(bars), float(bars['c'].iloc[-1]), float(bars['h'].iloc[-1]), float(bars['l'].iloc[-1]),
+                max_points, json.dumps(cache["overlays"], sort_keys=True))
+    fig = cache["fig"] or build_figure(symbol)
+    if view_key != cache["view_key"]:
+        vwap = pd.Series(session_vwap(bars), index=bars.index)
+        view = downsample_ohlc(bars, max_points)
+        x = pd.to_datetime(view.index, unit='s', utc=True).tz_convert('America/New_York').tz_localize(None)
+        fig.data[0].update(x=x, open=view['o'], high=view['h'], low=view['l'], close=view['c'])
+        fig.data[1].update(x=x, y=vwap.reindex(view.index).to_numpy())
+        shapes, annotations = level_shapes(cache["overlays"])
+        fig.update_layout(shapes=shapes, annotations=annotations, title=dict(text=symbol, x=0.01, font=dict(size=14)))
+        cache["fig"], cache["view_key"], cache["shown"] = fig, view_key, len(view)
+
+    st.plotly_chart(fig, use_container_width=True, key=f"chart_{symbol}")
+    statuses = ", ".join(f"{o['strategy']}: {o['status']}" for o in cache["overlays"])
+    st.caption(f"Fonte: {cache['source']} | {len(bars):,} barras de 1 min → {cache.get('shown', 0):,} exibidas"
+               + (f" | {statuses}" if statuses else ""))
+
+trading_cfg = config.get('trading', {})
+symbols = trading_cfg.get('symbols', [])
+
+with st.container(border=True):
+    c1, c2, c3, c4 = st.columns([3, 1, 1, 1])
+    selected = c1.multiselect("Ativos", options=symbols, default=symbols[:2])
+    days = c2.selectbox("Período (dias)", options=[1, 2, 5, 10], index=0,
+                        help="Além do pregão atual, sessões anteriores vêm do arquivo local de barras.")
+    max_points = c3.number_input("Máx. candles", min_value=100, max_value=3000, value=600, step=100,
+                                 help="Faixas longas são reduzidas (LTTB) mantendo máximas e mínimas.")
+    auto_refresh = c4.toggle("Atualização automática", value=True)
+
+st.markdown("Barras de 1 min do robô com máxima/mínima do ORB, VWAP, entrada e stop. "
+            "Cada atualização busca só as barras novas; os gráficos se atualizam sem recarregar a página.")
+
+# One fragment per chart: only the charts rerun every 2 s, not the whole page
+chart_panel = st.fragment(run_every=2 if auto_refresh else None)(render_chart)
+for symbol in selected:
+    with st.container(border=True):
+        chart_panel(symbol, days, int(max_points))
+
+# Sidebar
+render_sidebar()
@@ -0,0 +1,106 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import os
+from bot.ui_utils import render_sidebar, render_account_banner, load_config, load_bot_state
+from bot.journal import TradeJournal
+
+# UI Setup
+st.set_page_config(page_title="Análise de Trades", layout="wide")
+render_account_banner()
+
+st.title("📒 Diário & Análise de Trades")
+
+# Paths
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@st.cache_resource
+def get_journal():
+    return TradeJournal.from_config(load_config(), SCRIPT_DIR, readonly=True)
+
+def journal_version(journal):
+    # The WAL file changes on every committed write; the main file only on checkpoints
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else 0 for p in (journal.path, journal.path + "-wal"))
+
+@st.cache_data(max_entries=8)
+def load_aggregates(version):
+    # Aggregates are kept up to date by the bot as trades close: one small table read, no history scan
+    return pd.DataFrame(get_journal().aggregates())
+
+@st.cache_data(max_entries=8)
+def load_trades(version, limit):
+    return pd.DataFrame(get_journal().trades(limit=limit))
+
+def aggregate_view(df):
+    return df.drop(columns=["scope"]).rename(columns={
+        "name": "Nome", "trades": "Trades", "wins": "Ganhos", "win_rate": "Acerto %", "pnl": "P&L $",
+        "expectancy": "Expectativa $", "avg_r": "R Médio", "profit_factor": "Fator de Lucro",
+        "best": "Melhor $", "worst": "Pior $"}).round(2)
+
+journal = get_journal()
+if journal is None:
+    st.info("Nenhum trade registrado ainda (diário desativado ou vazio).")
+else:
+    version = journal_version(journal)
+    aggregates = load_aggregates(version)
+
+    if aggregates.empty:
+        st.info("Nenhum trade encerrado ainda.")
+    else:
+        total = aggregates[aggregates["scope"] == "all"].iloc[0]
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Trades", f"{int(total['trades'])}")
+        m2.metric("Acerto", f"{total['win_rate']:.1f}%")
+        m3.metric("P&L Total", f"${total['pnl']:,.2f}")
+        m4.metric("Expectativa", f"${total['expectancy']:,.2f}")
+        m5.metric("R Médio", f"{total['avg_r']:+.2f}R" if pd.notna(total['avg_r']) else "N/A")
+
+        col_strat, col_sym = st.columns(2)
+        with col_strat:
+            st.subheader("Por Estratégia")
+            st.dataframe(aggregate_view(aggregates[aggregates["scope"] == "strategy"]), use_container_width=True, hide_index=True)
+        with col_sym:
+            st.subheader("Por Ativo")
+            st.dataframe(aggregate_view(aggregates[aggregates["scope"] == "symbol"]), use_container_width=True, hide_index=True)
+
+        sessions = aggregates[aggregates["scope"] == "session"].sort_values("name")
+        if not sessions.empty:
+            st.subheader("P&L por Pregão")
+            fig = go.Figure([
+                go.Bar(x=sessions["name"], y=sessions["pnl"], name="P&L",
+                       marker_color=["#26a69a" if v >= 0 else "#ef5350" for v in sessions["pnl"]]),
+                go.Scatter(x=sessions["name"], y=sessions["pnl"].cumsum(), name="Acumulado", mode="lines+markers",
+                           line=dict(color="#ffb300")),
+            ])
+            fig.update_layout(height=320, margin=dict(l=10, r=10, t=10, b=10), template="plotly_dark",
+                              legend=dict(orientation="h"), xaxis_type="category")
+            st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("Trades Recentes")
+    limit = st.number_input("Linhas", min_value=10, max_value=2000, value=100, step=50)
+    trades = load_trades(version, int(limit))
+    if trades.empty:
+        st.info("Nenhum trade encerrado ainda.")
+    else:
+        for col in ("entry_ts", "exit_ts"):
+            trades[col] = pd.to_datetime(trades[col], unit="s", utc=True).dt.tz_convert("America/New_York").dt.strftime("%H:%M:%S")
+        st.dataframe(trades.drop(columns=["key"]).rename(columns={
+            "session": "Pregão", "trade_id": "#", "strategy": "Estratégia", "symbol": "Ativo", "side": "Lado",
+            "quantity": "Qtd", "entry_ts": "Entrada (NY)", "exit_ts": "Saída (NY)", "entry_price": "Preço Entrada",
+            "exit_price": "Preço Saída", "initial_stop": "Stop Inicial", "pnl": "P&L $", "r_multiple": "R"}).round(2),
+            use_container_width=True, hide_index=True, height=420)
+        st.caption("P&L bruto (sem comissões). R = P&L ÷ risco inicial (distância entre entrada média e o stop enviado com a entrada × quantidade).")
+
+# Shadow variants (simulated fills, live from bot_state.json)
+shadow = load_bot_state().get("_shadow") or []
+if shadow:
+    st.subheader("👥 Modo Sombra")
+    st.markdown("Variantes rodando sobre os mesmos dados ao vivo com execução simulada local (nenhuma ordem vai ao IB). "
+                "**vs Real** compara o P&L da variante com a estratégia real do mesmo ativo.")
+    st.dataframe(pd.DataFrame(shadow).drop(columns=["key"]).rename(columns={
+        "symbol": "Ativo", "variant": "Variante", "strategy": "Base", "status": "Status", "position": "Pos",
+        "realized_pnl": "P&L Realizado $", "pnl": "P&L $", "live_pnl": "P&L Estratégia Real $", "vs_live": "vs Real $"}),
+        use_container_width=True, hide_index=True)
+
+# Sidebar
+render_sidebar()